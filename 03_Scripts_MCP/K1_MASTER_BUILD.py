@@ -5,16 +5,43 @@ K1-Lightwave Digital Twin - Master Scene Build (Single Source of Truth)
 Complete pipeline in one pass:
 1. System Reset (Cycles, AgX, Clean Slate)
 2. Corrected Material Palette (Anthracite, Yellow, Rose Copper, Satin Silver, Silver Ghost)
-3. Smart Material Assignment (by keyword)
+3. Smart Material Assignment (by part role, see k1_parts.py)
 4. Cinematic Studio Lighting (High Power)
 5. Macro Camera Setup
 
 All previous patch scripts are obsoleted by this single build.
+
+Render quality: RENDER_PROFILES defines draft/review/final tiers (adaptive
+noise threshold, bounce limits, denoising, resolution %). Pick one with
+reset_render_settings(profile) or the K1_RENDER_QUALITY environment
+variable; render_batch.py sets it per job.
+
+Materials: PALETTE defines the palette as data. Each material carries a hash
+of its entry as a custom property and is only rebuilt when that entry (or
+its node tree) changed, so repeated builds leave shaders alone. Set
+K1_REBUILD_MATERIALS=1 to force a rebuild.
 """
 
 import bpy
+import hashlib
+import json
 import math
 import os
+import sys
+
+
+def scripts_dir():
+    """03_Scripts_MCP/, whether run as a file or exec'd from BlenderMCP."""
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        return os.path.join(os.getcwd(), '03_Scripts_MCP')
+
+
+if scripts_dir() not in sys.path:
+    sys.path.insert(0, scripts_dir())
+
+from k1_parts import ROLE_MATERIALS, part_material
 
 
 # =============================================================================
@@ -39,8 +66,74 @@ def safe_set_input(bsdf, input_name, value):
 # PART 1: SYSTEM RESET
 # =============================================================================
 
-def reset_render_settings():
-    """Reset render engine, samples, and color management."""
+# Render quality tiers. "samples" is the adaptive-sampling cap; pixels stop
+# early once their noise falls below "noise_threshold".
+RENDER_PROFILES = {
+    'draft': {
+        'samples': 64,
+        'preview_samples': 16,
+        'noise_threshold': 0.1,
+        'max_bounces': 4,
+        'diffuse_bounces': 2,
+        'glossy_bounces': 2,
+        'transmission_bounces': 4,
+        'denoise': True,
+        'resolution_percentage': 50,
+    },
+    'review': {
+        'samples': 256,
+        'preview_samples': 64,
+        'noise_threshold': 0.03,
+        'max_bounces': 8,
+        'diffuse_bounces': 3,
+        'glossy_bounces': 4,
+        'transmission_bounces': 8,
+        'denoise': True,
+        'resolution_percentage': 100,
+    },
+    'final': {
+        'samples': 1024,
+        'preview_samples': 128,
+        'noise_threshold': 0.01,
+        'max_bounces': 12,
+        'diffuse_bounces': 4,
+        'glossy_bounces': 6,
+        'transmission_bounces': 12,
+        'denoise': True,
+        'resolution_percentage': 100,
+    },
+}
+DEFAULT_RENDER_PROFILE = 'final'
+
+
+def render_profile_name(profile=None):
+    """Explicit profile, else $K1_RENDER_QUALITY, else DEFAULT_RENDER_PROFILE."""
+    name = profile or os.environ.get('K1_RENDER_QUALITY') or DEFAULT_RENDER_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (use {', '.join(RENDER_PROFILES)})")
+    return name
+
+
+def apply_render_profile(scene, profile=None):
+    """Apply a RENDER_PROFILES tier to scene.cycles and the output resolution %."""
+    name = render_profile_name(profile)
+    p = RENDER_PROFILES[name]
+    cycles = scene.cycles
+    cycles.samples = p['samples']
+    cycles.preview_samples = p['preview_samples']
+    cycles.use_adaptive_sampling = True
+    cycles.adaptive_threshold = p['noise_threshold']
+    cycles.max_bounces = p['max_bounces']
+    cycles.diffuse_bounces = p['diffuse_bounces']
+    cycles.glossy_bounces = p['glossy_bounces']
+    cycles.transmission_bounces = p['transmission_bounces']
+    cycles.use_denoising = p['denoise']
+    scene.render.resolution_percentage = p['resolution_percentage']
+    return name
+
+
+def reset_render_settings(profile=None):
+    """Reset render engine, quality profile, and color management."""
     scene = bpy.context.scene
 
     # Switch to Cycles
@@ -57,11 +150,6 @@ def reset_render_settings():
     except Exception:
         scene.cycles.device = 'CPU'
 
-    # Sampling
-    cycles.samples = 1024
-    cycles.preview_samples = 128
-    cycles.max_bounces = 12
-
     # Color Management
     try:
         scene.view_settings.view_transform = 'AgX'
@@ -72,9 +160,15 @@ def reset_render_settings():
     # Resolution
     scene.render.resolution_x = 1920
     scene.render.resolution_y = 1080
-    scene.render.resolution_percentage = 100
 
-    print("✓ Render Settings: Cycles, 1024 samples, AgX High Contrast")
+    # Sampling, bounces, denoising, resolution %
+    name = apply_render_profile(scene, profile)
+    p = RENDER_PROFILES[name]
+    print(
+        f"✓ Render Settings: Cycles, '{name}' profile "
+        f"(<= {p['samples']} samples, noise {p['noise_threshold']}, "
+        f"{p['resolution_percentage']}%), AgX High Contrast"
+    )
 
 
 def reset_world_background():
@@ -118,10 +212,11 @@ def cleanup_lights():
 
 
 def cleanup_materials():
-    """Delete all existing materials to prevent ghost data."""
+    """Delete unused non-palette materials to prevent ghost data."""
     count = 0
     for mat in list(bpy.data.materials):
-        if mat.users == 0:  # Only delete unused materials
+        # Palette materials are kept so ensure_palette() can skip them
+        if mat.users == 0 and mat.name not in PALETTE:
             bpy.data.materials.remove(mat)
             count += 1
     print(f"✓ Cleanup: Removed {count} unused materials")
@@ -131,168 +226,157 @@ def cleanup_materials():
 # PART 2: CORRECTED MATERIAL PALETTE
 # =============================================================================
 
-def create_anthracite_body():
-    """Mt_Body_Anthracite: Metallic with fine powder-coat grain."""
-    # Create/reset material
-    mat = bpy.data.materials.get('Mt_Body_Anthracite')
-    if mat:
-        bpy.data.materials.remove(mat)
-
-    mat = bpy.data.materials.new(name='Mt_Body_Anthracite')
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
-
-    # Clear all nodes
-    nodes.clear()
-
-    # Create Principled BSDF
-    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (200, 0)
-    bsdf.inputs['Base Color'].default_value = (*hex_to_rgb('#2F3133'), 1.0)
-    bsdf.inputs['Metallic'].default_value = 1.0
-    bsdf.inputs['Roughness'].default_value = 0.5
-
-    # Micro-detail: Noise Texture for powder-coat grain
-    tex_coord = nodes.new('ShaderNodeTexCoord')
-    tex_coord.location = (-800, 0)
-
-    noise = nodes.new('ShaderNodeTexNoise')
-    noise.location = (-600, 0)
-    noise.inputs['Scale'].default_value = 2000.0  # High scale = fine grain
-    noise.inputs['Detail'].default_value = 16.0
-    noise.inputs['Roughness'].default_value = 0.6
-
-    bump = nodes.new('ShaderNodeBump')
-    bump.location = (-400, 0)
-    bump.inputs['Strength'].default_value = 0.02  # Subtle bump
-    bump.inputs['Distance'].default_value = 0.005
-
-    # Output
-    output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (400, 0)
-
-    # Connect
-    links.new(tex_coord.outputs['Object'], noise.inputs['Vector'])
-    links.new(noise.outputs['Fac'], bump.inputs['Height'])
-    links.new(bump.outputs['Normal'], bsdf.inputs['Normal'])
-    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-
-    print("✓ Mt_Body_Anthracite: #2F3133, Metallic 1.0, Noise Scale 2000 (fine grain)")
-    return mat
-
-
-def create_yellow_accents():
-    """Mt_Accent_Yellow: Matte plastic, safety yellow."""
-    mat = bpy.data.materials.get('Mt_Accent_Yellow')
-    if mat:
-        bpy.data.materials.remove(mat)
-
-    mat = bpy.data.materials.new(name='Mt_Accent_Yellow')
+# The palette is data: each material is built from its entry and stamped with
+# a hash of that entry, so re-running the build leaves unchanged materials
+# (and their compiled shaders) alone. Bump PALETTE_VERSION when the node
+# layout built by build_palette_material() itself changes.
+PALETTE_VERSION = 1
+PALETTE_HASH_PROP = 'k1_palette_hash'
+PALETTE_NODES_PROP = 'k1_palette_nodes'
+
+PALETTE = {
+    'Mt_Body_Anthracite': {
+        'label': 'Anthracite Body (Powder-Coat, Fine Grain)',
+        'bsdf': {'Base Color': '#2F3133', 'Metallic': 1.0, 'Roughness': 0.5},
+        # Noise Texture -> Bump micro-detail; high scale = fine grain
+        'grain': {'scale': 2000.0, 'detail': 16.0, 'roughness': 0.6,
+                  'strength': 0.02, 'distance': 0.005},
+    },
+    'Mt_Accent_Yellow': {
+        'label': 'Yellow Accents (Matte Plastic)',
+        'bsdf': {'Base Color': '#FFC400', 'Metallic': 0.0, 'Roughness': 0.4},
+    },
+    'Mt_Logo_Copper': {
+        'label': 'Rose Copper Logo (Polished Metal)',
+        'bsdf': {'Base Color': '#D67658', 'Metallic': 1.0, 'Roughness': 0.2},
+    },
+    'Mt_Satin_Silver': {
+        'label': 'Satin Silver Connector (Brushed Aluminum)',
+        'bsdf': {'Base Color': '#E0E0E0', 'Metallic': 1.0, 'Roughness': 0.35,
+                 'Anisotropic': 0.7, 'Anisotropic Rotation': 0.0},
+    },
+    'Mt_SilverGhost': {
+        'label': 'Silver Ghost LGP (Frosted Glass)',
+        'bsdf': {'Base Color': '#C8C8C8', 'Transmission': 0.95, 'Metallic': 0.3,
+                 'Roughness': 0.3, 'IOR': 1.52, 'Alpha': 1.0},
+    },
+}
+
+
+def palette_hash(spec):
+    """Content hash of a palette entry (plus PALETTE_VERSION)."""
+    blob = json.dumps({'version': PALETTE_VERSION, 'spec': spec}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def build_palette_material(mat, spec):
+    """(Re)build a material's node tree from its palette entry, in place."""
     mat.use_nodes = True
     nodes = mat.node_tree.nodes
     links = mat.node_tree.links
-
     nodes.clear()
 
+    grain = spec.get('grain')
     bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
-    bsdf.inputs['Base Color'].default_value = (*hex_to_rgb('#FFC400'), 1.0)
-    safe_set_input(bsdf, 'Metallic', 0.0)  # Plastic
-    safe_set_input(bsdf, 'Roughness', 0.4)
+    bsdf.location = (200, 0) if grain else (0, 0)
+    for input_name, value in spec['bsdf'].items():
+        if isinstance(value, str):
+            value = (*hex_to_rgb(value), 1.0)
+        safe_set_input(bsdf, input_name, value)
 
     output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
+    output.location = (400, 0) if grain else (300, 0)
     links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
 
-    print("✓ Mt_Accent_Yellow: #FFC400, Metallic 0.0, Roughness 0.4")
-    return mat
-
-
-def create_rose_copper_logo():
-    """Mt_Logo_Copper: Rose/Red Copper (not brass/gold)."""
-    mat = bpy.data.materials.get('Mt_Logo_Copper')
-    if mat:
-        bpy.data.materials.remove(mat)
-
-    mat = bpy.data.materials.new(name='Mt_Logo_Copper')
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
-
-    nodes.clear()
-
-    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
-    bsdf.inputs['Base Color'].default_value = (*hex_to_rgb('#D67658'), 1.0)
-    safe_set_input(bsdf, 'Metallic', 1.0)  # Full metal
-    safe_set_input(bsdf, 'Roughness', 0.2)  # Polished
-
-    output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-
-    print("✓ Mt_Logo_Copper: #D67658 (Rose Copper), Metallic 1.0, Roughness 0.2")
-    return mat
-
-
-def create_satin_silver_connector():
-    """Mt_Satin_Silver: Brushed aluminum with anisotropic grain."""
-    mat = bpy.data.materials.get('Mt_Satin_Silver')
-    if mat:
-        bpy.data.materials.remove(mat)
-
-    mat = bpy.data.materials.new(name='Mt_Satin_Silver')
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
-
-    nodes.clear()
-
-    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
-    bsdf.inputs['Base Color'].default_value = (*hex_to_rgb('#E0E0E0'), 1.0)
-    safe_set_input(bsdf, 'Metallic', 1.0)
-    safe_set_input(bsdf, 'Roughness', 0.35)
-    safe_set_input(bsdf, 'Anisotropic', 0.7)  # Brushed grain
-    safe_set_input(bsdf, 'Anisotropic Rotation', 0.0)
-
-    output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-
-    print("✓ Mt_Satin_Silver: #E0E0E0, Anisotropic 0.7 (brushed)")
-    return mat
-
-
-def create_silverghost_lgp():
-    """Mt_SilverGhost: Frosted glass/metal for light guides."""
-    mat = bpy.data.materials.get('Mt_SilverGhost')
-    if mat:
-        bpy.data.materials.remove(mat)
-
-    mat = bpy.data.materials.new(name='Mt_SilverGhost')
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
-
-    nodes.clear()
-
-    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
-    bsdf.inputs['Base Color'].default_value = (*hex_to_rgb('#C8C8C8'), 1.0)
-    safe_set_input(bsdf, 'Transmission', 0.95)
-    safe_set_input(bsdf, 'Metallic', 0.3)
-    safe_set_input(bsdf, 'Roughness', 0.3)
-    safe_set_input(bsdf, 'IOR', 1.52)
-    safe_set_input(bsdf, 'Alpha', 1.0)
-
-    output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-
-    print("✓ Mt_SilverGhost: #C8C8C8, Trans 0.95 (frosted glass)")
-    return mat
+    if grain:
+        tex_coord = nodes.new('ShaderNodeTexCoord')
+        tex_coord.location = (-800, 0)
+
+        noise = nodes.new('ShaderNodeTexNoise')
+        noise.location = (-600, 0)
+        noise.inputs['Scale'].default_value = grain['scale']
+        noise.inputs['Detail'].default_value = grain['detail']
+        noise.inputs['Roughness'].default_value = grain['roughness']
+
+        bump = nodes.new('ShaderNodeBump')
+        bump.location = (-400, 0)
+        bump.inputs['Strength'].default_value = grain['strength']
+        bump.inputs['Distance'].default_value = grain['distance']
+
+        links.new(tex_coord.outputs['Object'], noise.inputs['Vector'])
+        links.new(noise.outputs['Fac'], bump.inputs['Height'])
+        links.new(bump.outputs['Normal'], bsdf.inputs['Normal'])
+
+
+def _socket_value(socket):
+    value = getattr(socket, 'default_value', None)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return round(value, 6)
+    return [round(v, 6) for v in value]
+
+
+def node_tree_digest(tree):
+    """Hash of a node tree's nodes, input values and links."""
+    nodes = sorted(
+        [node.bl_idname, node.name,
+         [[sock.identifier, _socket_value(sock)] for sock in node.inputs]]
+        for node in tree.nodes
+    )
+    links = sorted(
+        [link.from_node.name, link.from_socket.identifier,
+         link.to_node.name, link.to_socket.identifier]
+        for link in tree.links
+    )
+    blob = json.dumps([nodes, links])
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def ensure_material(name, spec, force=False):
+    """
+    Palette material, rebuilt only if its entry changed.
+
+    A material whose stored hash matches and whose node tree digest (nodes,
+    input values, links) is what the build left is returned untouched.
+    Otherwise its node tree is rebuilt in place, so objects already using it
+    keep the same datablock. That covers new entries, edited entries and
+    hand/script edits to node inputs or links (e.g. K1_ENHANCEMENTS.py);
+    node properties outside the inputs (a noise's dimensions, ...) are not
+    compared. Returns (material, rebuilt).
+    """
+    digest = palette_hash(spec)
+    mat = bpy.data.materials.get(name)
+    if (not force and mat is not None and mat.use_nodes
+            and mat.get(PALETTE_HASH_PROP) == digest
+            and mat.get(PALETTE_NODES_PROP) == node_tree_digest(mat.node_tree)):
+        return mat, False
+
+    if mat is None:
+        mat = bpy.data.materials.new(name=name)
+    build_palette_material(mat, spec)
+    mat[PALETTE_HASH_PROP] = digest
+    mat[PALETTE_NODES_PROP] = node_tree_digest(mat.node_tree)
+    return mat, True
+
+
+def ensure_palette(force=None):
+    """
+    Bring every PALETTE material up to date.
+
+    force defaults to $K1_REBUILD_MATERIALS=1. Returns {name: rebuilt}.
+    """
+    if force is None:
+        force = os.environ.get('K1_REBUILD_MATERIALS') == '1'
+    results = {}
+    for name, spec in PALETTE.items():
+        _, rebuilt = ensure_material(name, spec, force=force)
+        results[name] = rebuilt
+        values = ', '.join(f"{k} {v}" for k, v in spec['bsdf'].items())
+        print(f"✓ {name}: {values} ({'built' if rebuilt else 'unchanged'})")
+    rebuilt = sum(results.values())
+    print(f"✓ Palette v{PALETTE_VERSION}: {rebuilt} rebuilt, {len(results) - rebuilt} unchanged")
+    return results
 
 
 # =============================================================================
@@ -300,37 +384,31 @@ def create_silverghost_lgp():
 # =============================================================================
 
 def assign_materials_by_keyword():
-    """Assign materials to objects based on name keywords."""
-    materials = {
-        'Mt_Body_Anthracite': ['body', 'chassis', 'main'],
-        'Mt_Accent_Yellow': ['leg', 'stand', 'end', 'yellow'],
-        'Mt_Logo_Copper': ['logo', 'text', 'badge'],
-        'Mt_Satin_Silver': ['connect', 'bridge', 'middle'],
-        'Mt_SilverGhost': ['guide', 'plate', 'lgp']
-    }
-
-    assigned = {name: 0 for name in materials}
+    """Assign palette materials by part role (k1_parts.json, O(1) per object)."""
+    assigned = {name: 0 for name in ROLE_MATERIALS.values()}
+    unknown = 0
 
     for obj in bpy.data.objects:
         if obj.type != 'MESH':
             continue
 
-        name_lower = obj.name.lower()
-
-        for mat_name, keywords in materials.items():
-            if any(k in name_lower for k in keywords):
-                mat = bpy.data.materials.get(mat_name)
-                if mat:
-                    if len(obj.data.materials) > 0:
-                        obj.data.materials[0] = mat
-                    else:
-                        obj.data.materials.append(mat)
-                    assigned[mat_name] += 1
-                break
+        mat_name = part_material(obj.name)
+        if mat_name is None:
+            unknown += 1
+            continue
+        mat = bpy.data.materials.get(mat_name)
+        if mat:
+            if len(obj.data.materials) > 0:
+                obj.data.materials[0] = mat
+            else:
+                obj.data.materials.append(mat)
+            assigned[mat_name] += 1
 
     for mat_name, count in assigned.items():
         if count > 0:
             print(f"  {mat_name}: {count} object(s)")
+    if unknown:
+        print(f"  (no role for {unknown} mesh(es))")
 
     return assigned
 
@@ -459,7 +537,7 @@ def setup_macro_camera():
 # MAIN EXECUTION
 # =============================================================================
 
-def main():
+def main(profile=None):
     """Execute complete K1-Lightwave scene build."""
     print("=" * 70)
     print("K1-LIGHTWAVE MASTER BUILD (SINGLE SOURCE OF TRUTH)")
@@ -468,15 +546,11 @@ def main():
     print("\n[PART 1: SYSTEM RESET]")
     cleanup_materials()
     cleanup_lights()
-    reset_render_settings()
+    reset_render_settings(profile)
     reset_world_background()
 
     print("\n[PART 2: MATERIAL PALETTE (CORRECTED)]")
-    create_anthracite_body()
-    create_yellow_accents()
-    create_rose_copper_logo()
-    create_satin_silver_connector()
-    create_silverghost_lgp()
+    ensure_palette()
 
     print("\n[PART 3: MATERIAL ASSIGNMENT]")
     assigned = assign_materials_by_keyword()
@@ -488,11 +562,8 @@ def main():
     print("✓ K1-LIGHTWAVE SCENE READY FOR RENDER")
     print("=" * 70)
     print("\nPalette:")
-    print("  • Anthracite Body (Powder-Coat, Fine Grain)")
-    print("  • Yellow Accents (Matte Plastic)")
-    print("  • Rose Copper Logo (Polished Metal)")
-    print("  • Satin Silver Connector (Brushed Aluminum)")
-    print("  • Silver Ghost LGP (Frosted Glass)")
+    for spec in PALETTE.values():
+        print(f"  • {spec['label']}")
     print("\n" + "=" * 70)
 
 
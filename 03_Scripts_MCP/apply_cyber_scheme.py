@@ -8,9 +8,26 @@ Replaces current material palette with Anthracite/Yellow/Copper scheme:
 - Logo: Metallic Copper (#B87333)
 """
 
+import os
+import sys
+
 import bpy
 
 
+def scripts_dir():
+    """03_Scripts_MCP/, whether run as a file or exec'd from BlenderMCP."""
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        return os.path.join(os.getcwd(), '03_Scripts_MCP')
+
+
+if scripts_dir() not in sys.path:
+    sys.path.insert(0, scripts_dir())
+
+from k1_parts import part_role
+
+
 def hex_to_rgb(hex_str):
     """Convert hex color to RGB tuple (0-1 range)."""
     hex_str = hex_str.strip('#')
@@ -149,50 +166,35 @@ def update_logo_material():
 
 def apply_materials_to_objects():
     """
-    Apply the new materials to objects in the scene based on keyword matching.
+    Apply the new materials to objects in the scene by part role (k1_parts.py).
     """
     # Get the materials
     body_mat = bpy.data.materials.get('Mt_Body_Anthracite')
     accent_mat = bpy.data.materials.get('Mt_Accent_Yellow')
     logo_mat = bpy.data.materials.get('Mt_Logo_Copper')
 
+    # This scheme paints connectors and light guides as accents too
+    by_role = {
+        'body': ('body', body_mat),
+        'accent': ('accent', accent_mat),
+        'connector': ('accent', accent_mat),
+        'lgp': ('accent', accent_mat),
+        'logo': ('logo', logo_mat),
+    }
+
     applied = {'body': 0, 'accent': 0, 'logo': 0}
 
     for obj in bpy.data.objects:
         if obj.type != 'MESH':
             continue
 
-        name = obj.name.lower()
-
-        # Apply body material to chassis/main body
-        if any(k in name for k in ['chassis', 'body', 'main', 'case']):
-            if body_mat:
-                if len(obj.data.materials) > 0:
-                    obj.data.materials[0] = body_mat
-                else:
-                    obj.data.materials.append(body_mat)
-                applied['body'] += 1
-            continue
-
-        # Apply accent material to legs/end caps/connectors
-        if any(k in name for k in ['leg', 'end_cap', 'connector', 'accent', 'stand', 'guide', 'plate']):
-            if accent_mat:
-                if len(obj.data.materials) > 0:
-                    obj.data.materials[0] = accent_mat
-                else:
-                    obj.data.materials.append(accent_mat)
-                applied['accent'] += 1
-            continue
-
-        # Apply logo material to badge/logo/text
-        if any(k in name for k in ['badge', 'logo', 'text']):
-            if logo_mat:
-                if len(obj.data.materials) > 0:
-                    obj.data.materials[0] = logo_mat
-                else:
-                    obj.data.materials.append(logo_mat)
-                applied['logo'] += 1
-            continue
+        group, mat = by_role.get(part_role(obj.name), (None, None))
+        if mat:
+            if len(obj.data.materials) > 0:
+                obj.data.materials[0] = mat
+            else:
+                obj.data.materials.append(mat)
+            applied[group] += 1
 
     return applied
 
@@ -1,7 +1,19 @@
 import bpy
 import os
+import sys
 from mathutils import Vector
 
+def scripts_dir():
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        return os.path.join(os.getcwd(), '03_Scripts_MCP')
+
+if scripts_dir() not in sys.path:
+    sys.path.insert(0, scripts_dir())
+
+from k1_parts import part_role
+
 def open_master_scene():
     repo_root = os.path.dirname(os.path.dirname(__file__))
     blend_path = os.path.join(repo_root, '01_Blender_Production', 'K1_Master_Scene_v01.blend')
@@ -20,45 +32,35 @@ def ensure_material_on_object(obj, mat):
         obj.data.materials[0] = mat
     return True
 
-def matches(name, keywords):
-    n = name.lower()
-    return any(k.lower() in n for k in keywords)
-
 def assign_materials_by_keywords():
     m_red = get_material('Mt_FoundersRed')
     m_gun = get_material('Mt_Gunmetal')
     m_badge = get_material('Mt_BadgeSteel')
     unassigned = []
-    count_red = 0
-    count_gun = 0
-    count_badge = 0
     keyword_assigned = set()
+    # k1_parts role -> this palette; unknown parts fall through to the size heuristic
+    role_targets = {
+        'body': 'red',
+        'accent': 'gun',
+        'connector': 'gun',
+        'logo': 'badge',
+        'lgp': 'badge',
+    }
+    mats = {'red': m_red, 'gun': m_gun, 'badge': m_badge}
+    counts = {'red': 0, 'gun': 0, 'badge': 0}
     meshes = [o for o in bpy.data.objects if o.type == 'MESH']
     for obj in meshes:
-        if obj.type != 'MESH':
-            continue
-        name = obj.name
-        if matches(name, ['Body', 'Chassis', 'Main', 'Case']):
-            if ensure_material_on_object(obj, m_red):
-                count_red += 1
-                keyword_assigned.add(obj.name)
-            else:
-                unassigned.append(name)
-            continue
-        if matches(name, ['Leg', 'Stand', 'Screw', 'Bolt', 'USB', 'Port', 'Accent']):
-            if ensure_material_on_object(obj, m_gun):
-                count_gun += 1
-                keyword_assigned.add(obj.name)
-            else:
-                unassigned.append(name)
-            continue
-        if matches(name, ['Badge', 'Logo', 'Text']):
-            if ensure_material_on_object(obj, m_badge):
-                count_badge += 1
-                keyword_assigned.add(obj.name)
-            else:
-                unassigned.append(name)
+        target = role_targets.get(part_role(obj.name))
+        if target is None:
             continue
+        if ensure_material_on_object(obj, mats[target]):
+            counts[target] += 1
+            keyword_assigned.add(obj.name)
+        else:
+            unassigned.append(obj.name)
+    count_red = counts['red']
+    count_gun = counts['gun']
+    count_badge = counts['badge']
     remaining = [o for o in meshes if o.name not in keyword_assigned]
 
     def world_bounds(obj):
@@ -11,9 +11,26 @@ Material Physics:
 - Combined: Industrial precision, "jewel setting" for copper logo
 """
 
+import os
+import sys
+
 import bpy
 
 
+def scripts_dir():
+    """03_Scripts_MCP/, whether run as a file or exec'd from BlenderMCP."""
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        return os.path.join(os.getcwd(), '03_Scripts_MCP')
+
+
+if scripts_dir() not in sys.path:
+    sys.path.insert(0, scripts_dir())
+
+from k1_parts import part_role
+
+
 def hex_to_rgb(hex_str):
     """Convert hex color to RGB tuple (0-1 range)."""
     hex_str = hex_str.strip('#')
@@ -96,19 +113,9 @@ def create_satin_silver_material():
 def is_connector(obj_name):
     """
     Check if object should be targeted as a connector.
-    Returns True if name contains connector keywords AND is safe (not body/logo/leg).
+    Returns True if its part role (k1_parts.json / ROLE_KEYWORDS) is 'connector'.
     """
-    name_lower = obj_name.lower()
-
-    # Target keywords for connector
-    connector_keywords = ['connect', 'bridge', 'middle', 'center', 'bracket', 'join']
-    is_connector_obj = any(k in name_lower for k in connector_keywords)
-
-    # Safety keywords to exclude
-    exclude_keywords = ['logo', 'text', 'body', 'leg', 'leg', 'yellow', 'badge']
-    is_excluded = any(k in name_lower for k in exclude_keywords)
-
-    return is_connector_obj and not is_excluded
+    return part_role(obj_name) == 'connector'
 
 
 def apply_satin_silver_to_connectors():
@@ -156,8 +163,8 @@ def main():
         print(f"\n✓ Material applied to {len(applied)} object(s)")
     else:
         print("\n⚠ No connector objects found matching criteria")
-        print("  Search terms: 'connect', 'bridge', 'middle', 'center', 'bracket', 'join'")
-        print("  Excluded: 'logo', 'text', 'body', 'leg', 'yellow', 'badge'")
+        print("  No mesh has the 'connector' role in k1_parts.json or by name keywords")
+        print("  List part roles: python 03_Scripts_MCP/k1_parts.py")
 
     print("\n" + "=" * 60)
     print("✓ Satin Silver Connector Material Ready")
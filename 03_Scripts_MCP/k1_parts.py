@@ -0,0 +1,289 @@
+"""
+k1_parts.py
+K1-Lightwave Digital Twin - Canonical Part -> Material Table
+
+The K1 engineering exports name their parts after CAD bodies
+("Body_447*2_(3)*4", "Body_878*4*2*_(3)", ...), so keyword rules on object
+names can't tell the chassis from the endcaps or the light-guide plate.
+This module classifies every part once, offline, from the OBJ/GLB sources
+in 00_Engineering_Source/ and stores the result as k1_parts.json:
+
+  {"version": 1, "sources": {"K1-Endcaps.obj": sha256, ...},
+   "parts": {"Body_486": {"role": "lgp", "source": "K1-Body+Plate.obj",
+                          "size": [x, y, z]}, ...}}
+
+Roles: body, accent, logo, connector, lgp. A part is
+  lgp        if its bounding box is planar (thinnest/longest < PLANAR_RATIO)
+  FILE_ROLES if its source file name says so (endcaps -> accent, ...)
+  body       otherwise
+Each Blender script maps roles to its own palette (ROLE_MATERIALS is the
+K1_MASTER_BUILD.py one), so all of them agree on what a part is.
+
+Unnamed GLB nodes (all of them in the current exports) are keyed
+"<file stem>_<node index>", e.g. K1-Connector_0; rename the objects to
+those keys when importing a GLB, since Blender's importer calls every file's
+first node "Node_0".
+
+Blender scripts look parts up with part_role(obj.name): a dict hit on the
+table (".001" suffixes stripped), else ROLE_KEYWORDS for objects renamed in
+the scene (memoised per name). The table is rebuilt only when a source
+file's content hash changes; without 00_Engineering_Source/ the committed
+table is used as is.
+
+Usage:
+  python 03_Scripts_MCP/k1_parts.py            # rebuild if sources changed
+  python 03_Scripts_MCP/k1_parts.py --force
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+from pathlib import Path
+
+TABLE_VERSION = 1
+SOURCE_DIR = Path(__file__).resolve().parent.parent / '00_Engineering_Source'
+TABLE_PATH = Path(__file__).resolve().with_name('k1_parts.json')
+SOURCE_SUFFIXES = ('.obj', '.glb')
+
+# thinnest / longest bounding-box side below this -> flat plate
+PLANAR_RATIO = 0.02
+
+# Source file name keyword -> role for non-planar parts
+FILE_ROLES = {
+    'endcap': 'accent',
+    'connector': 'connector',
+}
+
+# Fallback for names not in the table (objects renamed in the scene).
+# Ordered most specific first: the first role with a matching keyword wins.
+ROLE_KEYWORDS = (
+    ('logo', ('logo', 'text', 'badge')),
+    ('connector', ('connect', 'bridge', 'middle', 'center', 'bracket', 'join')),
+    ('lgp', ('guide', 'plate', 'lgp')),
+    ('accent', ('leg', 'stand', 'end', 'yellow', 'accent', 'screw', 'bolt', 'usb', 'port')),
+    ('body', ('body', 'chassis', 'main', 'case')),
+)
+# Names that must not take a role even when one of its keywords matches
+# ("Body_Center" is chassis, not a connector; fix_connector.py's old guard)
+ROLE_EXCLUDES = {
+    'connector': ('logo', 'text', 'body', 'leg', 'yellow', 'badge'),
+}
+
+# K1_MASTER_BUILD.py palette
+ROLE_MATERIALS = {
+    'body': 'Mt_Body_Anthracite',
+    'accent': 'Mt_Accent_Yellow',
+    'logo': 'Mt_Logo_Copper',
+    'connector': 'Mt_Satin_Silver',
+    'lgp': 'Mt_SilverGhost',
+}
+
+_DUPLICATE_SUFFIX = re.compile(r'\.\d{3}$')
+_table = None
+_keyword_roles = {}
+
+
+# =============================================================================
+# SOURCE PARSING
+# =============================================================================
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_files():
+    """Non-empty OBJ/GLB exports in 00_Engineering_Source/."""
+    if not SOURCE_DIR.is_dir():
+        return []
+    return sorted(p for p in SOURCE_DIR.iterdir()
+                  if p.suffix.lower() in SOURCE_SUFFIXES and p.stat().st_size > 0)
+
+
+def obj_parts(path):
+    """{group/object name: (min xyz, max xyz)} from the vertices its faces use."""
+    verts = []
+    used = {}
+    current = path.stem
+    with open(path) as f:
+        for line in f:
+            tag = line[:2]
+            if tag == 'v ':
+                verts.append(tuple(map(float, line.split()[1:4])))
+            elif tag in ('g ', 'o '):
+                current = line[2:].strip() or path.stem
+            elif tag == 'f ':
+                ids = used.setdefault(current, set())
+                for token in line.split()[1:]:
+                    i = int(token.split('/')[0])
+                    ids.add(i - 1 if i > 0 else len(verts) + i)
+    parts = {}
+    for name, ids in used.items():
+        pts = [verts[i] for i in ids]
+        parts[name] = (tuple(min(p[k] for p in pts) for k in range(3)),
+                       tuple(max(p[k] for p in pts) for k in range(3)))
+    return parts
+
+
+def glb_parts(path):
+    """{node (or mesh) name: bounds} from POSITION accessor min/max.
+
+    The K1 exports leave every node and mesh unnamed; those are keyed
+    "<file stem>_<node index>" (K1-Connector_0, ...), which stays unique
+    across files where the glTF importer's "Node_<index>" would not.
+    """
+    data = path.read_bytes()
+    length, = struct.unpack_from('<I', data, 12)
+    gltf = json.loads(data[20:20 + length])
+    meshes = gltf.get('meshes', [])
+    accessors = gltf.get('accessors', [])
+    parts = {}
+    for i, node in enumerate(gltf.get('nodes', [])):
+        if 'mesh' not in node:
+            continue
+        mesh = meshes[node['mesh']]
+        name = node.get('name') or mesh.get('name') or f'{path.stem}_{i}'
+        lo, hi = [], []
+        for prim in mesh.get('primitives', []):
+            acc = accessors[prim['attributes']['POSITION']]
+            lo.append(acc['min'])
+            hi.append(acc['max'])
+        if lo:
+            parts[name] = (tuple(min(v[k] for v in lo) for k in range(3)),
+                           tuple(max(v[k] for v in hi) for k in range(3)))
+    return parts
+
+
+# =============================================================================
+# CLASSIFICATION
+# =============================================================================
+
+def classify_part(source_name, size):
+    """Role from bounding-box size and the source file name."""
+    longest = max(size)
+    if longest > 0 and min(size) / longest < PLANAR_RATIO:
+        return 'lgp'
+    stem = source_name.lower()
+    for keyword, role in FILE_ROLES.items():
+        if keyword in stem:
+            return role
+    return 'body'
+
+
+def build_part_table():
+    """Classify every named part in the sources."""
+    sources = {}
+    parts = {}
+    for path in source_files():
+        sources[path.name] = hash_file(path)
+        found = obj_parts(path) if path.suffix.lower() == '.obj' else glb_parts(path)
+        for name, (lo, hi) in found.items():
+            size = [round(h - l, 6) for l, h in zip(lo, hi)]
+            parts[name] = {
+                'role': classify_part(path.name, size),
+                'source': path.name,
+                'size': size,
+            }
+    return {'version': TABLE_VERSION, 'sources': sources, 'parts': parts}
+
+
+def table_is_current(table):
+    if table.get('version') != TABLE_VERSION:
+        return False
+    current = {p.name: p for p in source_files()}
+    if set(current) != set(table.get('sources', {})):
+        return False
+    return all(hash_file(p) == table['sources'][name] for name, p in current.items())
+
+
+def write_part_table(table):
+    tmp = TABLE_PATH.with_name(TABLE_PATH.name + '.tmp')
+    tmp.write_text(json.dumps(table, indent=2, sort_keys=True) + '\n')
+    os.replace(tmp, TABLE_PATH)
+
+
+def refresh_part_table(force=False):
+    """Rebuild k1_parts.json if a source changed (or force). Returns (table, rebuilt)."""
+    try:
+        table = json.loads(TABLE_PATH.read_text())
+    except (OSError, ValueError):
+        table = {}
+    if not source_files():
+        # Scripts copied elsewhere / sparse checkout: the committed table is
+        # the only classification there is, so never replace it with nothing
+        if table.get('parts'):
+            print(f"⚠ No K1 sources in {SOURCE_DIR}; using the committed {TABLE_PATH.name}")
+        return table or {'version': TABLE_VERSION, 'sources': {}, 'parts': {}}, False
+    if not force and table_is_current(table):
+        return table, False
+    table = build_part_table()
+    write_part_table(table)
+    return table, True
+
+
+# =============================================================================
+# LOOKUP (Blender side)
+# =============================================================================
+
+def load_part_table():
+    """The part table, checked against the sources once per session."""
+    global _table
+    if _table is None:
+        _table, rebuilt = refresh_part_table()
+        if rebuilt:
+            print(f"✓ Part table rebuilt: {len(_table['parts'])} parts -> {TABLE_PATH.name}")
+    return _table
+
+
+def keyword_role(name):
+    name_lower = name.lower()
+    for role, keywords in ROLE_KEYWORDS:
+        if any(k in name_lower for k in ROLE_EXCLUDES.get(role, ())):
+            continue
+        if any(k in name_lower for k in keywords):
+            return role
+    return None
+
+
+def part_role(name):
+    """Role of a K1 part by object name, or None if unknown."""
+    base = _DUPLICATE_SUFFIX.sub('', name)
+    entry = load_part_table()['parts'].get(base)
+    if entry is not None:
+        return entry['role']
+    if base not in _keyword_roles:
+        _keyword_roles[base] = keyword_role(base)
+    return _keyword_roles[base]
+
+
+def part_material(name, role_materials=ROLE_MATERIALS):
+    """Palette material name for a part, or None."""
+    return role_materials.get(part_role(name))
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the K1 part -> material table")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if sources are unchanged")
+    args = parser.parse_args()
+
+    table, rebuilt = refresh_part_table(force=args.force)
+    for name, entry in sorted(table['parts'].items()):
+        size = ' x '.join(f"{v:.3f}" for v in entry['size'])
+        print(f"  {name:<28} {entry['role']:<10} {ROLE_MATERIALS[entry['role']]:<20} "
+              f"{entry['source']} ({size})")
+    state = 'Rebuilt' if rebuilt else 'Up to date'
+    print(f"✓ {state}: {TABLE_PATH} ({len(table['parts'])} parts, {len(table['sources'])} sources)")
+
+
+if __name__ == '__main__':
+    main()
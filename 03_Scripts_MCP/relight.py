@@ -0,0 +1,536 @@
+"""
+relight.py
+K1-Lightwave Digital Twin - Offline Light-Group Relighting (NumPy)
+
+Recombines the light-group passes written by render_lightgroup_passes.py
+with per-group gains and colour tints, then re-applies the
+enable_lightgroup_compositor grade (fog-glow bloom + blurred elliptical
+vignette) and a view transform. No Blender, no re-render: relighting a
+1080p frame takes well under a second instead of a Cycles render.
+
+  beauty = other + sum(gain[g] * tint[g] * Combined_<g>)
+  other  = Combined - sum(Combined_<g>)   (emission and unassigned lights)
+
+EXR reading uses the OpenEXR module when installed; otherwise a built-in
+reader memmaps uncompressed scanline EXRs (render_lightgroup_passes.py's
+default codec).
+
+The view transform is an analytic approximation of Blender's AgX (plus an
+optional punchy look): use it to judge lighting balance, then push the gains
+back with render_lightgroup_passes.apply_light_gains() for the final frame.
+
+Usage:
+  python 03_Scripts_MCP/relight.py passes.exr --list
+  python 03_Scripts_MCP/relight.py passes.exr -o relit.png \\
+      --gain key=1.4 --gain rim=0.6 --tint fill=E0E0FF --save-gains gains.json
+"""
+
+import argparse
+import json
+import re
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+# =============================================================================
+# EXR I/O
+# =============================================================================
+
+EXR_MAGIC = 20000630
+EXR_PIXEL_TYPES = {0: np.dtype('<u4'), 1: np.dtype('<f2'), 2: np.dtype('<f4')}
+EXR_TILED = 0x200
+EXR_NON_IMAGE = 0x800
+EXR_MULTIPART = 0x1000
+
+
+def _read_exr_header(buf):
+    """Parse a single-part EXR header: (attributes, offset of the line table)."""
+    magic, version = struct.unpack_from('<ii', buf, 0)
+    if magic != EXR_MAGIC:
+        raise ValueError('Not an OpenEXR file')
+    if version & (EXR_TILED | EXR_NON_IMAGE | EXR_MULTIPART):
+        raise ValueError('Only single-part scanline EXRs are supported without OpenEXR')
+
+    pos = 8
+    attrs = {}
+    while buf[pos] != 0:
+        end = buf.index(b'\0', pos)
+        name = bytes(buf[pos:end]).decode()
+        end_type = buf.index(b'\0', end + 1)
+        type_name = bytes(buf[end + 1:end_type]).decode()
+        (size,) = struct.unpack_from('<i', buf, end_type + 1)
+        data = bytes(buf[end_type + 5:end_type + 5 + size])
+        attrs[name] = (type_name, data)
+        pos = end_type + 5 + size
+    return attrs, pos + 1
+
+
+def _parse_channels(data):
+    channels = []
+    pos = 0
+    while data[pos] != 0:
+        end = data.index(b'\0', pos)
+        name = data[pos:end].decode()
+        pixel_type, _, _, xs, ys = struct.unpack_from('<iB3sii', data, end + 1)
+        if (xs, ys) != (1, 1):
+            raise ValueError(f"Subsampled channel '{name}' not supported")
+        channels.append((name, EXR_PIXEL_TYPES[pixel_type]))
+        pos = end + 1 + 16
+    return channels
+
+
+def read_exr_numpy(path):
+    """Channels of an uncompressed scanline EXR as {name: HxW array} (memmapped)."""
+    size = 1 << 16
+    while True:
+        with open(path, 'rb') as f:
+            head = f.read(size)
+        try:
+            attrs, table = _read_exr_header(head)
+            break
+        except (IndexError, ValueError, struct.error):
+            # Retry with a larger read only if the header ran past it
+            if len(head) < size or head[:4] != struct.pack('<i', EXR_MAGIC):
+                raise
+            size *= 4
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    if attrs['compression'][1][0] != 0:
+        raise ValueError(
+            f'{path}: compressed EXR needs the OpenEXR module '
+            "(pip install OpenEXR) or render with codec='NONE'"
+        )
+    xmin, ymin, xmax, ymax = struct.unpack('<4i', attrs['dataWindow'][1])
+    width, height = xmax - xmin + 1, ymax - ymin + 1
+    channels = _parse_channels(attrs['channels'][1])
+
+    line = np.dtype(
+        [('y', '<i4'), ('size', '<i4')]
+        + [(name, dt, (width,)) for name, dt in channels]
+    )
+    offsets = np.frombuffer(buf, dtype='<u8', count=height, offset=table)
+    start = int(offsets.min())
+    # Uncompressed chunks are fixed-size; view them as one structured array
+    lines = np.frombuffer(buf, dtype=line, count=height, offset=start)
+    order = np.argsort(lines['y'])
+    if not np.array_equal(lines['y'][order], np.arange(ymin, ymax + 1)):
+        raise ValueError(f'{path}: unexpected scanline layout')
+    if not np.array_equal(order, np.arange(height)):
+        lines = lines[order]
+    return {name: lines[name] for name, _ in channels}
+
+
+def read_exr_openexr(path):
+    import OpenEXR
+
+    if hasattr(OpenEXR, 'File'):  # OpenEXR >= 3.3
+        with OpenEXR.File(str(path), separate_channels=True) as f:
+            return {name: ch.pixels for name, ch in f.channels().items()}
+
+    import Imath
+
+    f = OpenEXR.InputFile(str(path))
+    header = f.header()
+    dw = header['dataWindow']
+    width, height = dw.max.x - dw.min.x + 1, dw.max.y - dw.min.y + 1
+    float_type = Imath.PixelType(Imath.PixelType.FLOAT)
+    return {
+        name: np.frombuffer(f.channel(name, float_type), dtype=np.float32).reshape(height, width)
+        for name in header['channels']
+    }
+
+
+def read_exr(path):
+    """{channel name: HxW array} for a (multilayer) EXR."""
+    try:
+        import OpenEXR  # noqa: F401
+    except ImportError:
+        return read_exr_numpy(path)
+    return read_exr_openexr(path)
+
+
+def write_exr(path, channels, half=True):
+    """Write {name: HxW array} as an uncompressed single-part scanline EXR."""
+    names = sorted(channels)
+    height, width = channels[names[0]].shape
+    dt = np.dtype('<f2' if half else '<f4')
+    ptype = 1 if half else 2
+
+    def attr(name, type_name, data):
+        return name.encode() + b'\0' + type_name.encode() + b'\0' + struct.pack('<i', len(data)) + data
+
+    chlist = b''.join(
+        n.encode() + b'\0' + struct.pack('<iB3sii', ptype, 0, b'\0\0\0', 1, 1) for n in names
+    ) + b'\0'
+    box = struct.pack('<4i', 0, 0, width - 1, height - 1)
+    header = (
+        struct.pack('<ii', EXR_MAGIC, 2)
+        + attr('channels', 'chlist', chlist)
+        + attr('compression', 'compression', b'\0')
+        + attr('dataWindow', 'box2i', box)
+        + attr('displayWindow', 'box2i', box)
+        + attr('lineOrder', 'lineOrder', b'\0')
+        + attr('pixelAspectRatio', 'float', struct.pack('<f', 1.0))
+        + attr('screenWindowCenter', 'v2f', struct.pack('<2f', 0.0, 0.0))
+        + attr('screenWindowWidth', 'float', struct.pack('<f', 1.0))
+        + b'\0'
+    )
+    line = np.dtype([('y', '<i4'), ('size', '<i4')] + [(n, dt, (width,)) for n in names])
+    lines = np.zeros(height, dtype=line)
+    lines['y'] = np.arange(height)
+    lines['size'] = line.itemsize - 8
+    for n in names:
+        lines[n] = channels[n]
+    start = len(header) + 8 * height
+    offsets = start + np.arange(height, dtype='<u8') * line.itemsize
+
+    tmp = Path(str(path) + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(offsets.tobytes())
+        f.write(lines.tobytes())
+    tmp.replace(path)
+
+
+# =============================================================================
+# LIGHT-GROUP PASSES
+# =============================================================================
+
+@dataclass
+class LightGroupPasses:
+    """Scene-linear RGB passes (float32, HxWx3) of one light-group render."""
+    combined: np.ndarray
+    groups: dict
+    alpha: Optional[np.ndarray] = None
+    sidecar: Optional[dict] = None
+
+    @cached_property
+    def other(self):
+        """Light not in any group (emission, unassigned lights)."""
+        rest = self.combined.copy()
+        for p in self.groups.values():
+            rest -= p
+        return rest
+
+
+def _rgb(channels, prefix):
+    return np.stack([np.asarray(channels[f'{prefix}.{c}'], dtype=np.float32) for c in 'RGB'], axis=-1)
+
+
+def load_passes(path, view_layer=None):
+    """Load Combined + Combined_<group> passes from a Blender multilayer EXR."""
+    path = Path(path)
+    channels = read_exr(path)
+    layers = sorted({name.split('.')[0] for name in channels if name.count('.') >= 2})
+    if view_layer is None:
+        if not layers:
+            raise ValueError(f'{path}: no render layers found')
+        view_layer = layers[0]
+
+    combined_prefix = f'{view_layer}.Combined'
+    if f'{combined_prefix}.R' not in channels:
+        raise ValueError(f'{path}: no {combined_prefix} pass (layers: {", ".join(layers)})')
+
+    pattern = re.compile(rf'^{re.escape(view_layer)}\.Combined_(.+)\.R$')
+    groups = {}
+    for name in sorted(channels):
+        m = pattern.match(name)
+        if m:
+            groups[m.group(1)] = _rgb(channels, f'{view_layer}.Combined_{m.group(1)}')
+    if not groups:
+        raise ValueError(f'{path}: no light-group passes (run render_lightgroup_passes.py)')
+
+    alpha = channels.get(f'{combined_prefix}.A')
+    sidecar_path = path.with_suffix('.lightgroups.json')
+    sidecar = json.loads(sidecar_path.read_text()) if sidecar_path.exists() else None
+    return LightGroupPasses(
+        combined=_rgb(channels, combined_prefix),
+        groups=groups,
+        alpha=None if alpha is None else np.asarray(alpha, dtype=np.float32),
+        sidecar=sidecar,
+    )
+
+
+def resolve_group(name, groups):
+    """Match 'key', 'Key' or 'LG_Key' to a group name."""
+    want = name.lower().removeprefix('lg_')
+    for g in groups:
+        if g.lower().removeprefix('lg_') == want:
+            return g
+    if want == 'other':
+        return 'other'
+    raise KeyError(f"Unknown light group '{name}' (have: {', '.join(groups)}, other)")
+
+
+def hex_to_rgb(hex_str):
+    """Convert hex color to RGB tuple (0-1 range)."""
+    hex_str = hex_str.strip('#')
+    return tuple(int(hex_str[i:i+2], 16) / 255.0 for i in (0, 2, 4))
+
+
+def relight(passes, gains=None, tints=None):
+    """Scene-linear beauty with per-group gains (scalars) and tints (RGB)."""
+    gains = gains or {}
+    tints = tints or {}
+    out = passes.other * np.float32(gains.get('other', 1.0))
+    for name, p in passes.groups.items():
+        scale = gains.get(name, 1.0) * np.asarray(tints.get(name, (1.0, 1.0, 1.0)), dtype=np.float32)
+        out += p * scale
+    return out
+
+
+# =============================================================================
+# GRADE (enable_lightgroup_compositor equivalent)
+# =============================================================================
+
+@dataclass
+class Grade:
+    """
+    Offline version of enable_lightgroup_compositor's grade:
+    fog-glow bloom over a threshold (GL_Bloom, threshold 0.8) and an
+    elliptical 0.8 x 0.8 vignette, Gaussian-blurred (150 px at 1920 wide)
+    and ramped 0.85 -> 1.0 (VG_Mask / BL_Vig / CR_Vig / MX_Vig).
+    """
+    bloom_threshold: float = 0.8
+    bloom_strength: float = 0.25
+    bloom_radius: float = 0.05      # Gaussian sigma, fraction of image width
+    vignette_size: float = 0.8
+    vignette_blur: float = 150 / 1920
+    vignette_floor: float = 0.85
+    exposure: float = 0.0
+
+
+def _box_blur_axis0(a, r):
+    if r < 1:
+        return a
+    n = a.shape[0]
+    padded = np.concatenate([np.repeat(a[:1], r + 1, axis=0), a, np.repeat(a[-1:], r, axis=0)])
+    c = np.cumsum(padded, axis=0, dtype=np.float32)
+    return (c[2 * r + 1:2 * r + 1 + n] - c[:n]) / np.float32(2 * r + 1)
+
+
+def gaussian_blur(a, sigma):
+    """Separable Gaussian approximation (three box passes per axis, edge clamp)."""
+    if sigma <= 0:
+        return a
+    r = int(round((np.sqrt(12.0 * sigma * sigma / 3 + 1) - 1) / 2))
+    out = np.asarray(a, dtype=np.float32)
+    for _ in range(3):
+        out = _box_blur_axis0(out, r)
+    out = np.swapaxes(out, 0, 1)
+    for _ in range(3):
+        out = _box_blur_axis0(out, r)
+    return np.ascontiguousarray(np.swapaxes(out, 0, 1))
+
+
+@lru_cache(maxsize=8)
+def vignette_mask(height, width, size, blur, floor):
+    """Cached HxWx1 multiplier: ramp(blur(ellipse)) from floor to 1."""
+    y = (np.arange(height, dtype=np.float32) + 0.5) / height - 0.5
+    x = (np.arange(width, dtype=np.float32) + 0.5) / width - 0.5
+    inside = (x[None, :] / (size / 2)) ** 2 + (y[:, None] / (size / 2)) ** 2 <= 1.0
+    soft = gaussian_blur(inside.astype(np.float32), blur * width / 3)
+    mask = floor + (1.0 - floor) * np.clip(soft, 0.0, 1.0)
+    mask.setflags(write=False)
+    return mask[..., None]
+
+
+def bloom(img, threshold, strength, radius):
+    """Fog-glow style bloom, blurred at quarter resolution for speed."""
+    bright = np.maximum(img - threshold, 0.0)
+    h, w = img.shape[:2]
+    f = 4
+    hh, ww = h // f * f, w // f * f
+    small = bright[:hh, :ww].reshape(hh // f, f, ww // f, f, 3).mean(axis=(1, 3))
+    glow = gaussian_blur(small, radius * w / f)
+    glow = np.repeat(np.repeat(glow, f, axis=0), f, axis=1)
+    out = img.copy()
+    out[:hh, :ww] += strength * glow
+    return out
+
+
+def apply_grade(img, grade):
+    out = img * np.float32(2.0 ** grade.exposure)
+    if grade.bloom_strength > 0:
+        out = bloom(out, grade.bloom_threshold, grade.bloom_strength, grade.bloom_radius)
+    h, w = out.shape[:2]
+    return out * vignette_mask(h, w, grade.vignette_size, grade.vignette_blur, grade.vignette_floor)
+
+
+# =============================================================================
+# VIEW TRANSFORM
+# =============================================================================
+
+# AgX inset/outset matrices (row-vector form) and log2 range
+AGX_INSET = np.array([
+    [0.842479062253094, 0.0423282422610123, 0.0423756549057051],
+    [0.0784335999999992, 0.878468636469772, 0.0784336],
+    [0.0792237451477643, 0.0791661274605434, 0.879142973793104],
+], dtype=np.float32)
+AGX_OUTSET = np.array([
+    [1.19687900512017, -0.0528968517574562, -0.0529716355144438],
+    [-0.0980208811401368, 1.15190312990417, -0.0980434501171241],
+    [-0.0990297440797205, -0.0989611768448433, 1.15107367264116],
+], dtype=np.float32)
+AGX_MIN_EV = -12.47393
+AGX_MAX_EV = 4.026069
+LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def view_agx(rgb, punchy=True):
+    """Scene-linear Rec.709 -> display sRGB (0-1) via an AgX approximation."""
+    v = np.maximum(rgb, 1e-10) @ AGX_INSET
+    v = (np.clip(np.log2(v), AGX_MIN_EV, AGX_MAX_EV) - AGX_MIN_EV) / (AGX_MAX_EV - AGX_MIN_EV)
+    x2 = v * v
+    x4 = x2 * x2
+    v = 15.5 * x4 * x2 - 40.14 * x4 * v + 31.96 * x4 - 6.868 * x2 * v + 0.4298 * x2 + 0.1191 * v - 0.00232
+    if punchy:
+        v = np.maximum(v, 0.0) ** 1.35
+        luma = (v @ LUMA)[..., None]
+        v = luma + 1.4 * (v - luma)
+    v = v @ AGX_OUTSET
+    return np.clip(v, 0.0, 1.0)
+
+
+def view_standard(rgb):
+    """Scene-linear -> display sRGB (0-1) with the plain sRGB OETF."""
+    v = np.clip(rgb, 0.0, 1.0)
+    return np.where(v <= 0.0031308, 12.92 * v, 1.055 * np.power(v, 1 / 2.4) - 0.055)
+
+
+def to_display(rgb, view='agx'):
+    if view == 'agx':
+        return view_agx(rgb, punchy=True)
+    if view == 'agx-base':
+        return view_agx(rgb, punchy=False)
+    if view == 'standard':
+        return view_standard(rgb)
+    raise ValueError(f"Unknown view transform '{view}'")
+
+
+def save_display(path, display, alpha=None):
+    from PIL import Image
+
+    rgb8 = (display * 255.0 + 0.5).astype(np.uint8)
+    if alpha is not None and float(alpha.min()) < 1.0:
+        a8 = (np.clip(alpha, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+        Image.fromarray(np.dstack([rgb8, a8]), mode='RGBA').save(path)
+    else:
+        Image.fromarray(rgb8, mode='RGB').save(path)
+
+
+# =============================================================================
+# GAINS -> SCENE VALUES
+# =============================================================================
+
+def scene_gains(passes, gains, tints):
+    """
+    Light energies/colours equivalent to the chosen gains and tints, in the
+    format render_lightgroup_passes.apply_light_gains() reads. World tints
+    and the "other" gain (emission) are recorded but not mapped back.
+    """
+    known = (passes.sidecar or {}).get('groups', {})
+    out = {'gains': {'other': float(gains.get('other', 1.0))}, 'tints': {}, 'groups': {}}
+    for group in passes.groups:
+        entries = known.get(group, [])
+        gain = float(gains.get(group, 1.0))
+        tint = tints.get(group, (1.0, 1.0, 1.0))
+        out['gains'][group] = gain
+        out['tints'][group] = list(tint)
+        scaled = []
+        for entry in entries:
+            entry = dict(entry)
+            if 'energy' in entry:
+                entry['energy'] = entry['energy'] * gain
+                entry['color'] = [c * t for c, t in zip(entry['color'], tint)]
+            elif entry.get('strength') is not None:
+                entry['strength'] = entry['strength'] * gain
+            scaled.append(entry)
+        out['groups'][group] = scaled
+    return out
+
+
+# =============================================================================
+# MAIN CLI
+# =============================================================================
+
+def parse_assignments(values, groups, parse):
+    result = {}
+    for item in values or []:
+        if '=' not in item:
+            raise SystemExit(f"Expected GROUP=VALUE, got '{item}'")
+        name, value = item.split('=', 1)
+        try:
+            result[resolve_group(name, groups)] = parse(value)
+        except KeyError as e:
+            raise SystemExit(e.args[0])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Relight light-group passes offline')
+    parser.add_argument('exr', help='Multilayer EXR from render_lightgroup_passes.py')
+    parser.add_argument('-o', '--output', help='Display PNG (default: <exr>_relit.png)')
+    parser.add_argument('--gain', action='append', metavar='GROUP=X', help='e.g. key=1.5, other=1')
+    parser.add_argument('--tint', action='append', metavar='GROUP=RRGGBB', help='e.g. fill=E0E0FF')
+    parser.add_argument('--exposure', type=float, default=0.0, help='Stops')
+    parser.add_argument('--no-grade', action='store_true', help='Skip bloom + vignette')
+    parser.add_argument('--view', default='agx', choices=['agx', 'agx-base', 'standard'])
+    parser.add_argument('--view-layer', help='Render layer (default: first in file)')
+    parser.add_argument('--linear-exr', help='Also write the graded scene-linear result here')
+    parser.add_argument('--save-gains', help='Write light energies for apply_light_gains()')
+    parser.add_argument('--list', action='store_true', help='List light groups and exit')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    passes = load_passes(args.exr, args.view_layer)
+    t_load = time.perf_counter() - t0
+    groups = list(passes.groups)
+
+    if args.list:
+        h, w = passes.combined.shape[:2]
+        print(f"{args.exr}: {w}x{h}, loaded in {t_load * 1000:.0f} ms")
+        for g in groups + ['other']:
+            p = passes.groups[g] if g != 'other' else passes.other
+            print(f"  {g:<12} mean {float(p.mean()):.4f}  max {float(p.max()):.2f}")
+        return
+
+    gains = parse_assignments(args.gain, groups, float)
+    tints = parse_assignments(args.tint, groups, hex_to_rgb)
+
+    t1 = time.perf_counter()
+    beauty = relight(passes, gains, tints)
+    grade = Grade(exposure=args.exposure)
+    if args.no_grade:
+        grade.bloom_strength = 0.0
+        grade.vignette_floor = 1.0
+    graded = apply_grade(beauty, grade)
+    display = to_display(graded, args.view)
+    t_relight = time.perf_counter() - t1
+
+    output = args.output or str(Path(args.exr).with_suffix('')) + '_relit.png'
+    save_display(output, display, passes.alpha)
+    print(f"✓ Relit {output} (load {t_load * 1000:.0f} ms, relight+grade {t_relight * 1000:.0f} ms)")
+
+    if args.linear_exr:
+        channels = {f'{c}': graded[..., i] for i, c in enumerate('RGB')}
+        if passes.alpha is not None:
+            channels['A'] = passes.alpha
+        write_exr(args.linear_exr, channels)
+        print(f"✓ Linear EXR: {args.linear_exr}")
+
+    if args.save_gains:
+        if passes.sidecar is None:
+            print('⚠ No .lightgroups.json sidecar next to the EXR; gains saved without light values')
+        Path(args.save_gains).write_text(json.dumps(scene_gains(passes, gains, tints), indent=2) + '\n')
+        print(f"✓ Gains: {args.save_gains} (apply with render_lightgroup_passes.apply_light_gains)")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,385 @@
+"""
+render_batch.py
+K1-Lightwave Digital Twin - Headless Batch Renderer
+
+Job-queue dispatcher that fans renders out to headless `blender -b` worker
+processes instead of rendering one at a time through BlenderMCP exec.
+
+Each job names a scene build script, a camera and a quality tier:
+1. The dispatcher (plain Python, no bpy) starts up to --workers Blender
+   processes, each pinned to --threads CPU threads (Cycles -t plus the
+   OMP/MKL thread env vars), so N jobs share the node without oversubscribing
+2. Inside Blender this same file runs in worker mode: it executes the build
+   script as __main__ with K1_BATCH_RENDER=1 (build scripts then skip their
+   own render call), applies the quality tier (K1_MASTER_BUILD.RENDER_PROFILES,
+   also exported as K1_RENDER_QUALITY), selects the camera and renders a still
+3. Each attempt's output is logged to <out-dir>/logs/<job>.attemptN.log; failed
+   jobs (non-zero exit, timeout, missing output) are retried up to --retries
+4. A timing summary is printed and written to <out-dir>/render_batch_report.json
+
+Runs on plain Linux CPU nodes: Cycles is forced to CPU unless a job asks for
+"device": "GPU".
+
+Job file (JSON list, or {"jobs": [...]}); paths are relative to the repo root:
+  [
+    {
+      "name": "kb_wood_mat_hero",
+      "script": "04_SAM3D_Environments/scripts/build_composites.py",
+      "args": ["kb_wood_mat"],
+      "camera": "CAM_kb_wood_mat",
+      "quality": "review"
+    }
+  ]
+Optional job keys: "args" (passed to the script after "--"), "blend" (base
+.blend to open), "output", "device", "frame".
+
+Usage:
+  python 03_Scripts_MCP/render_batch.py jobs.json --workers 4 --threads 4
+  python 03_Scripts_MCP/render_batch.py \\
+      --script 04_SAM3D_Environments/scripts/build_composites.py \\
+      --script-args kb_grey_flat --camera CAM_kb_grey_flat --quality draft
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUT_DIR = REPO_ROOT / "01_Blender_Production" / "99_Render_Output" / "batch"
+
+# Quality tiers: names of K1_MASTER_BUILD.RENDER_PROFILES (which needs bpy,
+# so the dispatcher only validates the name and the worker applies it)
+RENDER_QUALITIES = ("draft", "review", "final")
+K1_MASTER_BUILD = Path(__file__).resolve().with_name("K1_MASTER_BUILD.py")
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+
+@dataclass
+class Job:
+    name: str
+    script: str
+    camera: Optional[str] = None
+    quality: str = "draft"
+    args: list = field(default_factory=list)
+    blend: Optional[str] = None
+    output: Optional[str] = None
+    device: str = "CPU"
+    frame: Optional[int] = None
+    # Dispatcher bookkeeping
+    status: str = "pending"
+    attempts: int = 0
+    seconds: list = field(default_factory=list)
+    logs: list = field(default_factory=list)
+    error: str = ""
+
+
+def repo_path(value: str) -> Path:
+    p = Path(value)
+    return p if p.is_absolute() else REPO_ROOT / p
+
+
+def load_jobs(path: Path, out_dir: Path) -> list:
+    """Parse a job file into Jobs with resolved output paths."""
+    data = json.loads(path.read_text())
+    entries = data["jobs"] if isinstance(data, dict) else data
+    jobs = []
+    for entry in entries:
+        jobs.append(make_job(dict(entry), out_dir))
+    names = [j.name for j in jobs]
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise ValueError(f"Duplicate job names: {', '.join(dupes)}")
+    return jobs
+
+
+def make_job(entry: dict, out_dir: Path) -> Job:
+    if "script" not in entry:
+        raise ValueError(f"Job missing 'script': {entry}")
+    quality = entry.get("quality", "draft")
+    if quality not in RENDER_QUALITIES:
+        raise ValueError(f"Unknown quality '{quality}' (use {', '.join(RENDER_QUALITIES)})")
+    name = entry.get("name") or "_".join(
+        filter(None, [Path(entry["script"]).stem.removeprefix("build_"), entry.get("camera"), quality])
+    )
+    output = entry.get("output") or str(out_dir / f"{name}.png")
+    return Job(
+        name=name,
+        script=str(repo_path(entry["script"])),
+        camera=entry.get("camera"),
+        quality=quality,
+        args=[str(a) for a in entry.get("args", [])],
+        blend=str(repo_path(entry["blend"])) if entry.get("blend") else None,
+        output=str(repo_path(output)),
+        device=entry.get("device", "CPU").upper(),
+        frame=entry.get("frame"),
+    )
+
+
+# =============================================================================
+# DISPATCHER
+# =============================================================================
+
+def find_blender(explicit: Optional[str]) -> str:
+    blender = explicit or os.environ.get("BLENDER") or shutil.which("blender")
+    if not blender:
+        raise SystemExit("Blender not found: pass --blender or set $BLENDER")
+    return blender
+
+
+def worker_command(blender: str, job: Job, threads: int) -> list:
+    spec = {k: getattr(job, k) for k in ("name", "script", "args", "camera", "quality", "output", "device", "frame")}
+    spec["threads"] = threads
+    cmd = [blender, "-b", "--factory-startup"]
+    if job.blend:
+        cmd.append(job.blend)
+    cmd += [
+        "-t", str(threads),
+        "--python-exit-code", "1",
+        "--python", str(Path(__file__).resolve()),
+        "--", "--worker", json.dumps(spec),
+    ]
+    return cmd
+
+
+def run_attempt(blender: str, job: Job, threads: int, log_dir: Path, timeout: Optional[float]) -> tuple:
+    """Run one Blender process for a job. Returns (ok, seconds, log, error)."""
+    attempt = job.attempts
+    log_path = log_dir / f"{job.name}.attempt{attempt}.log"
+    env = os.environ.copy()
+    for var in THREAD_ENV_VARS:
+        env[var] = str(threads)
+    env["K1_BATCH_RENDER"] = "1"
+    env["K1_RENDER_QUALITY"] = job.quality
+
+    output = Path(job.output)
+    if output.exists():
+        output.unlink()
+
+    t0 = time.perf_counter()
+    error = ""
+    with log_path.open("w") as f:
+        try:
+            proc = subprocess.run(
+                worker_command(blender, job, threads),
+                cwd=str(REPO_ROOT),
+                env=env,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                timeout=timeout,
+            )
+            if proc.returncode != 0:
+                error = f"exit code {proc.returncode}"
+        except subprocess.TimeoutExpired:
+            error = f"timed out after {timeout:.0f}s"
+    seconds = time.perf_counter() - t0
+
+    if not error and (not output.exists() or output.stat().st_size == 0):
+        error = "no output written"
+    return not error, seconds, log_path, error
+
+
+def run_queue(jobs: list, blender: str, workers: int, threads: int, retries: int,
+              log_dir: Path, timeout: Optional[float]) -> bool:
+    """Run jobs with up to `workers` concurrent Blender processes, retrying failures."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    queue = list(jobs)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while queue or running:
+            while queue and len(running) < workers:
+                job = queue.pop(0)
+                job.attempts += 1
+                job.status = "running"
+                print(f"[BATCH] -> {job.name} ({job.quality}, attempt {job.attempts})")
+                fut = pool.submit(run_attempt, blender, job, threads, log_dir, timeout)
+                running[fut] = job
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job = running.pop(fut)
+                ok, seconds, log_path, error = fut.result()
+                job.seconds.append(round(seconds, 2))
+                job.logs.append(str(log_path))
+                if ok:
+                    job.status = "done"
+                    job.error = ""
+                    print(f"[BATCH] <- {job.name} done in {seconds:.1f}s -> {job.output}")
+                elif job.attempts <= retries:
+                    job.status = "retrying"
+                    job.error = error
+                    print(f"[BATCH] <- {job.name} failed ({error}); retrying (see {log_path})")
+                    queue.append(job)
+                else:
+                    job.status = "failed"
+                    job.error = error
+                    print(f"[BATCH] <- {job.name} FAILED ({error}); see {log_path}")
+
+    return all(j.status == "done" for j in jobs)
+
+
+def print_summary(jobs: list, wall: float) -> None:
+    print("\n" + "=" * 72)
+    print(f"{'job':<36} {'quality':<8} {'status':<8} {'tries':>5} {'secs':>9}")
+    print("-" * 72)
+    for j in jobs:
+        print(f"{j.name:<36} {j.quality:<8} {j.status:<8} {j.attempts:>5} {sum(j.seconds):>9.1f}")
+    print("-" * 72)
+    serial = sum(sum(j.seconds) for j in jobs)
+    print(f"Wall time:   {wall:9.1f}s")
+    print(f"Serial sum:  {serial:9.1f}s")
+    print("=" * 72 + "\n")
+
+
+def write_report(jobs: list, wall: float, path: Path) -> None:
+    report = {
+        "wall_seconds": round(wall, 2),
+        "jobs": [asdict(j) for j in jobs],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+# =============================================================================
+# WORKER (runs inside Blender)
+# =============================================================================
+
+def apply_quality(scene, quality: str, device: str, threads: int) -> None:
+    """Apply a K1_MASTER_BUILD render profile plus CPU/thread settings to a scene."""
+    import runpy
+
+    k1_build = runpy.run_path(str(K1_MASTER_BUILD), run_name="k1_master_build")
+    k1_build["apply_render_profile"](scene, quality)
+    scene.render.engine = 'CYCLES'
+    scene.cycles.device = device
+    scene.render.threads_mode = 'FIXED'
+    scene.render.threads = threads
+
+
+def find_render_scene(bpy, camera: Optional[str]):
+    """Scene holding the job camera (or the context scene), and the camera."""
+    if camera is None:
+        scene = bpy.context.scene
+        if scene.camera is None:
+            raise RuntimeError(f"Scene '{scene.name}' has no camera; give the job a 'camera'")
+        return scene, scene.camera
+    cam = bpy.data.objects.get(camera)
+    if cam is None or cam.type != 'CAMERA':
+        raise RuntimeError(f"Camera '{camera}' not found after build")
+    scenes = [s for s in bpy.data.scenes if cam.name in s.objects]
+    if not scenes:
+        raise RuntimeError(f"Camera '{camera}' is not in any scene")
+    scene = bpy.context.scene if bpy.context.scene in scenes else scenes[0]
+    return scene, cam
+
+
+def run_worker(spec: dict) -> None:
+    import runpy
+
+    import bpy
+
+    script = Path(spec["script"])
+    print(f"[WORKER] Building scene: {script}")
+    t0 = time.perf_counter()
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script)] + (["--", *spec["args"]] if spec.get("args") else [])
+    runpy.run_path(str(script), run_name="__main__")
+    t_build = time.perf_counter() - t0
+
+    scene, cam = find_render_scene(bpy, spec.get("camera"))
+    scene.camera = cam
+    apply_quality(scene, spec["quality"], spec.get("device", "CPU"), spec["threads"])
+    if spec.get("frame") is not None:
+        scene.frame_set(int(spec["frame"]))
+
+    output = Path(spec["output"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    scene.render.filepath = str(output)
+    print(f"[WORKER] Rendering scene '{scene.name}' camera '{cam.name}' ({spec['quality']})")
+    t1 = time.perf_counter()
+    bpy.ops.render.render(write_still=True, scene=scene.name)
+    t_render = time.perf_counter() - t1
+    print(f"[WORKER] Build {t_build:.1f}s, render {t_render:.1f}s -> {output}")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless parallel Blender render queue")
+    parser.add_argument("jobs", nargs="?", help="Job file (JSON)")
+    parser.add_argument("--script", help="Single job: scene build script")
+    parser.add_argument("--script-args", nargs="+", default=[], help="Single job: script arguments")
+    parser.add_argument("--camera", help="Single job: camera object name")
+    parser.add_argument("--quality", default="draft", choices=RENDER_QUALITIES)
+    parser.add_argument("--blender", help="Blender executable (default: $BLENDER or PATH)")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent Blender processes")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="CPU threads per worker (default: CPU count / workers)",
+    )
+    parser.add_argument("--retries", type=int, default=1, help="Retries per failed job")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per attempt")
+    parser.add_argument("--out-dir", default=str(DEFAULT_OUT_DIR), help="Output directory")
+    args = parser.parse_args()
+
+    out_dir = repo_path(args.out_dir)
+    if args.jobs:
+        jobs = load_jobs(Path(args.jobs), out_dir)
+    elif args.script:
+        jobs = [make_job({"script": args.script, "args": args.script_args,
+                          "camera": args.camera, "quality": args.quality}, out_dir)]
+    else:
+        parser.error("give a job file or --script")
+    if not jobs:
+        parser.error("job file has no jobs")
+
+    blender = find_blender(args.blender)
+    workers = max(1, min(args.workers, len(jobs)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    print(f"[BATCH] {len(jobs)} jobs, {workers} workers x {threads} threads ({blender})")
+
+    t0 = time.perf_counter()
+    ok = run_queue(jobs, blender, workers, threads, args.retries, out_dir / "logs", args.timeout)
+    wall = time.perf_counter() - t0
+    print_summary(jobs, wall)
+    report = out_dir / "render_batch_report.json"
+    write_report(jobs, wall, report)
+    print(f"[BATCH] Report: {report}")
+    if not ok:
+        sys.exit(1)
+
+
+def worker_main(argv: list) -> None:
+    """Entry point inside Blender: argv after '--' is ['--worker', JSON]."""
+    spec = json.loads(argv[argv.index("--worker") + 1])
+    run_worker(spec)
+
+
+if __name__ == "__main__":
+    if "--" in sys.argv and "--worker" in sys.argv[sys.argv.index("--"):]:
+        worker_main(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        main()
@@ -0,0 +1,203 @@
+"""
+render_lightgroup_passes.py
+K1-Lightwave Digital Twin - Light-Group Pass Render (for offline relighting)
+
+Renders the scene once to a multilayer EXR containing Combined plus one
+Combined_<group> pass per light group (LG_Key, LG_Rim, LG_Fill, LG_Env from
+finalize_hero.ensure_light_groups). relight.py then rebalances the groups in
+NumPy, so lighting iterations no longer need a Cycles re-render.
+
+1. Ensure light groups exist and the lights/world are assigned
+2. Switch output to half-float multilayer EXR, compositor off (raw passes;
+   the grade is re-applied offline)
+3. Render a still to //99_Render_Output/lightgroups/<scene>.exr and write a
+   <scene>.lightgroups.json sidecar with every group's lights and energies;
+   the engine, compositor and output settings are restored afterwards, so
+   the next finalize/hero render in the session is unaffected
+4. After choosing gains in relight.py (--save-gains), push them back onto
+   the lights with apply_light_gains(path)
+
+The EXR codec defaults to NONE so relight.py can memmap it without the
+OpenEXR library; pass codec='ZIP' to trade read speed for disk space.
+
+Run from Blender via BlenderMCP:
+  exec(open('03_Scripts_MCP/render_lightgroup_passes.py').read())
+"""
+
+import bpy
+import json
+import os
+
+
+# =============================================================================
+# UTILITY FUNCTIONS
+# =============================================================================
+
+def scripts_dir():
+    """03_Scripts_MCP/, whether run as a file or exec'd from BlenderMCP."""
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        return os.path.join(os.getcwd(), '03_Scripts_MCP')
+
+
+def exec_script(name):
+    """Exec a sibling script's definitions (its main() is not run)."""
+    path = os.path.join(scripts_dir(), name)
+    ns = {'__file__': path}
+    exec(open(path).read(), ns)
+    return ns
+
+
+def pass_name(group):
+    """Blender's render pass name for a light group."""
+    return f'Combined_{group}'
+
+
+# =============================================================================
+# PART 1: PASS SETUP
+# =============================================================================
+
+# Restored in this order: the valid color_depth values depend on file_format
+IMAGE_SETTINGS = ('file_format', 'exr_codec', 'color_depth')
+
+
+def save_output_settings(scene):
+    """Render settings configure_lightgroup_output and the render overwrite."""
+    settings = scene.render.image_settings
+    return {
+        'engine': scene.render.engine,
+        'use_compositing': scene.render.use_compositing,
+        'filepath': scene.render.filepath,
+        'image_settings': {k: getattr(settings, k) for k in IMAGE_SETTINGS},
+    }
+
+
+def restore_output_settings(scene, saved):
+    scene.render.engine = saved['engine']
+    scene.render.use_compositing = saved['use_compositing']
+    scene.render.filepath = saved['filepath']
+    settings = scene.render.image_settings
+    for key in IMAGE_SETTINGS:
+        setattr(settings, key, saved['image_settings'][key])
+
+
+def configure_lightgroup_output(scene, view_layer, codec='NONE'):
+    """Multilayer half-float EXR with Combined + light-group passes."""
+    finalize = exec_script('finalize_hero.py')
+    if not finalize['ensure_light_groups']():
+        raise RuntimeError('Light groups unavailable (needs Cycles, Blender 3.2+)')
+
+    scene.render.engine = 'CYCLES'
+    view_layer.use_pass_combined = True
+    # Raw passes only; relight.py re-applies the grade
+    scene.render.use_compositing = False
+
+    settings = scene.render.image_settings
+    settings.file_format = 'OPEN_EXR_MULTILAYER'
+    settings.color_depth = '16'
+    settings.exr_codec = codec
+
+    groups = [lg.name for lg in view_layer.lightgroups]
+    print(f"✓ Light-group passes: {', '.join(pass_name(g) for g in groups)}")
+    return groups
+
+
+def describe_lightgroups(scene, view_layer):
+    """Sidecar data: the lights (and world) feeding each light group."""
+    groups = {lg.name: [] for lg in view_layer.lightgroups}
+    for obj in scene.objects:
+        if obj.type == 'LIGHT' and obj.lightgroup in groups:
+            groups[obj.lightgroup].append({
+                'object': obj.name,
+                'energy': obj.data.energy,
+                'color': list(obj.data.color),
+            })
+    world = scene.world
+    if world is not None and world.lightgroup in groups:
+        strength = None
+        bg = world.node_tree.nodes.get('Background') if world.use_nodes else None
+        if bg is not None:
+            strength = bg.inputs['Strength'].default_value
+        groups[world.lightgroup].append({'world': world.name, 'strength': strength})
+    return groups
+
+
+# =============================================================================
+# PART 2: RENDER
+# =============================================================================
+
+def render_lightgroup_passes(output=None, profile=None, codec='NONE'):
+    """Render once to a multilayer EXR and write the .lightgroups.json sidecar."""
+    scene = bpy.context.scene
+    view_layer = bpy.context.view_layer
+    if profile:
+        exec_script('K1_MASTER_BUILD.py')['apply_render_profile'](scene, profile)
+
+    if output is None:
+        output = bpy.path.abspath(f'//99_Render_Output/lightgroups/{scene.name}.exr')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    saved = save_output_settings(scene)
+    try:
+        groups = configure_lightgroup_output(scene, view_layer, codec)
+        scene.render.filepath = output
+        print(f"  Rendering {len(groups)} light groups -> {output}")
+        bpy.ops.render.render(write_still=True)
+    finally:
+        restore_output_settings(scene, saved)
+
+    sidecar = os.path.splitext(output)[0] + '.lightgroups.json'
+    with open(sidecar, 'w') as f:
+        json.dump({
+            'scene': scene.name,
+            'view_layer': view_layer.name,
+            'camera': scene.camera.name if scene.camera else None,
+            'groups': describe_lightgroups(scene, view_layer),
+        }, f, indent=2)
+    print(f"✓ Passes: {output}")
+    print(f"✓ Sidecar: {sidecar}")
+    return output
+
+
+# =============================================================================
+# PART 3: APPLY GAINS BACK TO THE SCENE
+# =============================================================================
+
+def apply_light_gains(gains_path):
+    """
+    Apply relight.py --save-gains output to the scene lights.
+
+    Sets each light's energy/colour (and the world strength) to the values
+    relight.py computed, so a re-render matches the offline preview.
+    """
+    with open(gains_path) as f:
+        gains = json.load(f)
+    scene = bpy.context.scene
+    for group, entries in gains['groups'].items():
+        for entry in entries:
+            if 'object' in entry:
+                obj = bpy.data.objects.get(entry['object'])
+                if obj is None or obj.type != 'LIGHT':
+                    print(f"  ⚠ {group}: light '{entry['object']}' not found")
+                    continue
+                obj.data.energy = entry['energy']
+                obj.data.color = entry['color'][:3]
+            elif 'world' in entry and entry.get('strength') is not None:
+                world = bpy.data.worlds.get(entry['world']) or scene.world
+                bg = world.node_tree.nodes.get('Background') if world and world.use_nodes else None
+                if bg is not None:
+                    bg.inputs['Strength'].default_value = entry['strength']
+        print(f"  ✓ {group}: gain {gains['gains'].get(group, 1.0):.3f}")
+
+
+# =============================================================================
+# MAIN EXECUTION
+# =============================================================================
+
+def main():
+    render_lightgroup_passes(profile=os.environ.get('K1_RENDER_QUALITY'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,22 @@
 import bpy
 import math
 import os
+import sys
 
-def set_render_settings():
+def scripts_dir():
+    """03_Scripts_MCP/, whether run as a file or exec'd from BlenderMCP."""
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        return os.path.join(os.getcwd(), '03_Scripts_MCP')
+
+if scripts_dir() not in sys.path:
+    sys.path.insert(0, scripts_dir())
+
+# Render quality tiers live in K1_MASTER_BUILD.RENDER_PROFILES
+from K1_MASTER_BUILD import apply_render_profile
+
+def set_render_settings(profile=None):
     scene = bpy.context.scene
     scene.render.engine = 'CYCLES'
     cycles = scene.cycles
@@ -14,12 +28,6 @@ def set_render_settings():
         scene.cycles.device = 'GPU'
     except Exception:
         scene.cycles.device = 'CPU'
-    cycles.samples = 1024
-    cycles.preview_samples = 128
-    cycles.max_bounces = 12
-    cycles.diffuse_bounces = 4
-    cycles.glossy_bounces = 6
-    cycles.transmission_bounces = 12
     try:
         scene.view_settings.view_transform = 'AgX'
     except Exception:
@@ -27,7 +35,8 @@ def set_render_settings():
     scene.view_settings.look = 'Medium High Contrast'
     scene.render.resolution_x = 1920
     scene.render.resolution_y = 1080
-    scene.render.resolution_percentage = 100
+    # Sampling, bounces, denoising, resolution %; rejects unknown profile names
+    apply_render_profile(scene, profile)
 
 def set_world_background():
     scene = bpy.context.scene
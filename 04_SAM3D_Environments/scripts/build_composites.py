@@ -0,0 +1,482 @@
+"""
+build_composites.py
+
+Data-driven builder for the photo-composite environments (K1 over a
+reference plate with shadow catchers, occluders and a compositor matte).
+
+Every environment whose environments/ENV_NAME.json has a "scene" block is
+built as its own Blender scene in one session:
+- K1_MASTER_BUILD.py is exec'd once (render profiles)
+- K1 is loaded once into a hidden K1_Shared collection (k1_library.py: linked
+  from K1.Hero.blend by default, see $K1_ASSET_MODE) and placed in each scene
+  as a collection instance, so meshes and material datablocks are shared and
+  every scene keeps its own K1 transform
+- plates and masks are loaded once per file path
+- occluders are opaque cutout meshes of the mask outlines (mask_cutout.py),
+  textured with the plate through their UVs: no mask lookups or transparent
+  bounces in Cycles
+- the heroes are rendered back to back at the end
+
+"scene" block (see environments/kb_wood_mat.json):
+  name, camera {name, lens, location, rotation, fstop},
+  planes {NAME: {location, scale, rotation?, shadow_catcher?}},
+  k1 {plane, width_ratio, location [x, y], rotation_z?, override?},
+  lights {NAME: {shape, size, size_y?, energy, color, location}},
+  occluders {masks {MASK: z_offset|null}, above?, location, rotation?, scale?,
+             window_mapping?, hidden?}
+The compositor graph comes from the "composite" block (as plate_composite.py).
+
+Everything is created through bpy.data (no operators), so it also works in
+`blender -b`, where only one scene can be the context scene.
+
+Run from Blender via BlenderMCP (builds every composite environment):
+  exec(open('scripts/build_composites.py').read())
+
+Headless, selected environments:
+  blender -b --python scripts/build_composites.py -- kb_wood_mat dragon_desk
+  K1_COMPOSITE_ENVS=kb_grey_flat blender -b --python scripts/build_composites.py
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import bpy
+import numpy as np
+
+# Render profile from K1_MASTER_BUILD.RENDER_PROFILES (draft/review/final);
+# $K1_RENDER_QUALITY overrides it, e.g. per render_batch.py job
+RENDER_QUALITY = os.environ.get("K1_RENDER_QUALITY", "review")
+
+
+def project_root() -> Path:
+    try:
+        return Path(__file__).resolve().parent.parent
+    except NameError:
+        cwd = Path.cwd()
+        cand = cwd / "04_SAM3D_Environments"
+        if cand.exists():
+            return cand
+        return Path("/Users/spectrasynq/K1-Lightwave_Digital-Twin/04_SAM3D_Environments")
+
+
+# scripts/ is not on sys.path when exec'd via BlenderMCP
+if str(project_root() / "scripts") not in sys.path:
+    sys.path.insert(0, str(project_root() / "scripts"))
+
+from k1_library import ensure_k1_collection, k1_memory_report, place_k1_instance, place_k1_override
+from mask_cutout import mask_cutout
+from mask_meta import mask_nonzero_ratio
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+def load_environment(env_name: str) -> dict:
+    path = project_root() / "environments" / f"{env_name}.json"
+    return json.loads(path.read_text())
+
+
+def composite_environments() -> list[str]:
+    env_dir = project_root() / "environments"
+    return sorted(p.stem for p in env_dir.glob("*.json") if "scene" in json.loads(p.read_text()))
+
+
+def requested_environments() -> list[str]:
+    """Args after '--', else $K1_COMPOSITE_ENVS, else every composite env."""
+    if "--" in sys.argv:
+        names = sys.argv[sys.argv.index("--") + 1:]
+    else:
+        names = [n for n in os.environ.get("K1_COMPOSITE_ENVS", "").split(",") if n]
+    return names or composite_environments()
+
+
+def ref_image_path(env_name: str) -> Path:
+    return project_root() / "assets" / "reference" / f"{env_name}.jpg"
+
+
+# =============================================================================
+# SHARED DATA (loaded once per session)
+# =============================================================================
+
+_k1_build = None
+
+
+def k1_master_build() -> dict:
+    """K1_MASTER_BUILD.py definitions (its main() is not run), exec'd once."""
+    global _k1_build
+    if _k1_build is None:
+        k1_path = project_root().parent / "03_Scripts_MCP" / "K1_MASTER_BUILD.py"
+        if not k1_path.exists():
+            raise FileNotFoundError("K1_MASTER_BUILD.py not found")
+        _k1_build = {"__file__": str(k1_path)}
+        exec(open(str(k1_path)).read(), _k1_build)
+    return _k1_build
+
+
+def load_image(path: Path, non_color: bool = False):
+    """Load an image once per file path (mask names repeat across envs)."""
+    if not path.exists():
+        return None
+    img = bpy.data.images.load(str(path), check_existing=True)
+    if non_color:
+        img.colorspace_settings.name = 'Non-Color'
+    return img
+
+
+# =============================================================================
+# SCENE BUILDING
+# =============================================================================
+
+def ensure_scene(name: str) -> bpy.types.Scene:
+    return bpy.data.scenes.get(name) or bpy.data.scenes.new(name)
+
+
+def ensure_cycles(scene: bpy.types.Scene):
+    scene.render.engine = "CYCLES"
+    scene.cycles.feature_set = "SUPPORTED"
+    try:
+        prefs = bpy.context.preferences.addons["cycles"].preferences
+        if hasattr(prefs, "get_devices"):
+            prefs.compute_device_type = "METAL"
+        scene.cycles.device = "GPU"
+    except Exception:
+        scene.cycles.device = "CPU"
+    scene.unit_settings.system = 'METRIC'
+    scene.unit_settings.scale_length = 1.0
+
+
+def link_to_scene(obj: bpy.types.Object, scene: bpy.types.Scene):
+    if obj.name not in scene.collection.objects:
+        scene.collection.objects.link(obj)
+
+
+def plane_mesh(name: str) -> bpy.types.Mesh:
+    """2x2 m plane with UVs (same as primitive_plane_add)."""
+    mesh = bpy.data.meshes.get(name)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(name)
+        mesh.from_pydata([(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)], [], [(0, 1, 2, 3)])
+        uv = mesh.uv_layers.new(name="UVMap")
+        uv.data.foreach_set("uv", [0, 0, 1, 0, 1, 1, 0, 1])
+        mesh.update()
+    return mesh
+
+
+def ensure_plane(name: str, scene: bpy.types.Scene) -> bpy.types.Object:
+    obj = bpy.data.objects.get(name)
+    if obj is None:
+        obj = bpy.data.objects.new(name, plane_mesh(name))
+    link_to_scene(obj, scene)
+    return obj
+
+
+def plane_width(obj: bpy.types.Object) -> float:
+    xs = [v.co.x for v in obj.data.vertices]
+    return (max(xs) - min(xs)) * obj.scale.x
+
+
+def setup_camera(scene: bpy.types.Scene, cfg: dict, img_path: Path) -> bpy.types.Object:
+    cam = bpy.data.objects.get(cfg["name"])
+    if cam is None:
+        cam = bpy.data.objects.new(cfg["name"], bpy.data.cameras.new(cfg["name"]))
+    link_to_scene(cam, scene)
+    cam.data.lens = cfg.get("lens", 50.0)
+    cam.location = cfg["location"]
+    cam.rotation_euler = cfg["rotation"]
+    scene.camera = cam
+    bg_list = cam.data.background_images
+    bg = bg_list[0] if len(bg_list) else bg_list.new()
+    bg.image = load_image(img_path)
+    bg.alpha = 1.0
+    bg.show_background_image = True
+    return cam
+
+
+def setup_planes(scene: bpy.types.Scene, planes: dict) -> dict:
+    objs = {}
+    for name, cfg in planes.items():
+        obj = ensure_plane(name, scene)
+        obj.location = cfg["location"]
+        obj.scale = cfg["scale"]
+        obj.rotation_euler = cfg.get("rotation", (0.0, 0.0, 0.0))
+        if cfg.get("shadow_catcher"):
+            obj.cycles.is_shadow_catcher = True
+            scene.render.film_transparent = True
+        objs[name] = obj
+    return objs
+
+
+def place_k1(scene: bpy.types.Scene, env_name: str, cfg: dict, plane: bpy.types.Object,
+             k1_col: bpy.types.Collection) -> bpy.types.Object:
+    """Place the shared K1 at width_ratio of the plane, base on it (instance or override)."""
+    x, y = cfg["location"]
+    args = ((x, y, plane.location.z), plane_width(plane) * cfg["width_ratio"], cfg.get("rotation_z", 0.0))
+    if cfg.get("override"):
+        return place_k1_override(scene, k1_col, *args)
+    return place_k1_instance(scene, f"K1_{env_name}", k1_col, *args)
+
+
+def setup_lighting(scene: bpy.types.Scene, lights: dict):
+    for o in list(scene.objects):
+        if o.type == 'LIGHT':
+            bpy.data.objects.remove(o, do_unlink=True)
+    for name, cfg in lights.items():
+        data = bpy.data.lights.new(name=name, type='AREA')
+        data.shape = cfg["shape"]
+        data.size = cfg["size"]
+        if "size_y" in cfg:
+            data.size_y = cfg["size_y"]
+        data.energy = cfg["energy"]
+        data.color = cfg["color"]
+        obj = bpy.data.objects.new(name, data)
+        scene.collection.objects.link(obj)
+        obj.location = cfg["location"]
+
+
+def setup_dof(cam: bpy.types.Object, focus_obj: bpy.types.Object, fstop: float):
+    cam.data.dof.use_dof = True
+    cam.data.dof.focus_object = focus_obj
+    cam.data.dof.aperture_fstop = fstop
+
+
+def occluder_material(name: str, ref_img) -> bpy.types.Material:
+    """Opaque plate material: cutout UVs are plate coordinates, so no mask or transparency."""
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    for n in list(nodes):
+        if n.type != 'OUTPUT_MATERIAL':
+            nodes.remove(n)
+    out = [n for n in nodes if n.type == 'OUTPUT_MATERIAL'][0]
+    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
+    tex = nodes.new('ShaderNodeTexImage')
+    tex.image = ref_img
+    tex.extension = 'EXTEND'
+    links.new(tex.outputs['Color'], bsdf.inputs['Base Color'])
+    links.new(bsdf.outputs['BSDF'], out.inputs['Surface'])
+    return mat
+
+
+def window_to_plane(scene: bpy.types.Scene, cam: bpy.types.Object, obj: bpy.types.Object,
+                    uv: np.ndarray) -> np.ndarray:
+    """Camera rays through frame coords (u, v) hitting obj's plane, in obj's local space."""
+    # view_frame corners (camera space): top-right, bottom-right, bottom-left, top-left
+    tr, br, bl, tl = (np.array(c) for c in cam.data.view_frame(scene=scene))
+    dirs = bl + uv[:, :1] * (br - bl) + uv[:, 1:] * (tl - bl)
+    cam_m = np.array(cam.matrix_basis)
+    dirs = dirs @ cam_m[:3, :3].T
+    origin = cam_m[:3, 3]
+    obj_m = np.array(obj.matrix_basis)
+    normal = np.array(obj.rotation_euler.to_matrix())[:, 2]
+    t = np.dot(obj_m[:3, 3] - origin, normal) / (dirs @ normal)
+    world = origin + t[:, None] * dirs
+    inv = np.linalg.inv(obj_m)
+    return world @ inv[:3, :3].T + inv[:3, 3]
+
+
+def cutout_mesh(name: str, cutout: dict, co: np.ndarray) -> bpy.types.Mesh:
+    """Triangle mesh from a mask_cutout entry; UVs are the plate coordinates."""
+    mesh = bpy.data.meshes.get(name) or bpy.data.meshes.new(name)
+    mesh.clear_geometry()
+    mesh.from_pydata(co.tolist(), [], cutout["tris"])
+    uv = mesh.uv_layers.get("UVMap") or mesh.uv_layers.new(name="UVMap")
+    loop_uv = np.asarray(cutout["uv"], dtype=np.float32)[np.asarray(cutout["tris"]).ravel()]
+    uv.data.foreach_set("uv", loop_uv.ravel())
+    mesh.update()
+    return mesh
+
+
+def setup_occluders(scene: bpy.types.Scene, env_name: str, cfg: dict, planes: dict,
+                    ref_img, cam: bpy.types.Object):
+    """
+    Opaque cutout meshes of the mask outlines (mask_cutout.py) in front of K1.
+
+    Without window_mapping the cutout lies on the 2x2 plane (UV = plate coords,
+    as the old masked plane); with it, each vertex is projected from the camera
+    onto the occluder plane so the cutout covers exactly the masked pixels.
+    """
+    masks_dir = project_root() / "assets" / "masks" / env_name
+    above = planes.get(cfg.get("above"))
+    mat = occluder_material(f"Mat_Occluder_{env_name}", ref_img)
+    for mask, z_offset in cfg.get("masks", {}).items():
+        mp = masks_dir / f"{mask}.png"
+        mask_img = load_image(mp, non_color=True)
+        if mask_img is None:
+            continue
+        ratio = mask_nonzero_ratio(mask_img, mp)
+        print(f"  Mask {mask}: {ratio:.3f} non-zero")
+        if ratio < 0.01:
+            continue
+        cutout = mask_cutout(mask_img, mp)
+        if not cutout["tris"]:
+            continue
+        name = f"Occluder_{env_name}_{mask}"
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            obj = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+        link_to_scene(obj, scene)
+        obj.location = cfg["location"]
+        obj.rotation_euler = cfg.get("rotation", (0.0, 0.0, 0.0))
+        obj.scale = cfg.get("scale", (1.0, 1.0, 1.0))
+        if z_offset is not None and above is not None:
+            obj.location.z = above.location.z + z_offset
+
+        uv = np.asarray(cutout["uv"], dtype=np.float64)
+        if cfg.get("window_mapping", False):
+            co = window_to_plane(scene, cam, obj, uv)
+        else:
+            co = np.column_stack([uv * 2.0 - 1.0, np.zeros(len(uv))])
+        obj.data = cutout_mesh(name, cutout, co)
+        if len(obj.data.materials) == 0:
+            obj.data.materials.append(mat)
+        else:
+            obj.data.materials[0] = mat
+        obj.hide_viewport = cfg.get("hidden", False)
+        obj.hide_render = cfg.get("hidden", False)
+        print(f"  Occluder {mask}: {len(cutout['tris'])} tris")
+
+
+def setup_compositor(scene: bpy.types.Scene, env_name: str, cfg: dict, ref_img):
+    """Plate matte graph: MAXIMUM(masks) -> invert -> dilate -> set alpha -> alpha over."""
+    scene.use_nodes = True
+    nodes = scene.node_tree.nodes
+    links = scene.node_tree.links
+    for n in list(nodes):
+        nodes.remove(n)
+    rl = nodes.new('CompositorNodeRLayers')
+    rl.scene = scene
+    comp = nodes.new('CompositorNodeComposite')
+    bg_img = nodes.new('CompositorNodeImage')
+    bg_img.image = ref_img
+    alpha_over = nodes.new('CompositorNodeAlphaOver')
+    alpha_over.inputs[0].default_value = 1.0
+    rl.location = (-600, 0)
+    bg_img.location = (-600, -200)
+    alpha_over.location = (-100, -100)
+    comp.location = (200, -100)
+
+    masks_dir = project_root() / "assets" / "masks" / env_name
+    mask_imgs = [load_image(masks_dir / f"{m}.png", non_color=True) for m in cfg.get("masks", [])]
+    mask_imgs = [m for m in mask_imgs if m is not None]
+    plate = bg_img.outputs['Image']
+    if mask_imgs:
+        matte = None
+        for i, img in enumerate(mask_imgs):
+            node = nodes.new('CompositorNodeImage')
+            node.image = img
+            node.location = (-1050, -200 - 150 * i)
+            if matte is None:
+                matte = node.outputs['Image']
+                continue
+            mix_max = nodes.new('CompositorNodeMath')
+            mix_max.operation = 'MAXIMUM'
+            mix_max.location = (-900, -260 - 150 * i)
+            links.new(matte, mix_max.inputs[0])
+            links.new(node.outputs['Image'], mix_max.inputs[1])
+            matte = mix_max.outputs['Value']
+        if cfg.get("invert", True):
+            invert = nodes.new('CompositorNodeInvert')
+            invert.location = (-600, -300)
+            links.new(matte, invert.inputs['Color'])
+            matte = invert.outputs['Color']
+        if cfg.get("dilate", 2):
+            dilate = nodes.new('CompositorNodeDilateErode')
+            dilate.mode = 'STEP'
+            dilate.distance = cfg.get("dilate", 2)
+            dilate.location = (-450, -300)
+            links.new(matte, dilate.inputs['Mask'])
+            matte = dilate.outputs['Mask']
+        set_alpha = nodes.new('CompositorNodeSetAlpha')
+        set_alpha.location = (-300, -150)
+        links.new(plate, set_alpha.inputs['Image'])
+        links.new(matte, set_alpha.inputs['Alpha'])
+        plate = set_alpha.outputs['Image']
+    links.new(rl.outputs['Image'], alpha_over.inputs[1])
+    links.new(plate, alpha_over.inputs[2])
+    links.new(alpha_over.outputs['Image'], comp.inputs['Image'])
+
+    # Raw transparent render layer for scripts/plate_composite.py
+    raw_out = nodes.new('CompositorNodeOutputFile')
+    raw_out.base_path = str(project_root() / 'renders' / env_name)
+    raw_out.format.file_format = 'PNG'
+    raw_out.format.color_mode = 'RGBA'
+    raw_out.file_slots[0].path = f'{env_name}_k1_render'
+    raw_out.location = (200, 100)
+    links.new(rl.outputs['Image'], raw_out.inputs[0])
+
+
+def build_environment(env_name: str, k1_col: bpy.types.Collection) -> bpy.types.Scene:
+    env = load_environment(env_name)
+    cfg = env["scene"]
+    img_path = ref_image_path(env_name)
+    if not img_path.exists():
+        raise FileNotFoundError(f"Copy the reference photo to {img_path}")
+    ref_img = load_image(img_path)
+
+    sc = ensure_scene(cfg["name"])
+    ensure_cycles(sc)
+    k1_master_build()["apply_render_profile"](sc, RENDER_QUALITY)
+    cam = setup_camera(sc, cfg["camera"], img_path)
+    planes = setup_planes(sc, cfg["planes"])
+    k1 = place_k1(sc, env_name, cfg["k1"], planes[cfg["k1"]["plane"]], k1_col)
+    setup_lighting(sc, cfg["lights"])
+    setup_dof(cam, k1, cfg["camera"].get("fstop", 2.8))
+    setup_occluders(sc, env_name, cfg.get("occluders", {}), planes, ref_img, cam)
+    setup_compositor(sc, env_name, env.get("composite", {}), ref_img)
+    return sc
+
+
+# =============================================================================
+# RENDER
+# =============================================================================
+
+def hero_path(env_name: str) -> Path:
+    return project_root() / "renders" / env_name / f"{env_name}_k1_hero.png"
+
+
+def render_heroes(scenes: dict):
+    """Render every built scene's hero still in one pass."""
+    if os.environ.get("K1_BATCH_RENDER"):
+        return  # render_batch.py renders with the job's camera and quality
+    for env_name, sc in scenes.items():
+        out = hero_path(env_name)
+        os.makedirs(out.parent, exist_ok=True)
+        sc.render.filepath = str(out)
+        t0 = time.perf_counter()
+        bpy.ops.render.render(write_still=True, scene=sc.name)
+        print(f"✓ Rendered {env_name} in {time.perf_counter() - t0:.1f}s -> {out}")
+
+
+# =============================================================================
+# MAIN EXECUTION
+# =============================================================================
+
+def main(env_names=None):
+    env_names = env_names or requested_environments()
+    t0 = time.perf_counter()
+    k1_col = ensure_k1_collection()
+    scenes = {}
+    for env_name in env_names:
+        t_env = time.perf_counter()
+        scenes[env_name] = build_environment(env_name, k1_col)
+        print(f"✓ Built {scenes[env_name].name} in {time.perf_counter() - t_env:.2f}s")
+    print(f"✓ {len(scenes)} composite scenes built in {time.perf_counter() - t0:.2f}s")
+    k1_memory_report(k1_col)
+    if bpy.context.window is not None and scenes:
+        bpy.context.window.scene = next(iter(scenes.values()))
+    render_heroes(scenes)
+    for env_name, sc in scenes.items():
+        print(f"Scene: {sc.name}, Camera: {sc.camera.name}, "
+              f"Output: renders/{env_name}/{env_name}_k1_hero.png")
+
+
+if __name__ == "__main__":
+    main()
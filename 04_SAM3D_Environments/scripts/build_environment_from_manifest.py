@@ -12,15 +12,45 @@ Or import and call:
 """
 
 import json
+import sys
 from pathlib import Path
 
 import bpy
 
 
+def project_root() -> Path:
+    try:
+        return Path(__file__).resolve().parent.parent
+    except NameError:
+        cwd = Path.cwd()
+        cand = cwd / "04_SAM3D_Environments"
+        if cand.exists():
+            return cand
+        return Path("/Users/spectrasynq/K1-Lightwave_Digital-Twin/04_SAM3D_Environments")
+
+
+# scripts/ is not on sys.path when exec'd via BlenderMCP
+if str(project_root() / "scripts") not in sys.path:
+    sys.path.insert(0, str(project_root() / "scripts"))
+
+from scene_manifest import manifest_root, resolve
+from validate_manifest import validate_manifest
+
+
 def import_mesh(path: Path) -> bpy.types.Object:
     """Import mesh file (OBJ or GLB/GLTF) and return the main object."""
     ext = path.suffix.lower()
 
+    # Raw splats are far too heavy to import; use the splat_to_mesh.py output
+    if ext == ".ply":
+        converted = path.with_suffix(".obj")
+        if not converted.exists():
+            raise ValueError(
+                f"Gaussian splat needs converting first: "
+                f"python scripts/splat_to_mesh.py ENV_NAME ({path})"
+            )
+        path, ext = converted, ".obj"
+
     # Store existing objects to find newly imported ones
     existing = set(bpy.data.objects.keys())
 
@@ -53,16 +83,42 @@ def import_mesh(path: Path) -> bpy.types.Object:
     return new_objects[0]
 
 
+def import_key(obj_desc: dict, mesh_path: Path) -> str:
+    """
+    Identity of what would be imported for this entry; unchanged key = skip.
+
+    Splats import their converted OBJ, whose settings are not part of the
+    splat hash, so its mtime is folded in.
+    """
+    key = obj_desc.get("mesh_sha256") or ""
+    if key and mesh_path.suffix.lower() == ".ply":
+        converted = mesh_path.with_suffix(".obj")
+        if converted.exists():
+            key += f":{converted.stat().st_mtime_ns}"
+    return key
+
+
 def build_from_manifest(manifest_path: Path) -> bpy.types.Collection:
     """
     Load manifest and import all objects into a collection.
 
-    Idempotent: clears existing objects in the collection before importing.
+    Idempotent and incremental: objects whose mesh hash (manifest v2
+    "mesh_sha256") matches the previous import are kept and only have their
+    transforms refreshed; changed, removed and untagged objects are replaced.
+
+    Raises ValueError before touching the scene if the manifest is invalid.
     """
+    report = validate_manifest(manifest_path)
+    if not report.ok:
+        raise ValueError(report.format())
+    for warning in report.warnings:
+        print(f"[WARN] {warning}")
+
     with manifest_path.open() as f:
         manifest = json.load(f)
 
     env_name = manifest["env_name"]
+    root = manifest_root(manifest_path, manifest)
 
     # Get or create environment collection
     env_coll = bpy.data.collections.get(env_name)
@@ -70,56 +126,78 @@ def build_from_manifest(manifest_path: Path) -> bpy.types.Collection:
         env_coll = bpy.data.collections.new(env_name)
         bpy.context.scene.collection.children.link(env_coll)
 
-    # Idempotent: clear previous objects in this collection
+    # Previously imported objects, by manifest object name
+    previous = {}
     for obj in list(env_coll.objects):
-        bpy.data.objects.remove(obj, do_unlink=True)
+        source = obj.get("k1_source")
+        if source and source not in previous:
+            previous[source] = obj
+        else:
+            bpy.data.objects.remove(obj, do_unlink=True)
 
     imported_count = 0
+    kept_count = 0
     skipped_count = 0
 
     # Import each object from manifest
     for obj_desc in manifest["objects"]:
-        mesh_path = Path(obj_desc["mesh_path"])
-
-        # Skip placeholder files (empty or just comments)
-        if not mesh_path.exists():
-            print(f"[WARN] Mesh not found, skipping: {mesh_path}")
-            skipped_count += 1
-            continue
-
-        if mesh_path.stat().st_size < 100:
-            print(f"[WARN] Mesh appears to be placeholder, skipping: {mesh_path}")
-            skipped_count += 1
-            continue
-
-        try:
-            obj = import_mesh(mesh_path)
-        except Exception as e:
-            print(f"[WARN] Failed to import {mesh_path}: {e}")
-            skipped_count += 1
-            continue
-
-        # Move to environment collection
-        for coll in obj.users_collection:
-            coll.objects.unlink(obj)
-        env_coll.objects.link(obj)
+        name = obj_desc["name"]
+        mesh_path = resolve(obj_desc["mesh_path"], root)
+        key = import_key(obj_desc, mesh_path)
+
+        obj = previous.pop(name, None)
+        if obj is not None and (not key or obj.get("k1_import_key") != key):
+            bpy.data.objects.remove(obj, do_unlink=True)
+            obj = None
+
+        if obj is None:
+            # Skip placeholder files (empty or just comments)
+            if not mesh_path.exists():
+                print(f"[WARN] Mesh not found, skipping: {mesh_path}")
+                skipped_count += 1
+                continue
+
+            if mesh_path.stat().st_size < 100:
+                print(f"[WARN] Mesh appears to be placeholder, skipping: {mesh_path}")
+                skipped_count += 1
+                continue
+
+            try:
+                obj = import_mesh(mesh_path)
+            except Exception as e:
+                print(f"[WARN] Failed to import {mesh_path}: {e}")
+                skipped_count += 1
+                continue
+
+            # Move to environment collection
+            for coll in obj.users_collection:
+                coll.objects.unlink(obj)
+            env_coll.objects.link(obj)
+            obj["k1_source"] = name
+            obj["k1_import_key"] = key
+            print(f"[OK] Imported: {obj.name} from {mesh_path.name}")
+            imported_count += 1
+        else:
+            kept_count += 1
 
         # Apply transforms from manifest
         obj.location = obj_desc.get("location") or [0.0, 0.0, 0.0]
         obj.rotation_euler = obj_desc.get("rotation_euler") or [0.0, 0.0, 0.0]
         obj.scale = obj_desc.get("scale") or [1.0, 1.0, 1.0]
 
-        print(f"[OK] Imported: {obj.name} from {mesh_path.name}")
-        imported_count += 1
+    # Objects dropped from the manifest
+    for obj in previous.values():
+        bpy.data.objects.remove(obj, do_unlink=True)
 
-    print(f"\n[MANIFEST] Imported {imported_count} objects, skipped {skipped_count}")
+    print(
+        f"\n[MANIFEST] Imported {imported_count} objects, kept {kept_count} unchanged, "
+        f"skipped {skipped_count}"
+    )
     return env_coll
 
 
 # For direct execution in Blender
 if __name__ == "__main__":
-    import sys
-
     # Determine root directory
     if bpy.data.filepath:
         script_dir = Path(bpy.data.filepath).parent
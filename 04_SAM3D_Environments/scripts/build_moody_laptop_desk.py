@@ -5,7 +5,7 @@ Dark, minimal desk scene lit by a single warm lamp.
 
 Prerequisites:
 - K1_MASTER_BUILD.py must have run (K1 exists in scene)
-- moody_laptop_manifest.json must exist
+- moody_laptop_desk_manifest.json must exist
 
 Run via BlenderMCP after K1_MASTER_BUILD.py.
 """
@@ -160,7 +160,7 @@ def setup_lights():
 
 def main():
     root = get_root()
-    manifest = root / "manifests" / "moody_laptop_manifest.json"
+    manifest = root / "manifests" / "moody_laptop_desk_manifest.json"
 
     print("\n" + "=" * 60)
     print("BUILD: moody_laptop_desk")
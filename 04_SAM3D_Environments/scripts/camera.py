@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+camera.py
+
+Pinhole model of the reference-photo camera, shared by the stages that map
+between reconstructed 3D points and reference/mask pixels.
+
+Intrinsics come from the optional "camera" block in environments/ENV.json:
+
+  "camera": {"hfov_deg": 60}                          # horizontal FOV
+  "camera": {"fx": 1450, "fy": 1450, "cx": 1024, "cy": 768,
+             "width": 2048, "height": 1536}             # explicit, in pixels
+  "camera": {..., "height_m": 1.2, "pitch_deg": 10}   # pose over the floor
+
+Explicit intrinsics are rescaled to whatever image size they are requested
+for (masks and processed references share an aspect ratio). Without a block,
+DEFAULT_HFOV_DEG is assumed.
+
+Camera-frame points use OpenCV axes: x right, y down, z forward. The world
+frame matches Blender: Z up, floor at Z = 0, camera at (0, 0, height_m)
+looking along +Y and tilted down by pitch_deg.
+"""
+
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_HFOV_DEG = 60.0
+DEFAULT_HEIGHT_M = 1.2
+DEFAULT_PITCH_DEG = 10.0
+
+@dataclass
+class CameraIntrinsics:
+    fx: float
+    fy: float
+    cx: float
+    cy: float
+    width: int
+    height: int
+
+    @classmethod
+    def from_hfov(cls, width: int, height: int, hfov_deg: float):
+        f = (width / 2.0) / math.tan(math.radians(hfov_deg) / 2.0)
+        return cls(f, f, width / 2.0, height / 2.0, width, height)
+
+    def resized(self, width: int, height: int) -> "CameraIntrinsics":
+        """Same camera for an image resampled to width x height."""
+        sx, sy = width / self.width, height / self.height
+        return CameraIntrinsics(
+            self.fx * sx, self.fy * sy, self.cx * sx, self.cy * sy, width, height
+        )
+
+    def project(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Project (N, 3) camera-frame points to pixels.
+
+        Returns (u, v, depth); points with depth <= 0 get u = v = NaN.
+        """
+        p = np.asarray(points, dtype=np.float64)
+        z = p[:, 2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv = np.where(z > 0, 1.0 / z, np.nan)
+        u = p[:, 0] * inv * self.fx + self.cx
+        v = p[:, 1] * inv * self.fy + self.cy
+        return u, v, z
+
+    def ray(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Unnormalised OpenCV-frame ray directions (z = 1) through pixels."""
+        u = np.asarray(u, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        return np.stack([(u - self.cx) / self.fx, (v - self.cy) / self.fy, np.ones_like(u)], axis=-1)
+
+
+@dataclass
+class CameraPose:
+    height_m: float = DEFAULT_HEIGHT_M
+    pitch_deg: float = DEFAULT_PITCH_DEG  # positive = looking down
+
+    @property
+    def position(self) -> np.ndarray:
+        return np.array([0.0, 0.0, self.height_m])
+
+    def rotation(self) -> np.ndarray:
+        """3x3 matrix taking OpenCV camera-frame vectors to world vectors."""
+        p = math.radians(self.pitch_deg)
+        x = np.array([1.0, 0.0, 0.0])
+        z = np.array([0.0, math.cos(p), -math.sin(p)])
+        y = np.cross(z, x)
+        return np.stack([x, y, z], axis=1)
+
+    def world_to_camera(self, points: np.ndarray) -> np.ndarray:
+        """(N, 3) world points -> OpenCV camera frame."""
+        return (np.asarray(points, dtype=np.float64) - self.position) @ self.rotation()
+
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def load_camera_config(env_name: str) -> dict:
+    """The "camera" block of environments/ENV_NAME.json ({} if absent)."""
+    path = get_project_root() / "environments" / f"{env_name}.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get("camera") or {}
+
+
+def intrinsics_from_config(cfg: dict, width: int, height: int) -> CameraIntrinsics:
+    """Intrinsics from a "camera" block for an image of width x height pixels."""
+    if all(k in cfg for k in ("fx", "fy", "cx", "cy", "width", "height")):
+        cam = CameraIntrinsics(
+            float(cfg["fx"]), float(cfg["fy"]), float(cfg["cx"]), float(cfg["cy"]),
+            int(cfg["width"]), int(cfg["height"]),
+        )
+        return cam.resized(width, height)
+    hfov = float(cfg.get("hfov_deg", DEFAULT_HFOV_DEG))
+    return CameraIntrinsics.from_hfov(width, height, hfov)
+
+
+def pose_from_config(cfg: dict) -> CameraPose:
+    return CameraPose(
+        height_m=float(cfg.get("height_m", DEFAULT_HEIGHT_M)),
+        pitch_deg=float(cfg.get("pitch_deg", DEFAULT_PITCH_DEG)),
+    )
+
+
+def load_intrinsics(env_name: str, width: int, height: int) -> CameraIntrinsics:
+    """Reference camera intrinsics of env_name for an image of width x height pixels."""
+    return intrinsics_from_config(load_camera_config(env_name), width, height)
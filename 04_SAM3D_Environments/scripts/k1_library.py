@@ -0,0 +1,196 @@
+"""
+k1_library.py
+
+K1 asset library for multi-scene Blender builds.
+
+K1 lives in 01_Blender_Production/K1.Hero.blend. Instead of appending a copy
+into every scene, it is brought in once and held in a hidden K1_Shared
+collection; scenes place it with a collection-instance empty, so each scene
+only adds one local object and mesh/material memory and .blend size stay
+flat as scenes are added.
+
+Modes ($K1_ASSET_MODE):
+  link    K1.Hero.blend collections (or objects) linked as library data,
+          relative path, loaded once per session (default when the file exists)
+  append  same, but appended once (self-contained .blend, no library)
+  local   the K1 objects already in this file (K1_MASTER_BUILD.py run first)
+
+A scene that needs to edit K1 itself (not just move it) can ask for a
+library override instead of an instance; only that scene's objects become
+overrides, mesh data stays linked. Only valid in link mode.
+
+Used by build_composites.py:
+  from k1_library import ensure_k1_collection, place_k1_instance
+"""
+
+import os
+from pathlib import Path
+
+import bpy
+from mathutils import Matrix, Vector
+
+K1_COLLECTION = "K1_Shared"
+ASSET_MODES = ("link", "append", "local")
+
+
+def project_root() -> Path:
+    try:
+        return Path(__file__).resolve().parent.parent
+    except NameError:
+        cwd = Path.cwd()
+        cand = cwd / "04_SAM3D_Environments"
+        if cand.exists():
+            return cand
+        return Path("/Users/spectrasynq/K1-Lightwave_Digital-Twin/04_SAM3D_Environments")
+
+
+def library_path() -> Path:
+    return project_root().parent / "01_Blender_Production" / "K1.Hero.blend"
+
+
+def is_k1_name(name: str) -> bool:
+    return "k1" in name.lower()
+
+
+def asset_mode() -> str:
+    """$K1_ASSET_MODE, defaulting to link when K1.Hero.blend exists."""
+    mode = os.environ.get("K1_ASSET_MODE") or ("link" if library_path().exists() else "local")
+    if mode not in ASSET_MODES:
+        raise ValueError(f"Unknown K1_ASSET_MODE '{mode}' (use {', '.join(ASSET_MODES)})")
+    return mode
+
+
+# =============================================================================
+# LOADING (once per session)
+# =============================================================================
+
+def loaded_library():
+    """The K1.Hero.blend library datablock if it is already linked."""
+    target = os.path.realpath(str(library_path()))
+    for lib in bpy.data.libraries:
+        if os.path.realpath(bpy.path.abspath(lib.filepath)) == target:
+            return lib
+    return None
+
+
+def load_from_library(col: bpy.types.Collection, link: bool):
+    path = library_path()
+    if not path.exists():
+        raise RuntimeError(f"K1 library not found: {path}")
+    with bpy.data.libraries.load(str(path), link=link, relative=True) as (data_from, data_to):
+        data_to.collections = [n for n in data_from.collections if is_k1_name(n)]
+        if not data_to.collections:
+            data_to.objects = [n for n in data_from.objects if is_k1_name(n)]
+    for child in data_to.collections:
+        if child is not None and child.name not in col.children:
+            col.children.link(child)
+    for obj in data_to.objects:
+        if obj is not None and obj.name not in col.objects:
+            col.objects.link(obj)
+
+
+def ensure_k1_collection(mode=None) -> bpy.types.Collection:
+    """Hidden collection holding K1 once for every scene to instance."""
+    mode = mode or asset_mode()
+    col = bpy.data.collections.get(K1_COLLECTION)
+    if col is not None and col.all_objects:
+        return col
+    if col is None:
+        col = bpy.data.collections.new(K1_COLLECTION)
+
+    if mode == "local":
+        local = [o for o in bpy.data.objects
+                 if is_k1_name(o.name) and o.library is None and o.type != 'CAMERA']
+        if not local:
+            raise RuntimeError("K1 not found: run K1_MASTER_BUILD.py or set K1_ASSET_MODE=link")
+        for obj in local:
+            if obj.name not in col.objects:
+                col.objects.link(obj)
+    else:
+        if mode == "link" and loaded_library() is not None:
+            # Already linked (e.g. reopened file): reuse its datablocks
+            for c in bpy.data.collections:
+                if c.library == loaded_library() and is_k1_name(c.name) and c.name not in col.children:
+                    col.children.link(c)
+        if not col.all_objects:
+            load_from_library(col, link=(mode == "link"))
+    if not col.all_objects:
+        raise RuntimeError(f"No K1 collections or objects in {library_path()}")
+    print(f"✓ K1 ({mode}): {len(col.all_objects)} objects in {K1_COLLECTION}")
+    return col
+
+
+def collection_bounds(col: bpy.types.Collection) -> tuple[Vector, Vector]:
+    """World-space bounding box of the K1 meshes (pre-instance)."""
+    pts = [o.matrix_world @ Vector(c)
+           for o in col.all_objects if o.type == 'MESH' for c in o.bound_box]
+    if not pts:
+        return Vector((0.0, 0.0, 0.0)), Vector((0.0, 0.0, 0.0))
+    lo = Vector((min(p.x for p in pts), min(p.y for p in pts), min(p.z for p in pts)))
+    hi = Vector((max(p.x for p in pts), max(p.y for p in pts), max(p.z for p in pts)))
+    return lo, hi
+
+
+# =============================================================================
+# PLACEMENT
+# =============================================================================
+
+def placement_matrix(col: bpy.types.Collection, location, width: float, rotation_z: float = 0.0) -> Matrix:
+    """K1 base centre to location, uniformly scaled to width, turned about Z."""
+    lo, hi = collection_bounds(col)
+    # Instance origin at the K1 base centre so location/z read like the object's
+    col.instance_offset = ((lo.x + hi.x) / 2, (lo.y + hi.y) / 2, lo.z)
+    sf = width / max(hi.x - lo.x, 1e-6)
+    return (Matrix.Translation(Vector(location))
+            @ Matrix.Rotation(rotation_z, 4, 'Z')
+            @ Matrix.Diagonal((sf, sf, sf, 1.0)))
+
+
+def place_k1_instance(scene: bpy.types.Scene, name: str, col: bpy.types.Collection,
+                      location, width: float, rotation_z: float = 0.0) -> bpy.types.Object:
+    """Collection-instance empty: the only per-scene K1 datablock."""
+    placement = placement_matrix(col, location, width, rotation_z)
+    inst = bpy.data.objects.get(name)
+    if inst is None:
+        inst = bpy.data.objects.new(name, None)
+    inst.instance_type = 'COLLECTION'
+    inst.instance_collection = col
+    if inst.name not in scene.collection.objects:
+        scene.collection.objects.link(inst)
+    inst.matrix_world = placement
+    return inst
+
+
+def place_k1_override(scene: bpy.types.Scene, col: bpy.types.Collection,
+                      location, width: float, rotation_z: float = 0.0) -> bpy.types.Object:
+    """
+    Editable library override of K1 in this scene, placed like an instance.
+
+    Re-running re-places the override from its linked reference, so the
+    transform never compounds. Returns the first root object (DOF focus).
+    """
+    linked = [c for c in col.children if c.library is not None]
+    if not linked:
+        raise RuntimeError("K1 overrides need K1_ASSET_MODE=link")
+    placement = placement_matrix(col, location, width, rotation_z)
+    offset = Matrix.Translation(-Vector(col.instance_offset))
+    roots = []
+    for ref in linked:
+        override = next((c for c in scene.collection.children_recursive
+                         if c.override_library and c.override_library.reference == ref), None)
+        if override is None:
+            override = ref.override_hierarchy_create(scene, scene.view_layers[0], do_fully_editable=True)
+        for obj in override.all_objects:
+            if obj.parent is None:
+                source = obj.override_library.reference if obj.override_library else obj
+                obj.matrix_world = placement @ offset @ source.matrix_world
+                roots.append(obj)
+    return roots[0]
+
+
+def k1_memory_report(col: bpy.types.Collection):
+    """K1 mesh datablocks: linked ones are shared by every scene."""
+    meshes = {o.data for o in col.all_objects if o.type == 'MESH'}
+    linked = sum(1 for m in meshes if m.library is not None)
+    print(f"  K1 meshes: {len(meshes)} ({linked} linked), scenes: {len(bpy.data.scenes)}, "
+          f"libraries: {len(bpy.data.libraries)}")
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+mask_cutout.py
+
+Mask -> cutout mesh stage for the composite occluders.
+
+An occluder used to be a full plane with a transparent/principled mix driven
+by the mask texture, so every ray that hit it paid for a mask lookup and a
+transparent bounce. Instead, each mask's outline is traced, simplified and
+triangulated here, and build_composites.py builds an opaque mesh covering
+exactly the masked pixels, textured with the reference plate through its UVs.
+
+  mask --marching squares (LEVEL)--> loops --Douglas-Peucker (EPSILON px)-->
+  polygons (+ holes) --ear clipping--> triangles in plate UV space
+
+Loops enclosing less than MIN_AREA px^2 (specks, pinholes) are dropped.
+
+Results live next to the masks in assets/masks/ENV_NAME/masks.cutouts.json:
+
+  {"version": 2, "level": 0.5, "epsilon": 1.5, "min_area": 64.0,
+   "masks": {"keyboard.png": {"size": [w, h], "sha256": ...,
+                              "uv": [[u, v], ...], "tris": [[a, b, c], ...],
+                              "area": 0.19}}}
+
+uv is (0, 0) at the plate's bottom-left, as Blender's image textures. area
+is the cutout's share of the image (compare the coverage in
+masks.meta.json). Like the mask sidecar, an entry is only trusted while the
+PNG's content hash matches; inside Blender, a stale or missing entry is
+traced from the loaded image's pixels instead (NumPy only, no Pillow).
+
+Usage:
+  python scripts/mask_cutout.py kb_wood_mat     # (re)write the sidecar
+  python scripts/mask_cutout.py --all
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from mask_meta import image_mask
+from stage_cache import hash_file
+
+log = logging.getLogger("mask_cutout")
+
+CUTOUT_NAME = "masks.cutouts.json"
+CUTOUT_VERSION = 2
+# Iso level of the traced outline (where the old mix shader was 50/50)
+LEVEL = 0.5
+# Douglas-Peucker tolerance in pixels
+EPSILON = 1.5
+# Loops (islands or holes) smaller than this many px^2 are dropped
+MIN_AREA = 64.0
+
+# Marching-squares segments per cell case (tl=8, tr=4, br=2, bl=1), as edge
+# pairs; T/B/L/R are the cell's top/bottom/left/right edges. Saddles (5, 10)
+# are resolved by the cell centre.
+_SEGMENTS = {
+    1: (("L", "B"),), 2: (("B", "R"),), 3: (("L", "R"),), 4: (("T", "R"),),
+    6: (("T", "B"),), 7: (("T", "L"),), 8: (("T", "L"),), 9: (("T", "B"),),
+    11: (("T", "R"),), 12: (("L", "R"),), 13: (("B", "R"),), 14: (("L", "B"),),
+}
+_SADDLES = {
+    # case: (centre outside, centre inside)
+    5: ((("T", "R"), ("L", "B")), (("T", "L"), ("B", "R"))),
+    10: ((("T", "L"), ("B", "R")), (("T", "R"), ("L", "B"))),
+}
+
+
+# ============================================================================
+# PATHS
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def sidecar_path(mask_dir: Path) -> Path:
+    return Path(mask_dir) / CUTOUT_NAME
+
+
+# ============================================================================
+# CONTOURS
+# ============================================================================
+
+def trace_contours(mask: np.ndarray, level: float = LEVEL) -> list[np.ndarray]:
+    """Closed iso-contours of a float mask (0..1, top row first) as (N, 2) x/y pixel loops."""
+    f = np.pad(np.asarray(mask, dtype=np.float32), 1)
+    inside = f >= level
+    case = ((inside[:-1, :-1].astype(np.uint8) << 3) | (inside[:-1, 1:].astype(np.uint8) << 2)
+            | (inside[1:, 1:].astype(np.uint8) << 1) | inside[1:, :-1].astype(np.uint8))
+    rows, cols = np.nonzero((case != 0) & (case != 15))
+
+    # Edge keys: (0, i, j) horizontal (i, j)-(i, j+1); (1, i, j) vertical (i, j)-(i+1, j)
+    adjacency: dict[tuple, list] = {}
+    for i, j, c in zip(rows.tolist(), cols.tolist(), case[rows, cols].tolist()):
+        edges = {"T": (0, i, j), "B": (0, i + 1, j), "L": (1, i, j), "R": (1, i, j + 1)}
+        if c in _SADDLES:
+            centre = (f[i, j] + f[i, j + 1] + f[i + 1, j] + f[i + 1, j + 1]) / 4
+            segments = _SADDLES[c][int(centre >= level)]
+        else:
+            segments = _SEGMENTS[c]
+        for a, b in segments:
+            adjacency.setdefault(edges[a], []).append(edges[b])
+            adjacency.setdefault(edges[b], []).append(edges[a])
+
+    loops = []
+    visited = set()
+    for start in adjacency:
+        if start in visited:
+            continue
+        keys = [start]
+        visited.add(start)
+        prev, cur = None, start
+        while True:
+            a, b = adjacency[cur]
+            nxt = b if a == prev else a
+            if nxt == start:
+                break
+            keys.append(nxt)
+            visited.add(nxt)
+            prev, cur = cur, nxt
+        k = np.array(keys)
+        kind, i, j = k[:, 0], k[:, 1], k[:, 2]
+        a = f[i, j]
+        b = np.where(kind == 0, f[i, np.minimum(j + 1, f.shape[1] - 1)],
+                     f[np.minimum(i + 1, f.shape[0] - 1), j])
+        t = (level - a) / np.where(b != a, b - a, 1.0)
+        # Padded grid point (i, j) is the centre of pixel (j - 1, i - 1)
+        x = j - 0.5 + np.where(kind == 0, t, 0.0)
+        y = i - 0.5 + np.where(kind == 1, t, 0.0)
+        loops.append(np.stack([x, y], axis=1))
+    return loops
+
+
+def signed_area(loop: np.ndarray) -> float:
+    x, y = loop[:, 0], loop[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _douglas_peucker(pts: np.ndarray, epsilon: float) -> np.ndarray:
+    keep = np.zeros(len(pts), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b <= a + 1:
+            continue
+        seg = pts[b] - pts[a]
+        rel = pts[a + 1:b] - pts[a]
+        norm = np.hypot(*seg)
+        if norm > 0:
+            d = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm
+        else:
+            d = np.hypot(rel[:, 0], rel[:, 1])
+        k = int(np.argmax(d))
+        if d[k] > epsilon:
+            keep[a + 1 + k] = True
+            stack += [(a, a + 1 + k), (a + 1 + k, b)]
+    return pts[keep]
+
+
+def simplify_loop(loop: np.ndarray, epsilon: float = EPSILON) -> np.ndarray:
+    """Douglas-Peucker on a closed loop (split at the vertex farthest from the first)."""
+    far = int(np.argmax(np.hypot(*(loop - loop[0]).T)))
+    if far == 0:
+        return loop[:1]
+    first = _douglas_peucker(loop[:far + 1], epsilon)
+    second = _douglas_peucker(np.vstack([loop[far:], loop[:1]]), epsilon)
+    return np.vstack([first[:-1], second[:-1]])
+
+
+def points_in_polygon(pts: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """Even-odd test of (N, 2) points against a polygon."""
+    x, y = pts[:, 0:1], pts[:, 1:2]
+    x0, y0 = poly[:, 0], poly[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xi = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return np.count_nonzero(crosses & (x < xi), axis=1) % 2 == 1
+
+
+# ============================================================================
+# TRIANGULATION
+# ============================================================================
+
+def _segments_cross(p: np.ndarray, q: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Proper intersection of segment p-q with each segment a[k]-b[k]."""
+    def orient(o, s, t):
+        return (s[..., 0] - o[..., 0]) * (t[..., 1] - o[..., 1]) - (s[..., 1] - o[..., 1]) * (t[..., 0] - o[..., 0])
+    d1, d2 = orient(a, b, p), orient(a, b, q)
+    d3, d4 = orient(p, q, a), orient(p, q, b)
+    return (d1 * d2 < 0) & (d3 * d4 < 0)
+
+
+def bridge_holes(pts: np.ndarray, outer: list[int], holes: list[list[int]]) -> list[int]:
+    """Splice holes (opposite winding) into the outer ring via visible bridge edges."""
+    ring = list(outer)
+    holes = sorted(holes, key=lambda h: -pts[h, 0].max())
+    for n, hole in enumerate(holes):
+        m = hole[int(np.argmax(pts[hole, 0]))]
+        others = [ring] + holes[n:]
+        a = np.concatenate([pts[r] for r in others])
+        b = np.concatenate([pts[np.roll(r, -1)] for r in others])
+        order = np.argsort(np.hypot(*(pts[ring] - pts[m]).T))
+        k = int(order[0])
+        for cand in order:
+            if not _segments_cross(pts[m], pts[ring[cand]], a, b).any():
+                k = int(cand)
+                break
+        start = hole.index(m)
+        spliced = hole[start:] + hole[:start] + [m]
+        ring = ring[:k + 1] + spliced + ring[k:]
+    return ring
+
+
+def ear_clip(pts: np.ndarray, ring: list[int]) -> list[tuple[int, int, int]]:
+    """Triangulate a counter-clockwise (positive area) ring of vertex indices."""
+    ring = list(ring)
+    tris = []
+    i = 0
+    while len(ring) > 3:
+        n = len(ring)
+        rp = pts[ring]
+        for step in range(n):
+            k = (i + step) % n
+            a, b, c = rp[k - 1], rp[k], rp[(k + 1) % n]
+            cross = (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0])
+            if cross <= 1e-12:
+                continue
+            # No other vertex inside or on the candidate ear; a vertex on the
+            # a-c diagonal is a pinch (saddle, bridge) the diagonal would cross
+            d0 = (b[0] - a[0]) * (rp[:, 1] - a[1]) - (b[1] - a[1]) * (rp[:, 0] - a[0])
+            d1 = (c[0] - b[0]) * (rp[:, 1] - b[1]) - (c[1] - b[1]) * (rp[:, 0] - b[0])
+            d2 = (a[0] - c[0]) * (rp[:, 1] - c[1]) - (a[1] - c[1]) * (rp[:, 0] - c[0])
+            blocking = (d0 >= -1e-9) & (d1 >= -1e-9) & (d2 >= -1e-9)
+            blocking &= np.any(rp != a, axis=1) & np.any(rp != b, axis=1) & np.any(rp != c, axis=1)
+            if np.any(blocking):
+                continue
+            break
+        else:
+            # Numerical dead end (self-touching ring): clip the next vertex anyway
+            k = i % n
+            a, b, c = rp[k - 1], rp[k], rp[(k + 1) % n]
+            cross = (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0])
+        if abs(cross) > 1e-12:
+            tris.append((ring[k - 1], ring[k], ring[(k + 1) % n]))
+        del ring[k]
+        i = k
+    if len(ring) == 3:
+        tris.append(tuple(ring))
+    return tris
+
+
+def triangulate_mask(mask: np.ndarray, level: float = LEVEL, epsilon: float = EPSILON,
+                     min_area: float = MIN_AREA) -> tuple[np.ndarray, list]:
+    """Cutout of a mask: (N, 2) x/y pixel vertices and index triangles."""
+    loops = []
+    for loop in trace_contours(mask, level):
+        if abs(signed_area(loop)) < min_area:
+            continue
+        loop = simplify_loop(loop, epsilon)
+        if len(loop) >= 3 and abs(signed_area(loop)) >= min_area:
+            loops.append(loop)
+    if not loops:
+        return np.zeros((0, 2)), []
+
+    # Nesting depth: even = outline, odd = hole of its smallest container
+    areas = [abs(signed_area(l)) for l in loops]
+    samples = np.array([l[0] for l in loops])
+    contains = np.array([points_in_polygon(samples, l) for l in loops])  # [container, loop]
+    np.fill_diagonal(contains, False)
+    depth = contains.sum(axis=0)
+
+    pts = np.concatenate(loops)
+    offsets = np.cumsum([0] + [len(l) for l in loops])
+    rings = []
+    for n, loop in enumerate(loops):
+        idx = list(range(offsets[n], offsets[n + 1]))
+        # Outlines counter-clockwise, holes clockwise
+        if (signed_area(loop) > 0) != (depth[n] % 2 == 0):
+            idx.reverse()
+        rings.append(idx)
+
+    tris = []
+    for n in np.flatnonzero(depth % 2 == 0):
+        holes = [rings[h] for h in np.flatnonzero((depth == depth[n] + 1) & contains[n])
+                 if min((c for c in np.flatnonzero(contains[:, h])), key=lambda c: areas[c]) == n]
+        tris += ear_clip(pts, bridge_holes(pts, rings[n], holes))
+    return pts, tris
+
+
+def cutout_entry(mask: np.ndarray) -> dict:
+    """Sidecar entry (without sha256) for a float mask, top row first."""
+    h, w = mask.shape
+    pts, tris = triangulate_mask(mask)
+    area = sum(abs(signed_area(pts[list(t)])) for t in tris) / (w * h) if tris else 0.0
+    used = sorted({i for t in tris for i in t})
+    remap = {old: new for new, old in enumerate(used)}
+    uv = [[round(float(pts[i, 0]) / w, 6), round(1.0 - float(pts[i, 1]) / h, 6)] for i in used]
+    return {
+        "size": [w, h],
+        "uv": uv,
+        "tris": [[remap[i] for i in t] for t in tris],
+        "area": round(area, 6),
+    }
+
+
+# ============================================================================
+# SIDECAR
+# ============================================================================
+
+def load_mask_array(path: Path) -> Optional[np.ndarray]:
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return np.asarray(img.convert("L"), dtype=np.float32) * np.float32(1 / 255)
+    except Exception:  # stub placeholders are empty files
+        return None
+
+
+def read_cutouts(mask_dir: Path) -> dict:
+    """Sidecar "masks" table ({} if missing, unreadable or other settings)."""
+    try:
+        meta = json.loads(sidecar_path(mask_dir).read_text())
+    except (OSError, ValueError):
+        return {}
+    settings = (meta.get("version"), meta.get("level"), meta.get("epsilon"), meta.get("min_area"))
+    if settings != (CUTOUT_VERSION, LEVEL, EPSILON, MIN_AREA):
+        return {}
+    return meta.get("masks", {})
+
+
+def write_cutouts(mask_dir: Path, paths: Optional[list[Path]] = None) -> Path:
+    """Triangulate masks (default: every PNG in mask_dir) and update the sidecar."""
+    mask_dir = Path(mask_dir)
+    if paths is None:
+        paths = sorted(mask_dir.glob("*.png"))
+    masks = read_cutouts(mask_dir)
+    for path in map(Path, paths):
+        arr = load_mask_array(path)
+        if arr is None:
+            masks.pop(path.name, None)
+            continue
+        masks[path.name] = {**cutout_entry(arr), "sha256": hash_file(path)}
+    out = sidecar_path(mask_dir)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps({
+        "version": CUTOUT_VERSION, "level": LEVEL, "epsilon": EPSILON,
+        "min_area": MIN_AREA, "masks": masks,
+    }, separators=(",", ":")))
+    os.replace(tmp, out)
+    return out
+
+
+def cached_cutout(path: Path) -> Optional[dict]:
+    """Sidecar entry if it still matches the file on disk."""
+    path = Path(path)
+    entry = read_cutouts(path.parent).get(path.name)
+    if entry is None or not path.exists() or entry.get("sha256") != hash_file(path):
+        return None
+    return entry
+
+
+# ============================================================================
+# BLENDER
+# ============================================================================
+
+def mask_cutout(img, path: Optional[Path] = None) -> dict:
+    """Cutout for a bpy.types.Image mask: sidecar entry when fresh, else traced from its pixels."""
+    if path is not None:
+        cached = cached_cutout(path)
+        if cached is not None:
+            return cached
+    return cutout_entry(image_mask(img))
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[CUTOUT] %(message)s")
+    parser = argparse.ArgumentParser(description="Triangulate masks into occluder cutout meshes")
+    parser.add_argument("env_names", nargs="*", help="Environments under assets/masks/")
+    parser.add_argument("--all", action="store_true", help="Every mask directory")
+    args = parser.parse_args()
+
+    masks_root = get_project_root() / "assets" / "masks"
+    env_names = args.env_names
+    if args.all:
+        env_names = sorted(p.name for p in masks_root.iterdir() if p.is_dir())
+    if not env_names:
+        parser.error("give ENV_NAMEs or --all")
+
+    for env_name in env_names:
+        mask_dir = masks_root / env_name
+        if not mask_dir.is_dir():
+            log.warning("%s: no mask directory", env_name)
+            continue
+        out = write_cutouts(mask_dir)
+        for name, entry in sorted(read_cutouts(mask_dir).items()):
+            log.info("%s/%s: %d verts, %d tris, %.2f%% of the plate",
+                     env_name, name, len(entry["uv"]), len(entry["tris"]), entry["area"] * 100)
+        log.info("Wrote %s", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+mask_meta.py
+
+Mask metadata sidecar and coverage helpers.
+
+sam3_segment.py writes assets/masks/ENV_NAME/masks.meta.json next to the
+mask PNGs:
+
+  {"version": 1, "threshold": 0.01,
+   "masks": {"keyboard.png": {"size": [w, h], "coverage": 0.083,
+                              "bbox": [x0, y0, x1, y1], "sha256": ...}}}
+
+coverage is the fraction of pixels above threshold (full scale = 1.0). An
+entry is only trusted while the PNG's content hash still matches, so edited
+masks fall back to reading pixels; hashing the compressed PNG is far cheaper
+than decoding it.
+
+The Blender composite builders use mask_nonzero_ratio(), which reads the
+sidecar and otherwise pulls the image's pixels with foreach_get into a
+reused float32 buffer and reduces them in one NumPy call. This module must
+stay importable both inside Blender (no Pillow) and in the ML env (no bpy).
+
+Usage:
+  python scripts/mask_meta.py kb_wood_mat     # (re)write the sidecar
+  python scripts/mask_meta.py --all
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from stage_cache import hash_file
+
+log = logging.getLogger("mask_meta")
+
+SIDECAR_NAME = "masks.meta.json"
+META_VERSION = 1
+# Same cut-off the builders always used on Blender's float pixels
+COVERAGE_THRESHOLD = 0.01
+
+# Reused across foreach_get reads; grown on demand
+_pixel_buffer = np.empty(0, dtype=np.float32)
+
+
+# ============================================================================
+# PATHS
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def sidecar_path(mask_dir: Path) -> Path:
+    return Path(mask_dir) / SIDECAR_NAME
+
+
+# ============================================================================
+# SIDECAR
+# ============================================================================
+
+def coverage_from_array(arr: np.ndarray) -> float:
+    """Fraction of pixels above COVERAGE_THRESHOLD (uint8 or float 0..1)."""
+    if arr.size == 0:
+        return 0.0
+    if arr.dtype == np.uint8:
+        return np.count_nonzero(arr > COVERAGE_THRESHOLD * 255) / arr.size
+    return np.count_nonzero(arr > COVERAGE_THRESHOLD) / arr.size
+
+
+def describe_mask(path: Path) -> Optional[dict]:
+    """Sidecar entry for one mask PNG, or None if it can't be read."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            arr = np.asarray(img.convert("L"))
+    except Exception:  # stub placeholders are empty files
+        return None
+    ys, xs = np.nonzero(arr > COVERAGE_THRESHOLD * 255)
+    bbox = [int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1] if xs.size else None
+    return {
+        "size": [arr.shape[1], arr.shape[0]],
+        "coverage": round(coverage_from_array(arr), 6),
+        "bbox": bbox,
+        "sha256": hash_file(path),
+    }
+
+
+def read_mask_meta(mask_dir: Path) -> dict:
+    """Sidecar "masks" table ({} if missing, unreadable or another version)."""
+    try:
+        meta = json.loads(sidecar_path(mask_dir).read_text())
+    except (OSError, ValueError):
+        return {}
+    if meta.get("version") != META_VERSION or meta.get("threshold") != COVERAGE_THRESHOLD:
+        return {}
+    return meta.get("masks", {})
+
+
+def write_mask_meta(mask_dir: Path, paths: Optional[list[Path]] = None) -> Path:
+    """Describe masks (default: every PNG in mask_dir) and update the sidecar."""
+    mask_dir = Path(mask_dir)
+    if paths is None:
+        paths = sorted(mask_dir.glob("*.png"))
+    masks = read_mask_meta(mask_dir)
+    for path in paths:
+        entry = describe_mask(Path(path))
+        if entry is None:
+            masks.pop(Path(path).name, None)
+        else:
+            masks[Path(path).name] = entry
+    out = sidecar_path(mask_dir)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps(
+        {"version": META_VERSION, "threshold": COVERAGE_THRESHOLD, "masks": masks},
+        indent=2,
+    ))
+    os.replace(tmp, out)
+    return out
+
+
+def cached_coverage(path: Path) -> Optional[float]:
+    """Coverage from the sidecar if its entry still matches the file on disk."""
+    path = Path(path)
+    entry = read_mask_meta(path.parent).get(path.name)
+    if entry is None or not path.exists():
+        return None
+    if entry.get("sha256") != hash_file(path):
+        return None
+    return entry["coverage"]
+
+
+# ============================================================================
+# BLENDER
+# ============================================================================
+
+def _read_pixels(img) -> np.ndarray:
+    """A bpy.types.Image's pixels via foreach_get into the reused buffer."""
+    global _pixel_buffer
+    n = len(img.pixels)
+    if _pixel_buffer.size < n:
+        _pixel_buffer = np.empty(n, dtype=np.float32)
+    buf = _pixel_buffer[:n]
+    img.pixels.foreach_get(buf)
+    return buf
+
+
+def image_coverage(img) -> float:
+    """Coverage of a bpy.types.Image's red channel via foreach_get."""
+    if len(img.pixels) == 0:
+        return 0.0
+    return coverage_from_array(_read_pixels(img)[0::img.channels])
+
+
+def image_mask(img) -> np.ndarray:
+    """Red channel of a bpy.types.Image as an (h, w) array, top row first (a copy)."""
+    w, h = img.size
+    buf = _read_pixels(img)
+    return buf.reshape(h, w, img.channels)[::-1, :, 0].copy()
+
+
+def mask_nonzero_ratio(img, path: Optional[Path] = None) -> float:
+    """Mask coverage: sidecar value when fresh, else a vectorised pixel read."""
+    if img is None:
+        return 0.0
+    img.colorspace_settings.name = 'Non-Color'
+    if path is not None:
+        cached = cached_coverage(path)
+        if cached is not None:
+            return cached
+    return image_coverage(img)
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[MASKS] %(message)s")
+    parser = argparse.ArgumentParser(description="Write mask metadata sidecars")
+    parser.add_argument("env_names", nargs="*", help="Environments under assets/masks/")
+    parser.add_argument("--all", action="store_true", help="Every mask directory")
+    args = parser.parse_args()
+
+    masks_root = get_project_root() / "assets" / "masks"
+    env_names = args.env_names
+    if args.all:
+        env_names = sorted(p.name for p in masks_root.iterdir() if p.is_dir())
+    if not env_names:
+        parser.error("give ENV_NAMEs or --all")
+
+    for env_name in env_names:
+        mask_dir = masks_root / env_name
+        if not mask_dir.is_dir():
+            log.warning("%s: no mask directory", env_name)
+            continue
+        out = write_mask_meta(mask_dir)
+        for name, entry in sorted(read_mask_meta(mask_dir).items()):
+            log.info("%s/%s: %.2f%% coverage", env_name, name, entry["coverage"] * 100)
+        log.info("Wrote %s", out)
+
+
+if __name__ == "__main__":
+    main()
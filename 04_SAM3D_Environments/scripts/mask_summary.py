@@ -1,13 +1,11 @@
 import os
 from pathlib import Path
+import numpy as np
 from PIL import Image
 
 def nonzero_pct(p: Path) -> float:
-    img = Image.open(p).convert('L')
-    arr = img.getdata()
-    total = len(arr)
-    nz = sum(1 for v in arr if v > 0)
-    return (nz / max(total, 1)) * 100.0
+    arr = np.asarray(Image.open(p).convert('L'))
+    return np.count_nonzero(arr) / max(arr.size, 1) * 100.0
 
 def main() -> None:
     roots = [
@@ -22,6 +20,8 @@ def main() -> None:
             continue
         for name in sorted(os.listdir(mdir)):
             p = mdir / name
+            if p.suffix != '.png':
+                continue
             try:
                 pct = nonzero_pct(p)
                 print(f"  {name}: {pct:.2f}% non-zero")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+pipeline_trace.py
+
+Lightweight span tracing shared by the SAM3D pipeline scripts.
+
+Records named spans (wall time, process CPU time, peak RSS) and writes them
+as a Chrome trace (open in chrome://tracing or https://ui.perfetto.dev) plus
+an end-of-run summary table. Each span costs two perf_counter/process_time
+calls and one getrusage, so tracing stays on in production runs.
+
+Usage:
+  from pipeline_trace import span, traced, finish
+
+  with span("model_load", model=SAM3_MODEL_ID):
+      model = load()
+
+  @traced("png_write")
+  def save_mask(...): ...
+
+  finish("sam3_segment", env_name)   # writes logs/ENV_NAME/trace_<stage>.json
+
+Set K1_TRACE=0 to disable recording entirely.
+"""
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+log = logging.getLogger("pipeline_trace")
+
+ENABLED = os.getenv("K1_TRACE", "1") != "0"
+
+# ru_maxrss is KiB on Linux, bytes on macOS
+_RSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+_lock = threading.Lock()
+_events: list[dict] = []
+# Epoch-based timestamps so traces from separate stage processes line up
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_SCALE
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Record a span around the enclosed block."""
+    if not ENABLED:
+        yield
+        return
+
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        yield
+    finally:
+        wall1 = time.perf_counter()
+        cpu1 = time.process_time()
+        event = {
+            "name": name,
+            "ph": "X",
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "ts": (_EPOCH_OFFSET + wall0) * 1e6,
+            "dur": (wall1 - wall0) * 1e6,
+            "args": {
+                "cpu_s": round(cpu1 - cpu0, 6),
+                "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+                **{k: str(v) for k, v in args.items()},
+            },
+        }
+        with _lock:
+            _events.append(event)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator form of span(); defaults to the function name."""
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*a: Any, **kw: Any) -> Any:
+            with span(label):
+                return fn(*a, **kw)
+        return wrapper
+    return decorator
+
+
+def events() -> list[dict]:
+    """Snapshot of recorded spans."""
+    with _lock:
+        return list(_events)
+
+
+def extend(evts: list[dict]) -> None:
+    """Merge spans recorded in another process (e.g. a pool worker)."""
+    with _lock:
+        _events.extend(evts)
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def summarise(evts: list[dict]) -> list[dict]:
+    """Aggregate spans by name: count, total wall/CPU, max peak RSS."""
+    rows: dict[str, dict] = {}
+    for e in evts:
+        r = rows.setdefault(e["name"], {
+            "name": e["name"], "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0,
+        })
+        r["count"] += 1
+        r["wall_s"] += e["dur"] / 1e6
+        r["cpu_s"] += e["args"]["cpu_s"]
+        r["peak_rss_mb"] = max(r["peak_rss_mb"], e["args"]["peak_rss_mb"])
+    return sorted(rows.values(), key=lambda r: r["wall_s"], reverse=True)
+
+
+def print_summary(stage: str, evts: list[dict]) -> None:
+    rows = summarise(evts)
+    if not rows:
+        return
+    print("\n" + "=" * 72)
+    print(f"[TRACE] {stage}")
+    print(f"{'span':<32} {'n':>4} {'wall s':>9} {'cpu s':>9} {'peak RSS MB':>12}")
+    print("-" * 72)
+    for r in rows:
+        print(
+            f"{r['name']:<32} {r['count']:>4} {r['wall_s']:>9.3f} "
+            f"{r['cpu_s']:>9.3f} {r['peak_rss_mb']:>12.1f}"
+        )
+    print("=" * 72 + "\n")
+
+
+def write_chrome_trace(path: Path, evts: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": evts, "displayTimeUnit": "ms"}))
+
+
+def finish(stage: str, env_name: str, out_dir: Optional[Path] = None) -> Optional[Path]:
+    """
+    Write the Chrome trace and print the summary table.
+
+    Default location: <project_root>/logs/ENV_NAME/trace_<stage>.json
+    """
+    if not ENABLED:
+        return None
+    evts = events()
+    if out_dir is None:
+        out_dir = Path(__file__).resolve().parents[1] / "logs" / env_name
+    path = out_dir / f"trace_{stage}.json"
+    write_chrome_trace(path, evts)
+    print_summary(stage, evts)
+    log.info("Wrote trace: %s", path)
+    return path
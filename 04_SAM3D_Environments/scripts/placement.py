@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+placement.py
+
+Estimate world transforms for reconstructed objects from their masks.
+
+Each object is assumed to stand on a horizontal support plane (the floor, or
+a per-object height such as a desk top). From its mask:
+  - the bottom edge gives the contact pixel; its camera ray hits the support
+    plane at the object's footprint
+  - the bbox top and sides, intersected with the vertical plane through the
+    footprint, give the object's height and width in metres
+
+SAM3D meshes are normalised to a unit cube centred on the origin, so the
+object is placed with its centre above the footprint, scaled uniformly by
+its largest measured extent, and turned (about Z) to face the camera.
+
+Mask features and the ray solve are vectorized across all objects of an
+environment. Camera intrinsics and pose come from camera.py; per-object
+options from the "placement" block of environments/ENV_NAME.json:
+
+  "placement": {
+    "support_height": {"keyboard": 0.74, "monitor": 0.74},
+    "skip": ["desk_surface", "background"]
+  }
+
+sam3d_reconstruct.write_manifest() applies placements automatically. Run
+this script to preview them after editing the camera/placement config:
+
+  python scripts/placement.py ENV_NAME
+"""
+
+import argparse
+import json
+import logging
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+from camera import (
+    CameraIntrinsics,
+    CameraPose,
+    intrinsics_from_config,
+    load_camera_config,
+    pose_from_config,
+)
+from scene_manifest import load_manifest, manifest_path
+
+log = logging.getLogger("placement")
+
+# Fraction of the bbox height treated as the contact band at the bottom edge
+CONTACT_BAND = 0.05
+
+
+@dataclass
+class Placement:
+    location: List[float]
+    rotation_euler: List[float]
+    scale: List[float]
+    contact_px: List[float]   # [u, v] footprint pixel in the mask
+    height_m: float
+    width_m: float
+    clipped: bool             # mask touches the bottom image edge
+
+    def details(self) -> dict:
+        """Solver inputs/outputs recorded in the manifest for inspection."""
+        return {
+            "contact_px": [round(c, 1) for c in self.contact_px],
+            "height_m": round(self.height_m, 4),
+            "width_m": round(self.width_m, 4),
+            "clipped": self.clipped,
+        }
+
+
+# ============================================================================
+# MASK FEATURES
+# ============================================================================
+
+def mask_footprints(masks: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Bbox and contact pixel for a (N, H, W) stack of boolean masks.
+
+    Returns arrays of length N: valid, top, bottom, left, right, contact_u.
+    """
+    n, h, w = masks.shape
+    row_counts = masks.sum(axis=2)                                   # (N, H)
+    col_any = masks.any(axis=1)                                      # (N, W)
+    row_any = row_counts > 0
+    valid = row_any.any(axis=1)
+
+    top = np.argmax(row_any, axis=1)
+    bottom = h - 1 - np.argmax(row_any[:, ::-1], axis=1)
+    left = np.argmax(col_any, axis=1)
+    right = w - 1 - np.argmax(col_any[:, ::-1], axis=1)
+
+    # Mean column of the pixels in the bottom band of each bbox
+    row_colsum = masks.astype(np.float32) @ np.arange(w, dtype=np.float32)  # (N, H)
+    band = np.maximum(1, np.rint(CONTACT_BAND * (bottom - top + 1))).astype(np.int64)
+    rows = np.arange(h)[None, :]
+    in_band = (rows > (bottom - band)[:, None]) & (rows <= bottom[:, None])
+    band_count = (row_counts * in_band).sum(axis=1)
+    band_colsum = (row_colsum * in_band).sum(axis=1)
+    contact_u = np.where(band_count > 0, band_colsum / np.maximum(band_count, 1), (left + right) / 2)
+
+    return {
+        "valid": valid,
+        "top": top.astype(np.float64),
+        # Pixel edges, not centres: the object ends at the far side of its last row
+        "bottom": bottom.astype(np.float64) + 1.0,
+        "left": left.astype(np.float64),
+        "right": right.astype(np.float64) + 1.0,
+        "contact_u": contact_u + 0.5,
+    }
+
+
+# ============================================================================
+# RAY SOLVE
+# ============================================================================
+
+def solve_placements(
+    feats: dict[str, np.ndarray],
+    camera: CameraIntrinsics,
+    pose: CameraPose,
+    support: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """
+    Footprint, height, width and yaw for N objects at once.
+
+    support is the (N,) height of each object's support plane. Objects whose
+    contact ray does not hit their plane in front of the camera are invalid.
+    """
+    rot = pose.rotation()
+    origin = pose.position
+
+    def world_rays(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        return camera.ray(u, v) @ rot.T
+
+    d_contact = world_rays(feats["contact_u"], feats["bottom"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (support - origin[2]) / d_contact[:, 2]
+    valid = feats["valid"] & (d_contact[:, 2] < 0) & (t > 0)
+    t = np.where(valid, t, 0.0)
+    foot = origin + t[:, None] * d_contact                              # (N, 3)
+
+    # Vertical plane through the footprint, facing the camera
+    normal = foot - origin
+    normal[:, 2] = 0.0
+    normal /= np.maximum(np.linalg.norm(normal, axis=1, keepdims=True), 1e-9)
+    plane_d = np.einsum("ij,ij->i", normal, foot - origin)
+
+    def hit_plane(d: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = plane_d / np.einsum("ij,ij->i", normal, d)
+        return origin + s[:, None] * d
+
+    top = hit_plane(world_rays(feats["contact_u"], feats["top"]))
+    left = hit_plane(world_rays(feats["left"], feats["bottom"]))
+    right = hit_plane(world_rays(feats["right"], feats["bottom"]))
+
+    height = top[:, 2] - support
+    width = np.linalg.norm(right - left, axis=1)
+    valid &= np.isfinite(height) & (height > 0) & np.isfinite(width)
+
+    return {
+        "valid": valid,
+        "foot": foot,
+        "height": np.where(valid, height, 0.0),
+        "width": np.where(valid, width, 0.0),
+        # Rotate the mesh's -Y front towards the camera
+        "yaw": np.arctan2(-foot[:, 0], foot[:, 1]),
+    }
+
+
+# ============================================================================
+# ENVIRONMENT API
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def load_placement_config(env_name: str) -> dict:
+    """The "placement" block of environments/ENV_NAME.json ({} if absent)."""
+    path = get_project_root() / "environments" / f"{env_name}.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get("placement") or {}
+
+
+def load_mask(path: Path) -> Optional[np.ndarray]:
+    try:
+        return np.array(Image.open(path).convert("L")) > 127
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def place_objects(
+    env_name: str,
+    objects: List[tuple[str, Path]],
+    camera_config: Optional[dict] = None,
+    placement_config: Optional[dict] = None,
+) -> List[Optional[Placement]]:
+    """
+    Placement for each (name, mask_path), or None where it cannot be solved
+    (skipped, missing/empty mask, contact above the horizon).
+    """
+    cam_cfg = load_camera_config(env_name) if camera_config is None else camera_config
+    cfg = load_placement_config(env_name) if placement_config is None else placement_config
+    skip = set(cfg.get("skip", []))
+    support_height = cfg.get("support_height", {})
+    pose = pose_from_config(cam_cfg)
+
+    results: List[Optional[Placement]] = [None] * len(objects)
+
+    # Stack masks by shape (normally one shape per environment)
+    groups: dict[tuple, list[tuple[int, np.ndarray]]] = {}
+    for i, (name, mask_path) in enumerate(objects):
+        if name in skip:
+            continue
+        mask = load_mask(Path(mask_path))
+        if mask is None:
+            log.warning("No mask for '%s'; keeping identity transform", name)
+            continue
+        groups.setdefault(mask.shape, []).append((i, mask))
+
+    for (h, w), members in groups.items():
+        idx = np.array([i for i, _ in members])
+        feats = mask_footprints(np.stack([m for _, m in members]))
+        support = np.array(
+            [float(support_height.get(objects[i][0], 0.0)) for i in idx]
+        )
+        camera = intrinsics_from_config(cam_cfg, w, h)
+        sol = solve_placements(feats, camera, pose, support)
+
+        for k, i in enumerate(idx):
+            name = objects[i][0]
+            if not feats["valid"][k]:
+                log.info("Mask for '%s' is empty; keeping identity transform", name)
+                continue
+            if not sol["valid"][k]:
+                log.warning("Could not place '%s': contact point above the horizon", name)
+                continue
+            foot = sol["foot"][k]
+            height = float(sol["height"][k])
+            width = float(sol["width"][k])
+            size = max(height, width)
+            results[i] = Placement(
+                location=[float(foot[0]), float(foot[1]), float(support[k] + height / 2)],
+                rotation_euler=[0.0, 0.0, float(sol["yaw"][k])],
+                scale=[size, size, size],
+                contact_px=[float(feats["contact_u"][k]), float(feats["bottom"][k])],
+                height_m=height,
+                width_m=width,
+                clipped=bool(feats["bottom"][k] >= h),
+            )
+    return results
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[PLACE] %(message)s")
+    parser = argparse.ArgumentParser(description="Preview mask-based object placement")
+    parser.add_argument("env_name", help="Environment name (e.g., battlestation_batman)")
+    args = parser.parse_args()
+
+    manifest = load_manifest(manifest_path(args.env_name))
+    objects = [(o["name"], Path(o.get("mask_path", ""))) for o in manifest["objects"]]
+
+    print(f"{'object':<20} {'x':>7} {'y':>7} {'z':>7} {'yaw':>6} {'h m':>6} {'w m':>6}")
+    for (name, _), p in zip(objects, place_objects(args.env_name, objects)):
+        if p is None:
+            print(f"{name:<20} {'(not placed)':>7}")
+            continue
+        x, y, z = p.location
+        flag = "  (clipped)" if p.clipped else ""
+        print(
+            f"{name:<20} {x:>7.3f} {y:>7.3f} {z:>7.3f} "
+            f"{math.degrees(p.rotation_euler[2]):>6.1f} {p.height_m:>6.3f} {p.width_m:>6.3f}{flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+plate_composite.py
+
+Out-of-Blender compositor for the environment composites.
+
+Runs the same graph build_composites.py builds in Blender's
+compositor, vectorised in NumPy on the transparent K1 render and the
+reference plate:
+
+  masks --MAXIMUM--> union --INVERT--> --DILATE (STEP, px)--> alpha
+  plate --SET ALPHA(alpha)--> fg
+  render (transparent film) --ALPHA OVER(fg on top)--> composite
+
+Like Blender, every input is placed centred on the render-sized canvas
+(masks are resampled to the plate first if their size differs). Compositing
+happens on the 8-bit display-referred images, so plate pixels pass through
+untouched.
+
+Per-environment settings live in environments/ENV_NAME.json:
+  "composite": {"masks": ["keyboard", "control_panel"], "invert": true,
+                "dilate": 2, "order": "plate_over"}
+order "plate_over" (the Blender graphs) puts the matted plate over the
+render; "render_over" puts the render over the plate instead.
+
+The plate matte is built once per environment and cached, so a batch of
+frames only pays for the alpha-over. Frames run on a thread pool (NumPy and
+Pillow release the GIL).
+
+Inputs:
+  renders/ENV_NAME/ENV_NAME_k1_render*.png   raw RGBA render layer (written
+                                             by build_composites.py's File Output node)
+  assets/reference/ENV_NAME.jpg, assets/masks/ENV_NAME/<mask>.png
+
+Usage:
+  python scripts/plate_composite.py kb_wood_mat
+  python scripts/plate_composite.py kb_wood_mat --render frames/*.png --workers 8
+  python scripts/plate_composite.py --all
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from pipeline_trace import finish, span
+
+log = logging.getLogger("plate_composite")
+
+ORDERS = ("plate_over", "render_over")
+
+
+@dataclass
+class CompositeConfig:
+    masks: list[str] = field(default_factory=list)
+    invert: bool = True
+    dilate: int = 2
+    order: str = "plate_over"
+
+
+@dataclass
+class Frame:
+    env_name: str
+    render: Path
+    output: Path
+
+
+# ============================================================================
+# PATHS / CONFIG
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def load_environment(env_name: str) -> dict:
+    path = get_project_root() / "environments" / f"{env_name}.json"
+    return json.loads(path.read_text()) if path.exists() else {"env_name": env_name}
+
+
+def load_composite_config(env_name: str) -> Optional[CompositeConfig]:
+    """The env's "composite" block, or None if it has none."""
+    block = load_environment(env_name).get("composite")
+    if block is None:
+        return None
+    config = CompositeConfig(**block)
+    if config.order not in ORDERS:
+        raise ValueError(f"{env_name}: composite order must be one of {ORDERS}")
+    return config
+
+
+def plate_path(env_name: str) -> Path:
+    return get_project_root() / "assets" / "reference" / f"{env_name}.jpg"
+
+
+def default_render(env_name: str) -> Optional[Path]:
+    """Newest raw render layer written for an environment."""
+    renders = sorted(
+        (get_project_root() / "renders" / env_name).glob(f"{env_name}_k1_render*.png"),
+        key=lambda p: p.stat().st_mtime,
+    )
+    return renders[-1] if renders else None
+
+
+def default_output(env_name: str, render: Path) -> Path:
+    return get_project_root() / "renders" / env_name / "composite" / f"{render.stem}_comp.png"
+
+
+# ============================================================================
+# OPERATIONS (Blender compositor node equivalents)
+# ============================================================================
+
+def dilate_erode(mask: np.ndarray, distance: int) -> np.ndarray:
+    """DilateErode STEP: square max (distance > 0) or min (< 0) filter."""
+    if distance == 0:
+        return mask
+    op = np.maximum if distance > 0 else np.minimum
+    out = mask
+    for axis in (0, 1):
+        acc = out.copy()
+        n = out.shape[axis]
+        for s in range(1, abs(distance) + 1):
+            if s >= n:
+                break
+            lo = [slice(None)] * 2
+            hi = [slice(None)] * 2
+            lo[axis], hi[axis] = slice(0, n - s), slice(s, n)
+            op(acc[tuple(lo)], out[tuple(hi)], out=acc[tuple(lo)])
+            op(acc[tuple(hi)], out[tuple(lo)], out=acc[tuple(hi)])
+        out = acc
+    return out
+
+
+def set_alpha(rgb: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """SetAlpha (APPLY): premultiplied RGBA float32."""
+    a = alpha[..., None]
+    return np.concatenate([rgb * a, a], axis=-1)
+
+
+def alpha_over(bottom: np.ndarray, top: np.ndarray) -> np.ndarray:
+    """AlphaOver on premultiplied RGBA: top + bottom * (1 - top.a)."""
+    return top + bottom * (1.0 - top[..., 3:4])
+
+
+def premultiply(rgba8: np.ndarray) -> np.ndarray:
+    rgba = rgba8.astype(np.float32) * np.float32(1 / 255)
+    rgba[..., :3] *= rgba[..., 3:4]
+    return rgba
+
+
+def to_straight_u8(rgba: np.ndarray) -> np.ndarray:
+    a = rgba[..., 3:4]
+    rgb = np.divide(rgba[..., :3], a, out=np.zeros_like(rgba[..., :3]), where=a > 1e-6)
+    out = np.concatenate([rgb, a], axis=-1)
+    return (np.clip(out, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def center_on_canvas(img: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Centre an image on an HxW canvas (crop or zero-pad), like Blender's compositor."""
+    h, w = img.shape[:2]
+    out = np.zeros((height, width) + img.shape[2:], dtype=img.dtype)
+    sy, dy = max((h - height) // 2, 0), max((height - h) // 2, 0)
+    sx, dx = max((w - width) // 2, 0), max((width - w) // 2, 0)
+    ch, cw = min(h, height), min(w, width)
+    out[dy:dy + ch, dx:dx + cw] = img[sy:sy + ch, sx:sx + cw]
+    return out
+
+
+# ============================================================================
+# PLATE MATTE (cached per environment)
+# ============================================================================
+
+def load_mask(path: Path, size: tuple[int, int]) -> np.ndarray:
+    img = Image.open(path).convert("L")
+    if img.size != size:
+        img = img.resize(size, Image.BILINEAR)
+    return np.asarray(img, dtype=np.float32) * np.float32(1 / 255)
+
+
+@lru_cache(maxsize=16)
+def _plate_layer(env_name: str, config_key: str, stamps: tuple) -> np.ndarray:
+    config = CompositeConfig(**json.loads(config_key))
+    with span("plate_matte", env=env_name):
+        plate = Image.open(plate_path(env_name)).convert("RGB")
+        rgb = np.asarray(plate, dtype=np.float32) * np.float32(1 / 255)
+
+        mask_dir = get_project_root() / "assets" / "masks" / env_name
+        masks = [mask_dir / f"{m}.png" for m in config.masks]
+        masks = [m for m in masks if m.exists()]
+        if masks:
+            union = load_mask(masks[0], plate.size)
+            for m in masks[1:]:
+                np.maximum(union, load_mask(m, plate.size), out=union)
+            alpha = 1.0 - union if config.invert else union
+            alpha = dilate_erode(alpha, config.dilate)
+        else:
+            # No mask images: the image node feeds straight into alpha-over
+            alpha = np.ones(rgb.shape[:2], dtype=np.float32)
+        layer = set_alpha(rgb, alpha)
+    layer.setflags(write=False)
+    return layer
+
+
+def plate_layer(env_name: str, config: CompositeConfig) -> np.ndarray:
+    """Premultiplied RGBA plate with the mask matte applied (cached)."""
+    paths = [plate_path(env_name)] + [
+        get_project_root() / "assets" / "masks" / env_name / f"{m}.png" for m in config.masks
+    ]
+    stamps = tuple((str(p), p.stat().st_mtime_ns if p.exists() else 0) for p in paths)
+    key = json.dumps(config.__dict__, sort_keys=True)
+    return _plate_layer(env_name, key, stamps)
+
+
+# ============================================================================
+# COMPOSITING
+# ============================================================================
+
+def composite_frame(render_rgba8: np.ndarray, plate: np.ndarray, order: str) -> np.ndarray:
+    """Straight RGBA uint8 composite of a render and a premultiplied plate layer."""
+    h, w = render_rgba8.shape[:2]
+    render = premultiply(render_rgba8)
+    fg = center_on_canvas(plate, h, w)
+    if order == "plate_over":
+        return to_straight_u8(alpha_over(render, fg))
+    return to_straight_u8(alpha_over(fg, render))
+
+
+def composite_one(frame: Frame, config: CompositeConfig) -> float:
+    """Composite one frame to disk; returns seconds taken."""
+    t0 = time.perf_counter()
+    with span("composite_frame", env=frame.env_name, frame=frame.render.name):
+        render = np.asarray(Image.open(frame.render).convert("RGBA"))
+        out = composite_frame(render, plate_layer(frame.env_name, config), config.order)
+        frame.output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = frame.output.with_name(frame.output.name + ".tmp")
+        Image.fromarray(out, mode="RGBA").save(tmp, format="PNG", compress_level=1)
+        os.replace(tmp, frame.output)
+    return time.perf_counter() - t0
+
+
+def run_batch(frames: list[Frame], workers: Optional[int] = None) -> None:
+    """Composite frames on a thread pool; plate mattes are built once per env."""
+    configs = {}
+    for f in frames:
+        if f.env_name not in configs:
+            configs[f.env_name] = load_composite_config(f.env_name) or CompositeConfig()
+    # Build each plate matte once up front instead of racing in the pool
+    for env_name, config in configs.items():
+        plate_layer(env_name, config)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(frames)))
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        times = list(pool.map(lambda f: composite_one(f, configs[f.env_name]), frames))
+    wall = time.perf_counter() - t0
+    for f, secs in zip(frames, times):
+        log.info("%s -> %s (%.0f ms)", f.render.name, f.output, secs * 1000)
+    log.info("Composited %d frames in %.2fs (%d threads)", len(frames), wall, workers)
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[COMP] %(message)s")
+    parser = argparse.ArgumentParser(description="Composite K1 renders over reference plates")
+    parser.add_argument("env_names", nargs="*", help="Environments with a composite block")
+    parser.add_argument("--all", action="store_true", help="Every environment with a composite block")
+    parser.add_argument("--render", nargs="+", type=Path, help="Render frames (single environment)")
+    parser.add_argument("--out-dir", type=Path, help="Output directory (default renders/ENV/composite)")
+    parser.add_argument("--workers", type=int, default=None, help="Threads (default: CPU count)")
+    args = parser.parse_args()
+
+    env_names = args.env_names
+    if args.all:
+        env_dir = get_project_root() / "environments"
+        env_names = sorted(p.stem for p in env_dir.glob("*.json") if load_composite_config(p.stem))
+    if not env_names:
+        parser.error("give ENV_NAMEs or --all")
+    if args.render and len(env_names) != 1:
+        parser.error("--render needs exactly one environment")
+
+    frames = []
+    for env_name in env_names:
+        renders = args.render or [default_render(env_name)]
+        for render in renders:
+            if render is None or not render.exists():
+                log.warning("%s: no raw render found (renders/%s/%s_k1_render*.png)",
+                            env_name, env_name, env_name)
+                continue
+            out = (args.out_dir / f"{render.stem}_comp.png") if args.out_dir else default_output(env_name, render)
+            frames.append(Frame(env_name, render, out))
+    if not frames:
+        raise SystemExit("Nothing to composite")
+
+    try:
+        run_batch(frames, args.workers)
+    finally:
+        finish("plate_composite", env_names[0] if len(env_names) == 1 else "_all")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,44 +6,162 @@ Normalises reference images:
 - Ensures sRGB color space
 - Resizes longest side to 2048 px (configurable)
 - Saves to assets/reference/processed/
+- Writes the reference pyramid (reference_pyramid.py) from the in-memory
+  result, so later stages never decode the JPEG
+- Skips work when the source image and options are unchanged (--force to redo)
+
+JPEGs at least DRAFT_MIN_RATIO x larger than --max-size are decoded with
+Pillow's draft mode (DCT-domain downscale by 1/2, 1/4 or 1/8), so only the
+final LANCZOS step runs at full quality on a much smaller image.
+
+Batch mode (--all) normalises every assets/reference/*.jpg in a process pool.
 """
 
 import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 from PIL import Image
 
+from pipeline_trace import events, extend, finish, span
+from reference_pyramid import build_pyramid
+from stage_cache import StageCache
+
+logging.basicConfig(level=logging.INFO, format="[PREP] %(message)s")
+
+# Use JPEG draft decoding when the source is at least this many times max_size
+DRAFT_MIN_RATIO = 2
 
-def normalise_image(input_path: Path, output_path: Path, max_size: int = 2048) -> None:
-    img = Image.open(input_path).convert("RGB")
-    w, h = img.size
-    scale = min(max_size / max(w, h), 1.0)
-    if scale < 1.0:
-        img = img.resize((int(w * scale), int(h * scale)), Image.LANCZOS)
+
+def normalise_image(input_path: Path, output_path: Path, max_size: int = 2048) -> Image.Image:
+    with span("image_decode"):
+        img = Image.open(input_path)
+        w, h = img.size
+        scale = min(max_size / max(w, h), 1.0)
+        target = (int(w * scale), int(h * scale))
+        if img.format == "JPEG" and max(w, h) >= DRAFT_MIN_RATIO * max_size:
+            # Decodes at the smallest 1/2^k scale that is still >= target
+            img.draft("RGB", target)
+        img = img.convert("RGB")
+    if img.size != target:
+        with span("resize"):
+            img = img.resize(target, Image.LANCZOS)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(output_path, format="JPEG", quality=95)
+    with span("jpeg_write"):
+        img.save(output_path, format="JPEG", quality=95)
     print(f"Saved normalised image to {output_path}")
+    return img
+
+
+def run_stage(env_name: str, src: Path, dst: Path, max_size: int, force: bool) -> bool:
+    """Cache-aware normalisation for one environment; False if skipped."""
+    cache = StageCache("prep_for_sam3d", dst.parent / f".{env_name}.prep.stamp.json")
+    with span("cache_check"):
+        fingerprint = cache.fingerprint(
+            files=[src],
+            params={"max_size": max_size},
+            code=[Path(__file__), Path(__file__).with_name("reference_pyramid.py")],
+        )
+        if not force and cache.is_fresh(fingerprint):
+            return False
+
+    normalise_image(src, dst, max_size=max_size)
+    # From the JPEG as written, not the pre-encode image: downstream stages
+    # key on the JPEG bytes, and ensure_pyramid() rebuilds from the same file
+    with span("reference_decode"):
+        with Image.open(dst) as img:
+            img = img.convert("RGB")
+    pyramid = build_pyramid(env_name, img, dst)
+    cache.commit(fingerprint, [dst] + pyramid)
+    return True
+
+
+def get_paths(env_name: str) -> tuple[Path, Path]:
+    root = Path(__file__).resolve().parents[1]
+    src = root / "assets" / "reference" / f"{env_name}.jpg"
+    dst = root / "assets" / "reference" / "processed" / f"{env_name}.jpg"
+    return src, dst
+
+
+# ============================================================================
+# BATCH MODE
+# ============================================================================
+
+def _prep_one(env_name: str, max_size: int, force: bool) -> tuple[str, bool, list[dict]]:
+    """Pool task: returns (env, did_work, spans recorded for this task)."""
+    start = len(events())
+    src, dst = get_paths(env_name)
+    with span("prep_env", env=env_name):
+        did_work = run_stage(env_name, src, dst, max_size, force)
+    return env_name, did_work, events()[start:]
+
+
+def run_batch(env_names: list[str], max_size: int, force: bool, workers: Optional[int] = None) -> None:
+    """Normalise many references in parallel; up-to-date ones are skipped."""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(env_names)))
+    done = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_prep_one, name, max_size, force) for name in env_names]
+        for future in futures:
+            env_name, did_work, spans = future.result()
+            extend(spans)
+            done += did_work
+            skipped += not did_work
+    logging.info("Prepared %d references, %d up to date (%d workers)", done, skipped, workers)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("env_name", help="environment name, e.g. battlestation_batman")
+    parser.add_argument("env_name", nargs="?", help="environment name, e.g. battlestation_batman")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="normalise every assets/reference/*.jpg in a process pool",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes for --all (default: CPU count)",
+    )
     parser.add_argument(
         "--max-size",
         type=int,
         default=2048,
         help="maximum dimension for the resized image",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-run even if the stage cache says outputs are up to date",
+    )
     args = parser.parse_args()
 
-    root = Path(__file__).resolve().parents[1]
-    src = root / "assets" / "reference" / f"{args.env_name}.jpg"
-    dst = root / "assets" / "reference" / "processed" / f"{args.env_name}.jpg"
+    if args.all:
+        ref_dir = Path(__file__).resolve().parents[1] / "assets" / "reference"
+        env_names = sorted(p.stem for p in ref_dir.glob("*.jpg"))
+        if not env_names:
+            raise SystemExit(f"No reference images in {ref_dir}")
+        try:
+            run_batch(env_names, args.max_size, args.force, args.workers)
+        finally:
+            finish("prep_for_sam3d", "_all")
+        return
+
+    if not args.env_name:
+        parser.error("give an env_name or --all")
 
+    src, dst = get_paths(args.env_name)
     if not src.exists():
         raise SystemExit(f"Reference image not found: {src}")
 
-    normalise_image(src, dst, max_size=args.max_size)
+    try:
+        run_stage(args.env_name, src, dst, args.max_size, args.force)
+    finally:
+        finish("prep_for_sam3d", args.env_name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+reference_pyramid.py
+
+Per-environment multi-resolution cache of the reference image.
+
+The processed reference is stored once as raw uint8 RGB arrays at its full
+resolution (2048 px longest side by default) plus 1024 and 512 px levels:
+
+  .cache/pyramid/ENV_NAME/
+    meta.json        level shapes + signature of the source image
+    full.u8          H x W x 3
+    1024.u8, 512.u8  smaller levels (only those below full resolution)
+
+Stages np.memmap a level instead of decoding the JPEG, so each one picks the
+resolution it needs at no decode cost and concurrent workers share the same
+page cache. prep_for_sam3d.py writes the pyramid right after saving the
+processed JPEG; anyone else who finds it missing or stale (the source's size
+or mtime changed) rebuilds it from the source once. Both decode the JPEG, so
+the pixels do not depend on who built the pyramid.
+
+Usage:
+  from reference_pyramid import load_level
+  image = load_level(env_name, ref_path)          # full resolution memmap
+  thumb = load_level(env_name, ref_path, 512)     # smallest level >= 512 px
+
+CLI:
+  python scripts/reference_pyramid.py ENV_NAME [ENV_NAME ...]   # (re)build
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from pipeline_trace import span
+from stage_cache import output_signature
+
+log = logging.getLogger("reference_pyramid")
+
+LEVELS = (1024, 512)
+PYRAMID_VERSION = 1
+
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def pyramid_dir(env_name: str) -> Path:
+    return get_project_root() / ".cache" / "pyramid" / env_name
+
+
+def pyramid_files(env_name: str) -> list[Path]:
+    """Files of an existing pyramid (empty if none), meta.json last."""
+    meta = read_meta(env_name)
+    if meta is None:
+        return []
+    d = pyramid_dir(env_name)
+    return [d / level["file"] for level in meta["levels"]] + [d / "meta.json"]
+
+
+def read_meta(env_name: str) -> Optional[dict]:
+    try:
+        meta = json.loads((pyramid_dir(env_name) / "meta.json").read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return meta if meta.get("version") == PYRAMID_VERSION else None
+
+
+def is_fresh(meta: Optional[dict], source: Path) -> bool:
+    return (
+        meta is not None
+        and meta.get("source") == source.name
+        and meta.get("source_signature") == output_signature(source)
+    )
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Per-writer temp name: concurrent rebuilds (pool workers, or both threads
+    # of streaming mode) must not interleave bytes in one file before replace
+    tmp = path.with_name(f".{path.name}.tmp{os.getpid()}.{threading.get_ident()}")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def build_pyramid(env_name: str, image: Image.Image, source: Path) -> list[Path]:
+    """
+    Write the pyramid for `image`, recorded as derived from `source`.
+
+    meta.json is replaced last, so readers never see a half-written level
+    as valid. Returns the written files.
+    """
+    out = pyramid_dir(env_name)
+    out.mkdir(parents=True, exist_ok=True)
+    image = image.convert("RGB")
+
+    levels = []
+    with span("pyramid_write", env=env_name):
+        current = image
+        for name, size in [("full", None)] + [(str(s), s) for s in LEVELS]:
+            if size is not None:
+                if size >= max(image.size):
+                    continue
+                scale = size / max(current.size)
+                target = (max(int(current.width * scale), 1), max(int(current.height * scale), 1))
+                current = current.resize(target, Image.LANCZOS)
+            array = np.asarray(current, dtype=np.uint8)
+            filename = f"{name}.u8"
+            _write_atomic(out / filename, array.tobytes())
+            levels.append({"file": filename, "shape": list(array.shape)})
+
+        meta = {
+            "version": PYRAMID_VERSION,
+            "source": source.name,
+            "source_signature": output_signature(source),
+            "levels": levels,
+        }
+        _write_atomic(out / "meta.json", (json.dumps(meta, indent=2) + "\n").encode())
+    return [out / level["file"] for level in levels] + [out / "meta.json"]
+
+
+def ensure_pyramid(env_name: str, source: Path) -> dict:
+    """Meta of an up-to-date pyramid for `source`, building it if needed."""
+    meta = read_meta(env_name)
+    if is_fresh(meta, source):
+        return meta
+    log.info("Building reference pyramid for %s from %s", env_name, source.name)
+    with span("reference_decode"):
+        image = Image.open(source).convert("RGB")
+    build_pyramid(env_name, image, source)
+    return read_meta(env_name)
+
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def load_level(env_name: str, source: Path, size: Optional[int] = None) -> np.ndarray:
+    """
+    Read-only H x W x 3 uint8 memmap of the reference image.
+
+    size=None gives full resolution; otherwise the smallest level whose
+    longest side is >= size (full resolution if none is).
+    """
+    meta = ensure_pyramid(env_name, Path(source))
+    levels = meta["levels"]
+    chosen = levels[0]
+    if size is not None:
+        for level in levels[1:]:
+            if max(level["shape"][:2]) >= size:
+                chosen = level
+    return np.memmap(
+        pyramid_dir(env_name) / chosen["file"],
+        dtype=np.uint8,
+        mode="r",
+        shape=tuple(chosen["shape"]),
+    )
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[PYRAMID] %(message)s")
+    parser = argparse.ArgumentParser(description="Build reference image pyramids")
+    parser.add_argument("env_names", nargs="+", help="Environment names")
+    args = parser.parse_args()
+
+    processed = get_project_root() / "assets" / "reference" / "processed"
+    for env_name in args.env_names:
+        source = processed / f"{env_name}.jpg"
+        if not source.exists():
+            raise SystemExit(f"Processed reference not found: {source} (run prep_for_sam3d.py)")
+        meta = ensure_pyramid(env_name, source)
+        shapes = ", ".join("x".join(map(str, level["shape"][:2])) for level in meta["levels"])
+        log.info("%s: %s", env_name, shapes)
+
+
+if __name__ == "__main__":
+    main()
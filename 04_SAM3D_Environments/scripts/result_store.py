@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+result_store.py
+
+Content-addressed store for expensive per-object pipeline results.
+
+A key (SHA-256 of everything that determines a result) maps to a blob plus a
+small JSON sidecar of metadata:
+
+  .cache/sam3d_results/<key[:2]>/<key>.ply
+  .cache/sam3d_results/<key[:2]>/<key>.json
+
+Hits are hard-linked into the destination (copied if the store lives on a
+different filesystem), so re-running an environment costs no disk space.
+
+Writers must unlink a destination before rewriting it: a hard-linked
+destination shares its inode with the store blob.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+log = logging.getLogger("result_store")
+
+
+def default_store_root() -> Path:
+    """<project_root>/.cache/sam3d_results, overridable via K1_RESULT_STORE."""
+    env = os.getenv("K1_RESULT_STORE")
+    if env:
+        return Path(env).expanduser().resolve()
+    return Path(__file__).resolve().parents[1] / ".cache" / "sam3d_results"
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Atomically place src at dst as a hard link, falling back to a copy."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    # rename() onto another link of the same inode is a silent no-op
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    tmp = dst.with_name(f".{dst.name}.tmp{os.getpid()}")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+@dataclass
+class ResultStore:
+    root: Path
+    suffix: str = ".ply"
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash an ordered sequence of str/bytes/JSON-able parts into a key."""
+        h = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, (bytes, bytearray, memoryview)):
+                data = bytes(part)
+            elif isinstance(part, str):
+                data = part.encode("utf-8")
+            else:
+                data = json.dumps(part, sort_keys=True).encode("utf-8")
+            # Length prefix keeps ("ab", "c") distinct from ("a", "bc")
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def blob_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def meta_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def fetch(self, key: str, dest: Path) -> Optional[dict]:
+        """Link a stored result to dest; returns its metadata, or None on miss."""
+        blob = self.blob_path(key)
+        meta_path = self.meta_path(key)
+        if not (blob.exists() and meta_path.exists()):
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+        except json.JSONDecodeError:
+            return None
+        link_or_copy(blob, dest)
+        log.info("Result cache hit %s -> %s", key[:12], dest)
+        return meta
+
+    def put(self, key: str, src: Path, meta: Optional[dict] = None) -> None:
+        """Store src under key (hard link when possible) with its metadata."""
+        link_or_copy(src, self.blob_path(key))
+        # Sidecar last: a blob without metadata is treated as a miss
+        tmp = self.meta_path(key).with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta or {}, indent=2))
+        os.replace(tmp, self.meta_path(key))
+        log.info("Stored result %s <- %s", key[:12], src)
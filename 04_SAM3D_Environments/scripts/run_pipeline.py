@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+run_pipeline.py
+
+DAG orchestrator for the SAM3D environment pipeline.
+
+Each environment contributes five or six nodes:
+  prep -> segment -> reconstruct [-> cull] -> mesh -> manifest
+
+Nodes run as subprocesses of the existing stage scripts. Nodes from different
+environments run concurrently, each inside its own CPU budget (thread env
+vars), while the sum of running budgets stays within --cpus.
+
+Usage:
+  python scripts/run_pipeline.py battlestation_batman moody_laptop_desk
+  python scripts/run_pipeline.py --all --cpus 16
+  python scripts/run_pipeline.py --all --resume      # skip nodes done last run
+
+Environment definitions:
+  environments/ENV_NAME.json  {env_name, prompts, objects, build_script, ...}
+  Optional "cpu_budget": {"segment": 8, ...} overrides per-stage budgets.
+  Optional "crop": true passes --crop to sam3d_reconstruct.py.
+  Optional "reconstruct_workers": N passes --workers N; the workers split the
+  reconstruct node's CPU budget between them.
+  Optional "cull": {"dilate": 8, "voxel_size": 0.005} adds the cull node
+  (opt-in: it can only cut correctly where placement.py's pose fits the
+  object) and passes splat_cull.py options; "camera" describes the reference
+  camera (see camera.py).
+  Optional "mesh_triangles": N sets the splat_to_mesh.py triangle budget.
+
+State:
+  .pipeline_state.json records finished nodes (for --resume)
+  logs/ENV_NAME/<stage>.log holds each node's stdout/stderr
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from scene_manifest import manifest_path
+from validate_manifest import validate_manifest
+
+log = logging.getLogger("run_pipeline")
+logging.basicConfig(level=logging.INFO, format="[PIPE] %(message)s")
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+STAGES = ["prep", "segment", "reconstruct", "cull", "mesh", "manifest"]
+# Only run for environments whose definition has a block of the same name
+OPTIONAL_STAGES = {"cull"}
+
+# Default CPU budget per stage (threads handed to torch/BLAS)
+DEFAULT_CPU_BUDGET = {
+    "prep": 1,
+    "segment": 4,
+    "reconstruct": 4,
+    "cull": 1,
+    "mesh": 4,
+    "manifest": 1,
+}
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+
+# ============================================================================
+# PATH UTILITIES
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def get_env_dir() -> Path:
+    return get_project_root() / "environments"
+
+
+def get_state_path() -> Path:
+    return get_project_root() / ".pipeline_state.json"
+
+
+def get_log_path(env_name: str, stage: str) -> Path:
+    return get_project_root() / "logs" / env_name / f"{stage}.log"
+
+
+# ============================================================================
+# ENVIRONMENT DEFINITIONS
+# ============================================================================
+
+def load_environment(env_name: str) -> dict:
+    """Load environments/ENV_NAME.json."""
+    path = get_env_dir() / f"{env_name}.json"
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No environment definition for '{env_name}' (expected {path})"
+        )
+    env = json.loads(path.read_text())
+    for key in ("prompts", "objects"):
+        if not env.get(key):
+            raise ValueError(f"{path}: '{key}' must be a non-empty list")
+    env.setdefault("env_name", env_name)
+    return env
+
+
+def list_environments() -> list[str]:
+    return sorted(p.stem for p in get_env_dir().glob("*.json"))
+
+
+def env_digest(env: dict) -> str:
+    """Hash of an environment definition; --resume ignores stale state."""
+    blob = json.dumps(env, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+# ============================================================================
+# DAG
+# ============================================================================
+
+@dataclass
+class Node:
+    env_name: str
+    stage: str
+    cmd: Optional[list[str]]
+    cpus: int
+    deps: list[str] = field(default_factory=list)
+    digest: str = ""
+    status: str = "pending"  # pending | running | done | failed | blocked | resumed
+    start: float = 0.0
+    end: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.env_name}:{self.stage}"
+
+    @property
+    def seconds(self) -> float:
+        return max(self.end - self.start, 0.0)
+
+
+def build_nodes(env: dict, max_cpus: int, force: bool) -> list[Node]:
+    """Create the prep -> ... -> manifest chain of STAGES for one env."""
+    name = env["env_name"]
+    scripts = get_project_root() / "scripts"
+    py = sys.executable
+    extra = ["--force"] if force else []
+    budget = {**DEFAULT_CPU_BUDGET, **env.get("cpu_budget", {})}
+    cpus = {stage: max(1, min(int(budget[stage]), max_cpus)) for stage in STAGES}
+    digest = env_digest(env)
+    cull = env.get("cull", {})
+
+    cmds = {
+        "prep": [py, str(scripts / "prep_for_sam3d.py"), name] + extra,
+        "segment": [py, str(scripts / "sam3_segment.py"), name,
+                    "--prompts", *env["prompts"]] + extra,
+        "reconstruct": [py, str(scripts / "sam3d_reconstruct.py"), name,
+                        "--objects", *env["objects"]]
+                       + (["--crop"] if env.get("crop") else [])
+                       + (["--workers", str(env["reconstruct_workers"])]
+                          if env.get("reconstruct_workers") else [])
+                       + extra,
+        "cull": [py, str(scripts / "splat_cull.py"), name]
+                + [arg for key in ("dilate", "min_opacity", "voxel_size") if key in cull
+                   for arg in (f"--{key.replace('_', '-')}", str(cull[key]))]
+                + extra,
+        # One worker process per CPU in the node's budget
+        "mesh": [py, str(scripts / "splat_to_mesh.py"), name,
+                 "--workers", str(cpus["mesh"])]
+                + (["--triangles", str(env["mesh_triangles"])]
+                   if env.get("mesh_triangles") else [])
+                + extra,
+        # In-process manifest validation (validate_manifest.py)
+        "manifest": None,
+    }
+
+    nodes = []
+    prev = None
+    for stage in STAGES:
+        if stage in OPTIONAL_STAGES and stage not in env:
+            continue
+        nodes.append(Node(
+            env_name=name,
+            stage=stage,
+            cmd=cmds[stage],
+            cpus=cpus[stage],
+            deps=[prev] if prev else [],
+            digest=digest,
+        ))
+        prev = nodes[-1].key
+    return nodes
+
+
+def check_manifest(env_name: str) -> None:
+    """Manifest node: schema, consistency and file checks (validate_manifest.py)."""
+    report = validate_manifest(manifest_path(env_name))
+    for warning in report.warnings:
+        log.warning("[%s] %s", env_name, warning)
+    if not report.ok:
+        raise ValueError("invalid manifest:\n" + report.format())
+    log.info("[%s] Manifest OK (%d warnings)", env_name, len(report.warnings))
+
+
+# ============================================================================
+# STATE (RESUME)
+# ============================================================================
+
+def load_state() -> dict:
+    try:
+        return json.loads(get_state_path().read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"nodes": {}}
+
+
+def save_state(state: dict) -> None:
+    path = get_state_path()
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(path)
+
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def run_node(node: Node) -> None:
+    """Run one node; raises on failure."""
+    if node.cmd is None:
+        check_manifest(node.env_name)
+        return
+
+    env = os.environ.copy()
+    for var in THREAD_ENV_VARS:
+        env[var] = str(node.cpus)
+    env["K1_CPU_BUDGET"] = str(node.cpus)
+
+    log_path = get_log_path(node.env_name, node.stage)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("w") as f:
+        proc = subprocess.run(
+            node.cmd,
+            cwd=str(get_project_root()),
+            env=env,
+            stdout=f,
+            stderr=subprocess.STDOUT,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"exit code {proc.returncode} (see {log_path})")
+
+
+def run_dag(nodes: list[Node], max_cpus: int, state: dict, resume: bool) -> bool:
+    """
+    Schedule nodes as their dependencies complete, within the CPU budget.
+    Returns True if every node finished.
+    """
+    by_key = {n.key: n for n in nodes}
+
+    if resume:
+        for n in nodes:
+            prev = state["nodes"].get(n.key)
+            if prev and prev.get("status") == "done" and prev.get("digest") == n.digest:
+                n.status = "resumed"
+
+    def ready(n: Node) -> bool:
+        return n.status == "pending" and all(
+            by_key[d].status in ("done", "resumed") for d in n.deps
+        )
+
+    def block_dependents(failed: Node) -> None:
+        for n in nodes:
+            if n.status == "pending" and failed.key in n.deps:
+                n.status = "blocked"
+                block_dependents(n)
+
+    cpus_in_use = 0
+    running: dict[Future, Node] = {}
+
+    with ThreadPoolExecutor(max_workers=max(len(nodes), 1)) as pool:
+        while True:
+            # Launch everything that is ready and fits the CPU budget
+            for n in nodes:
+                if not ready(n):
+                    continue
+                # Always allow one node to run, even if its budget exceeds the pool
+                if running and cpus_in_use + n.cpus > max_cpus:
+                    continue
+                n.status = "running"
+                n.start = time.perf_counter()
+                cpus_in_use += n.cpus
+                log.info("-> %s (cpus=%d)", n.key, n.cpus)
+                running[pool.submit(run_node, n)] = n
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                n = running.pop(fut)
+                n.end = time.perf_counter()
+                cpus_in_use -= n.cpus
+                try:
+                    fut.result()
+                    n.status = "done"
+                    log.info("<- %s done in %.2fs", n.key, n.seconds)
+                except Exception as e:
+                    n.status = "failed"
+                    log.error("<- %s FAILED after %.2fs: %s", n.key, n.seconds, e)
+                    block_dependents(n)
+                state["nodes"][n.key] = {
+                    "status": n.status,
+                    "digest": n.digest,
+                    "seconds": round(n.seconds, 3),
+                }
+                save_state(state)
+
+    return all(n.status in ("done", "resumed") for n in nodes)
+
+
+# ============================================================================
+# TIMING SUMMARY
+# ============================================================================
+
+def critical_path(nodes: list[Node]) -> tuple[float, list[Node]]:
+    """Longest dependency chain by node duration (nodes are topologically ordered)."""
+    by_key = {n.key: n for n in nodes}
+    finish: dict[str, float] = {}
+    via: dict[str, Optional[str]] = {}
+    for n in nodes:
+        best = None
+        for d in n.deps:
+            if best is None or finish[d] > finish[best]:
+                best = d
+        finish[n.key] = (finish[best] if best else 0.0) + n.seconds
+        via[n.key] = best
+
+    if not finish:
+        return 0.0, []
+    tail = max(finish, key=finish.get)
+    path = []
+    key: Optional[str] = tail
+    while key:
+        path.append(by_key[key])
+        key = via[key]
+    return finish[tail], list(reversed(path))
+
+
+def print_summary(nodes: list[Node], wall: float) -> None:
+    print("\n" + "=" * 60)
+    print(f"{'node':<36} {'status':<9} {'cpus':>4} {'secs':>8}")
+    print("-" * 60)
+    for n in nodes:
+        print(f"{n.key:<36} {n.status:<9} {n.cpus:>4} {n.seconds:>8.2f}")
+    print("-" * 60)
+
+    total, path = critical_path(nodes)
+    serial = sum(n.seconds for n in nodes)
+    print(f"Wall time:      {wall:8.2f}s")
+    print(f"Serial sum:     {serial:8.2f}s")
+    print(f"Critical path:  {total:8.2f}s")
+    for n in path:
+        print(f"  {n.key:<34} {n.seconds:8.2f}s")
+    print("=" * 60 + "\n")
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the SAM3D environment pipeline as a DAG over many environments"
+    )
+    parser.add_argument("env_names", nargs="*", help="Environments (environments/*.json)")
+    parser.add_argument("--all", action="store_true", help="Run every defined environment")
+    parser.add_argument(
+        "--cpus",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Total CPU budget shared by concurrently running nodes",
+    )
+    parser.add_argument("--resume", action="store_true", help="Skip nodes finished last run")
+    parser.add_argument("--force", action="store_true", help="Pass --force to every stage")
+    args = parser.parse_args()
+
+    env_names = list_environments() if args.all else args.env_names
+    if not env_names:
+        parser.error("give one or more environment names, or --all")
+
+    nodes: list[Node] = []
+    for name in env_names:
+        nodes.extend(build_nodes(load_environment(name), args.cpus, args.force))
+
+    state = load_state()
+    t0 = time.perf_counter()
+    ok = run_dag(nodes, args.cpus, state, args.resume)
+    print_summary(nodes, time.perf_counter() - t0)
+
+    if ok:
+        print("Ready for Blender. In BlenderMCP, run K1_MASTER_BUILD.py then:")
+        builds = [load_environment(n).get("build_script", f"scripts/build_{n}.py") for n in env_names]
+        # Composite environments share one builder that builds them all
+        for build in dict.fromkeys(builds):
+            print(f"  exec(open('{build}').read())")
+    else:
+        failed = [n.key for n in nodes if n.status == "failed"]
+        log.error("Failed nodes: %s (re-run with --resume)", ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,19 @@ Frozen CLI interface:
 
 Outputs:
   assets/masks/ENV_NAME/<prompt_slug>.png  (single-channel, 0=bg, 255=object)
+  assets/masks/ENV_NAME/masks.meta.json    (per-mask size, coverage, bbox)
 
 Implementation priority:
   1. Try real SAM3 model via transformers (Sam3Model + Sam3Processor)
   2. Fallback to SAM2 automatic mask generation if SAM3 unavailable
   3. Fallback to stub if no models available
 
+Build cache:
+  A stamp in assets/masks/ENV_NAME/.sam3_segment.stamp.json records the
+  fingerprint of the reference image, prompts, model IDs and this script.
+  Unchanged re-runs are skipped; --force rebuilds. Stub output is never
+  stamped, so real models are retried as soon as they become available.
+
 Requires:
 - transformers >= 4.46 (SAM3 support)
 - torch with MPS or CUDA or CPU
@@ -25,11 +32,20 @@ import argparse
 import logging
 import sys
 from pathlib import Path
-from typing import Optional, Any
+from typing import Any, Callable, Optional
 
 import numpy as np
 from PIL import Image
 
+from pipeline_trace import finish, span
+from mask_cutout import write_cutouts
+from mask_meta import write_mask_meta
+from reference_pyramid import load_level
+from stage_cache import StageCache
+
+# Called with (prompt, mask_path) as soon as each mask is written
+MaskCallback = Callable[[str, Path], None]
+
 log = logging.getLogger("sam3_segment")
 logging.basicConfig(level=logging.INFO, format="[SAM3] %(message)s")
 
@@ -87,8 +103,8 @@ def ensure_mask_dir(env_name: str) -> Path:
     return mask_dir
 
 
-def load_reference_image(env_name: str) -> Image.Image:
-    """Load reference image, preferring processed version."""
+def find_reference_image(env_name: str) -> Path:
+    """Return reference image path, preferring processed version."""
     root = get_project_root()
 
     candidates = [
@@ -100,14 +116,21 @@ def load_reference_image(env_name: str) -> Image.Image:
 
     for path in candidates:
         if path.exists():
-            log.info("Loading reference image: %s", path)
-            return Image.open(path).convert("RGB")
+            return path
 
     raise FileNotFoundError(
         f"No reference image found for '{env_name}' in assets/reference/"
     )
 
 
+def load_reference_image(env_name: str) -> Image.Image:
+    """Load reference image (full resolution) from the pyramid cache."""
+    path = find_reference_image(env_name)
+    log.info("Loading reference image: %s", path)
+    with span("reference_load"):
+        return Image.fromarray(np.array(load_level(env_name, path)))
+
+
 def slugify_prompt(prompt: str) -> str:
     """Convert prompt to filename-safe slug."""
     return prompt.strip().lower().replace(" ", "_")
@@ -120,7 +143,8 @@ def save_binary_mask(mask: np.ndarray, out_path: Path) -> None:
     mask_uint8 = (mask.astype(np.uint8) * 255)
     img = Image.fromarray(mask_uint8, mode="L")
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(out_path)
+    with span("png_write"):
+        img.save(out_path)
     log.info("Saved mask: %s", out_path)
 
 
@@ -140,8 +164,9 @@ def try_load_sam3() -> Optional[tuple[Any, Any]]:
         device = get_torch_device()
         log.info("Loading SAM3 model from %s...", SAM3_MODEL_ID)
 
-        model = Sam3Model.from_pretrained(SAM3_MODEL_ID).to(device)
-        processor = Sam3Processor.from_pretrained(SAM3_MODEL_ID)
+        with span("model_load", model=SAM3_MODEL_ID):
+            model = Sam3Model.from_pretrained(SAM3_MODEL_ID).to(device)
+            processor = Sam3Processor.from_pretrained(SAM3_MODEL_ID)
 
         log.info("SAM3 model loaded successfully on %s", device)
         return model, processor
@@ -159,6 +184,7 @@ def run_sam3_real(
     prompts: list[str],
     model: Any,
     processor: Any,
+    on_mask: Optional[MaskCallback] = None,
 ) -> list[Path]:
     """
     Run real SAM3 text-prompted segmentation.
@@ -179,13 +205,14 @@ def run_sam3_real(
         log.info("Running SAM3 for prompt '%s' -> %s", prompt, out_path.name)
 
         # Build inputs: text-only PCS
-        inputs = processor(
-            images=image,
-            text=prompt,
-            return_tensors="pt",
-        ).to(device)
-
-        with torch.no_grad():
+        with span("preprocess", prompt=prompt):
+            inputs = processor(
+                images=image,
+                text=prompt,
+                return_tensors="pt",
+            ).to(device)
+
+        with span("inference", prompt=prompt), torch.no_grad():
             outputs = model(**inputs)
 
         # Post-process to instance masks at original resolution
@@ -197,12 +224,13 @@ def run_sam3_real(
             else:
                 target_sizes = [list(image.size[::-1])]  # [H, W]
 
-            results = processor.post_process_instance_segmentation(
-                outputs,
-                threshold=0.5,
-                mask_threshold=0.5,
-                target_sizes=target_sizes,
-            )[0]
+            with span("postprocess", prompt=prompt):
+                results = processor.post_process_instance_segmentation(
+                    outputs,
+                    threshold=0.5,
+                    mask_threshold=0.5,
+                    target_sizes=target_sizes,
+                )[0]
 
             masks = results.get("masks")  # tensor [N, H, W]
 
@@ -223,6 +251,8 @@ def run_sam3_real(
             Image.fromarray(empty, mode="L").save(out_path)
 
         masks_created.append(out_path)
+        if on_mask is not None:
+            on_mask(prompt, out_path)
 
     return masks_created
 
@@ -242,11 +272,12 @@ def try_load_sam2_pipeline() -> Optional[Any]:
         device = get_device()
         log.info("Loading SAM2 pipeline from %s...", SAM2_MODEL_ID)
 
-        try:
-            pipe = pipeline("mask-generation", model=SAM2_MODEL_ID, device=device)
-        except Exception:
-            # Fallback to CPU if device fails
-            pipe = pipeline("mask-generation", model=SAM2_MODEL_ID, device="cpu")
+        with span("model_load", model=SAM2_MODEL_ID):
+            try:
+                pipe = pipeline("mask-generation", model=SAM2_MODEL_ID, device=device)
+            except Exception:
+                # Fallback to CPU if device fails
+                pipe = pipeline("mask-generation", model=SAM2_MODEL_ID, device="cpu")
 
         log.info("SAM2 pipeline loaded successfully")
         return pipe
@@ -263,6 +294,7 @@ def run_sam2_automatic(
     env_name: str,
     prompts: list[str],
     pipe: Any,
+    on_mask: Optional[MaskCallback] = None,
 ) -> list[Path]:
     """
     Run SAM2 automatic mask generation as fallback.
@@ -277,7 +309,8 @@ def run_sam2_automatic(
     log.info("Running SAM2 automatic mask generation...")
 
     try:
-        outputs = pipe(image, points_per_batch=64)
+        with span("inference", model=SAM2_MODEL_ID):
+            outputs = pipe(image, points_per_batch=64)
         masks = outputs.get("masks", [])
     except Exception as e:
         log.warning("SAM2 inference failed: %s", e)
@@ -297,7 +330,8 @@ def run_sam2_automatic(
         if i < len(mask_areas):
             mask_idx = mask_areas[i][0]
             mask_array = (np.array(masks[mask_idx]) * 255).astype(np.uint8)
-            Image.fromarray(mask_array, mode="L").save(out_path)
+            with span("png_write"):
+                Image.fromarray(mask_array, mode="L").save(out_path)
             log.info("Saved mask: %s (area: %d)", out_path.name, mask_areas[i][1])
         else:
             # Not enough masks - create empty placeholder
@@ -307,6 +341,8 @@ def run_sam2_automatic(
             log.warning("No mask available for '%s'; created empty mask", prompt)
 
         masks_created.append(out_path)
+        if on_mask is not None:
+            on_mask(prompt, out_path)
 
     return masks_created
 
@@ -315,7 +351,11 @@ def run_sam2_automatic(
 # STUB FALLBACK
 # ============================================================================
 
-def run_stub(env_name: str, prompts: list[str]) -> list[Path]:
+def run_stub(
+    env_name: str,
+    prompts: list[str],
+    on_mask: Optional[MaskCallback] = None,
+) -> list[Path]:
     """
     Final fallback: creates empty mask files with correct filenames.
     Maintains interface contract when no models are available.
@@ -332,6 +372,8 @@ def run_stub(env_name: str, prompts: list[str]) -> list[Path]:
 
         log.warning("[STUB] Created placeholder mask for '%s' at %s", prompt, out_path)
         masks_created.append(out_path)
+        if on_mask is not None:
+            on_mask(prompt, out_path)
 
     print("\n" + "=" * 60)
     print("[STUB] SAM3/SAM2 models not available. Masks are placeholders.")
@@ -349,19 +391,42 @@ def run_stub(env_name: str, prompts: list[str]) -> list[Path]:
 # MAIN ORCHESTRATION
 # ============================================================================
 
-def run_segmentation(env_name: str, prompts: list[str]) -> list[Path]:
+def segment_with_fallback(
+    env_name: str,
+    prompts: list[str],
+    on_mask: Optional[MaskCallback] = None,
+) -> tuple[str, list[Path]]:
     """
     Run segmentation with automatic fallback chain:
     1. Try SAM3 (text-prompted)
     2. Try SAM2 (automatic mask generation)
     3. Fall back to stub
+
+    Returns (backend, mask_paths) where backend is "sam3", "sam2" or "stub".
+    on_mask fires per written mask; if a backend fails midway the next one
+    re-emits every prompt, so consumers should let later masks win.
     """
+    backend, masks = _segment_with_fallback(env_name, prompts, on_mask)
+    # Precomputed coverage/bbox so Blender builders skip reading pixels
+    with span("mask_meta"):
+        write_mask_meta(ensure_mask_dir(env_name), masks)
+    # Occluder cutout meshes (outline -> triangles) for build_composites.py
+    with span("mask_cutout"):
+        write_cutouts(ensure_mask_dir(env_name), masks)
+    return backend, masks
+
+
+def _segment_with_fallback(
+    env_name: str,
+    prompts: list[str],
+    on_mask: Optional[MaskCallback],
+) -> tuple[str, list[Path]]:
     # Try SAM3 first (best: text-prompted)
     sam3_result = try_load_sam3()
     if sam3_result is not None:
         model, processor = sam3_result
         try:
-            return run_sam3_real(env_name, prompts, model, processor)
+            return "sam3", run_sam3_real(env_name, prompts, model, processor, on_mask)
         except Exception as e:
             log.exception("SAM3 inference failed: %s", e)
 
@@ -369,12 +434,43 @@ def run_segmentation(env_name: str, prompts: list[str]) -> list[Path]:
     sam2_pipe = try_load_sam2_pipeline()
     if sam2_pipe is not None:
         try:
-            return run_sam2_automatic(env_name, prompts, sam2_pipe)
+            return "sam2", run_sam2_automatic(env_name, prompts, sam2_pipe, on_mask)
         except Exception as e:
             log.exception("SAM2 inference failed: %s", e)
 
     # Final fallback: stub
-    return run_stub(env_name, prompts)
+    return "stub", run_stub(env_name, prompts, on_mask)
+
+
+def run_segmentation(env_name: str, prompts: list[str]) -> list[Path]:
+    """Run segmentation with automatic fallback; see segment_with_fallback."""
+    _, masks = segment_with_fallback(env_name, prompts)
+    return masks
+
+
+def run_stage(env_name: str, prompts: list[str], force: bool = False) -> None:
+    """Cache-aware segmentation for one environment."""
+    # Skip if reference, prompts, models and code are unchanged
+    cache = StageCache(
+        "sam3_segment", ensure_mask_dir(env_name) / ".sam3_segment.stamp.json"
+    )
+    with span("cache_check"):
+        fingerprint = cache.fingerprint(
+            files=[find_reference_image(env_name)],
+            params={"prompts": prompts},
+            model_id=f"{SAM3_MODEL_ID}|{SAM2_MODEL_ID}",
+            code=[Path(__file__), Path(__file__).with_name("mask_meta.py"),
+                  Path(__file__).with_name("mask_cutout.py")],
+        )
+        if not force and cache.is_fresh(fingerprint):
+            return
+
+    # Run segmentation with fallback chain
+    backend, masks = segment_with_fallback(env_name, prompts)
+
+    # Only stamp model output; stub placeholders must be retried
+    if backend != "stub":
+        cache.commit(fingerprint, masks)
 
 
 def main() -> None:
@@ -388,6 +484,11 @@ def main() -> None:
         required=True,
         help='Object prompts, e.g., "gaming chair" "desk surface"'
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run even if the stage cache says masks are up to date",
+    )
     args = parser.parse_args()
 
     # Verify reference image exists
@@ -402,8 +503,10 @@ def main() -> None:
         log.error("Checked: %s", [str(c) for c in candidates])
         sys.exit(1)
 
-    # Run segmentation with fallback chain
-    run_segmentation(args.env_name, args.prompts)
+    try:
+        run_stage(args.env_name, args.prompts, args.force)
+    finally:
+        finish("sam3_segment", args.env_name)
 
 
 if __name__ == "__main__":
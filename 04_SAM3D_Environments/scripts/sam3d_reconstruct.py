@@ -19,6 +19,38 @@ Implementation:
   1. Try real SAM3D via cloned sam-3d-objects repo
   2. Fallback to stub if repo/checkpoints unavailable
 
+Mask-bbox cropping (--crop):
+  Each object's image/mask pair is cropped to the padded mask bounding box
+  and rescaled to the model's working resolution before inference. The crop
+  transform is recorded per object in the manifest ("crop": bbox, scale,
+  source_size) for provenance only: nothing reads it back.
+
+Result cache:
+  Each object's result is stored in a content-addressed store keyed by the
+  reference image bytes, mask bits, seed, checkpoint config and crop
+  settings (see result_store.py). Hits are hard-linked into
+  assets/meshes/ENV_NAME/, so after editing one mask only that object is
+  reconstructed. Disable with --no-result-cache.
+
+Worker pool (--workers N):
+  Objects are pulled from a queue by N worker processes. Each worker loads
+  the SAM3D Inference once (on its first cache miss) and runs torch with
+  --threads-per-worker threads so workers don't oversubscribe cores (default:
+  K1_CPU_BUDGET or the CPU count, split evenly). Each worker holds a full
+  model copy, so size N to available RAM. Results merge into one manifest,
+  and the spans each worker records merge into the parent's trace.
+
+Manifest (v2, see scene_manifest.py):
+  Paths are relative to the project root and each object carries mesh/mask
+  content hashes. --merge updates only the given objects and keeps the
+  others; the file is rewritten only when something changed.
+
+Build cache:
+  A stamp in assets/meshes/ENV_NAME/.sam3d_reconstruct.stamp.json records the
+  fingerprint of the reference image, masks, object list, checkpoint config
+  and this script. Unchanged re-runs are skipped; --force rebuilds. Stub or
+  failed reconstructions are never stamped.
+
 SETUP REQUIRED:
   1. Clone https://github.com/facebookresearch/sam-3d-objects
   2. Follow their setup instructions
@@ -27,8 +59,8 @@ SETUP REQUIRED:
 """
 
 import argparse
-import json
 import logging
+import multiprocessing as mp
 import os
 import sys
 from dataclasses import dataclass, asdict, field
@@ -38,10 +70,28 @@ from typing import List, Optional, Any
 import numpy as np
 from PIL import Image
 
+import scene_manifest
+from camera import load_camera_config
+from pipeline_trace import events, extend, finish, span
+from placement import load_placement_config, place_objects
+from reference_pyramid import load_level
+from result_store import ResultStore, default_store_root
+from stage_cache import StageCache, hash_file
 
 log = logging.getLogger("sam3d_reconstruct")
 logging.basicConfig(level=logging.INFO, format="[SAM3D] %(message)s")
 
+SEED = 42
+RESULT_KEY_VERSION = "sam3d-result-v1"
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
 
 # ============================================================================
 # DATA STRUCTURES
@@ -55,6 +105,21 @@ class SceneObject:
     location: List[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
     rotation_euler: List[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
     scale: List[float] = field(default_factory=lambda: [1.0, 1.0, 1.0])
+    crop: Optional[dict] = None
+    placement: Optional[dict] = None
+
+
+@dataclass
+class CropConfig:
+    padding: float = 0.1      # fraction of bbox size added on each side
+    working_size: int = 1024  # longest side of the cropped model input
+
+
+@dataclass
+class CropTransform:
+    bbox: List[int]          # [x0, y0, x1, y1] in reference-image pixels
+    scale: float             # model-input pixels per reference pixel
+    source_size: List[int]   # [width, height] of the reference image
 
 
 # ============================================================================
@@ -92,6 +157,11 @@ def get_sam3d_repo() -> Path:
     return (root / "external" / "sam-3d-objects").resolve()
 
 
+def get_sam3d_config() -> Path:
+    """Checkpoint pipeline config; its content identifies the model."""
+    return get_sam3d_repo() / "checkpoints" / "hf" / "pipeline.yaml"
+
+
 def load_reference_image(env_name: str) -> Path:
     """Find and return path to reference image."""
     root = get_project_root()
@@ -136,10 +206,84 @@ def ensure_mesh_dir(env_name: str) -> Path:
     return mesh_dir
 
 
+def load_mask_bool(mask_path: Path) -> np.ndarray:
+    """Decode a mask PNG to a boolean array (object = pixel > 127)."""
+    with span("mask_decode", mask=mask_path.name):
+        mask_img = Image.open(mask_path).convert("L")
+        return np.array(mask_img) > 127
+
+
+def try_load_mask_bool(mask_path: Path) -> Optional[np.ndarray]:
+    """load_mask_bool, or None for undecodable files (sam3_segment stub placeholders are empty)."""
+    try:
+        return load_mask_bool(mask_path)
+    except (OSError, ValueError) as e:
+        log.warning("Cannot decode mask %s: %s", mask_path, e)
+        return None
+
+
+# ============================================================================
+# MASK-BBOX CROPPING
+# ============================================================================
+
+def mask_bbox(mask: np.ndarray, padding: float) -> Optional[List[int]]:
+    """Padded [x0, y0, x1, y1] (exclusive max) of a boolean mask, or None if empty."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return None
+
+    h, w = mask.shape
+    y0, y1 = int(rows[0]), int(rows[-1]) + 1
+    x0, x1 = int(cols[0]), int(cols[-1]) + 1
+    pad_x = int(round((x1 - x0) * padding))
+    pad_y = int(round((y1 - y0) * padding))
+    return [
+        max(x0 - pad_x, 0),
+        max(y0 - pad_y, 0),
+        min(x1 + pad_x, w),
+        min(y1 + pad_y, h),
+    ]
+
+
+def crop_to_mask(
+    image: np.ndarray,
+    mask: np.ndarray,
+    config: CropConfig,
+) -> tuple[np.ndarray, np.ndarray, Optional[CropTransform]]:
+    """
+    Crop image/mask to the padded mask bbox and rescale so the longest side
+    equals config.working_size. Returns the inputs unchanged for empty masks.
+    """
+    image = np.asarray(image)
+    bbox = mask_bbox(mask, config.padding)
+    if bbox is None:
+        return image, mask, None
+
+    x0, y0, x1, y1 = bbox
+    scale = config.working_size / max(x1 - x0, y1 - y0)
+    out_size = (max(int(round((x1 - x0) * scale)), 1), max(int(round((y1 - y0) * scale)), 1))
+
+    img_crop = Image.fromarray(image[y0:y1, x0:x1]).resize(out_size, Image.LANCZOS)
+    mask_crop = Image.fromarray(mask[y0:y1, x0:x1]).resize(out_size, Image.NEAREST)
+
+    transform = CropTransform(
+        bbox=bbox,
+        scale=scale,
+        source_size=[mask.shape[1], mask.shape[0]],
+    )
+    return np.asarray(img_crop), np.asarray(mask_crop), transform
+
+
 # ============================================================================
 # SAM3D REAL IMPLEMENTATION
 # ============================================================================
 
+def sam3d_installed() -> bool:
+    """Repo and checkpoint config present (cheap; does not load the model)."""
+    return get_sam3d_repo().exists() and get_sam3d_config().exists()
+
+
 def try_import_inference() -> Optional[Any]:
     """
     Try to import and initialize the SAM3D Inference class from cloned repo.
@@ -153,7 +297,7 @@ def try_import_inference() -> Optional[Any]:
         return None
 
     # Check for checkpoint
-    config_path = repo / "checkpoints" / "hf" / "pipeline.yaml"
+    config_path = get_sam3d_config()
     if not config_path.exists():
         log.warning("SAM3D checkpoints not found at %s", config_path)
         log.warning("Run the download script from the sam-3d-objects repo")
@@ -171,7 +315,8 @@ def try_import_inference() -> Optional[Any]:
 
         device = get_device()
         # compile=False is safer on MPS until tested
-        inference = Inference(str(config_path), compile=False, device=device)
+        with span("model_load", config=config_path):
+            inference = Inference(str(config_path), compile=False, device=device)
         log.info("SAM3D Inference loaded from %s", config_path)
         return inference
 
@@ -190,60 +335,75 @@ def run_sam3d_for_object(
     ref_image_path: Path,
     mask_path: Path,
     inference: Any,
-) -> Path:
+    crop: Optional[CropConfig] = None,
+) -> tuple[Path, Optional[CropTransform]]:
     """
     Run SAM3D reconstruction for a single object.
 
-    Current implementation saves Gaussian splat as .ply file.
+    Current implementation saves Gaussian splat as .ply file. With a
+    CropConfig, inference runs on the padded mask-bbox crop; the returned
+    CropTransform records that crop for the manifest.
     """
-    # Try to use SAM3D's own image loader if available
-    try:
-        from inference import load_image  # type: ignore[import-not-found]
-        image = load_image(str(ref_image_path))
-    except ImportError:
-        # Fallback: load as numpy array
-        image = np.array(Image.open(ref_image_path).convert("RGB"))
+    # Shared read-only memmap from the reference pyramid; no JPEG decode
+    with span("reference_load", obj=obj_name):
+        image = load_level(env_name, ref_image_path)
 
     # Load binary mask
-    mask_img = Image.open(mask_path).convert("L")
-    mask_arr = np.array(mask_img)
-    mask_bool = mask_arr > 127
+    mask_bool = load_mask_bool(mask_path)
 
     # Check if mask has any content
     if not np.any(mask_bool):
         log.warning("Mask for '%s' is empty; reconstruction may fail", obj_name)
 
+    transform = None
+    if crop is not None:
+        with span("crop", obj=obj_name):
+            image, mask_bool, transform = crop_to_mask(image, mask_bool, crop)
+        if transform is not None:
+            log.info(
+                "Cropped '%s' to bbox %s (scale %.3f)", obj_name, transform.bbox, transform.scale
+            )
+    if not image.flags.writeable:
+        # Uncropped memmap: inference may modify its input in place
+        image = np.array(image)
+
     log.info("Running SAM3D reconstruction for '%s'...", obj_name)
 
     try:
         # Run inference
-        output = inference(image, mask_bool, seed=42)
+        with span("inference", obj=obj_name):
+            output = inference(image, mask_bool, seed=SEED)
 
-        # Save Gaussian splat to PLY
+        # Save Gaussian splat to PLY. Unlink first: the old file may be a
+        # hard link into the result store, which must not be overwritten.
         mesh_dir = ensure_mesh_dir(env_name)
         mesh_path = mesh_dir / f"{obj_name}.ply"
+        mesh_path.unlink(missing_ok=True)
 
         if "gs" in output:
-            output["gs"].save_ply(str(mesh_path))
+            with span("ply_write", obj=obj_name):
+                output["gs"].save_ply(str(mesh_path))
             log.info("Saved Gaussian splat: %s", mesh_path)
         elif "mesh" in output:
             # Try mesh output if available
-            output["mesh"].export(str(mesh_path))
+            with span("ply_write", obj=obj_name):
+                output["mesh"].export(str(mesh_path))
             log.info("Saved mesh: %s", mesh_path)
         else:
             # Fallback: write placeholder
             log.warning("No recognizable output format; writing placeholder")
             mesh_path.write_text(f"# SAM3D output missing 'gs' or 'mesh' for {obj_name}\n")
 
-        return mesh_path
+        return mesh_path, transform
 
     except Exception as e:
         log.exception("SAM3D reconstruction failed for '%s': %s", obj_name, e)
         # Write placeholder on failure
         mesh_dir = ensure_mesh_dir(env_name)
         mesh_path = mesh_dir / f"{obj_name}.ply"
+        mesh_path.unlink(missing_ok=True)
         mesh_path.write_text(f"# SAM3D failed for {obj_name}: {e}\n")
-        return mesh_path
+        return mesh_path, transform
 
 
 # ============================================================================
@@ -302,50 +462,289 @@ def run_stub(env_name: str, objects: List[str]) -> List[SceneObject]:
 
 
 # ============================================================================
-# MAIN BACKEND
+# PER-OBJECT RECONSTRUCTION
 # ============================================================================
 
-def run_sam3d_backend(env_name: str, objects: List[str]) -> List[SceneObject]:
-    """
-    Run SAM3D reconstruction with fallback to stub.
-    """
-    inference = try_import_inference()
+def model_identity() -> str:
+    """Identity of the installed SAM3D checkpoint (hash of its pipeline config)."""
+    config = get_sam3d_config()
+    return hash_file(config) if config.exists() else "<missing>"
+
+
+def result_key(
+    ref_image_hash: str,
+    mask_bool: np.ndarray,
+    model_id: str,
+    crop: Optional[CropConfig],
+) -> str:
+    """Content address of one object's reconstruction."""
+    return ResultStore.make_key(
+        RESULT_KEY_VERSION,
+        ref_image_hash,
+        list(mask_bool.shape),
+        np.packbits(mask_bool).tobytes(),
+        SEED,
+        model_id,
+        asdict(crop) if crop else None,
+    )
 
-    if inference is None:
-        log.warning("SAM3D unavailable, falling back to stub")
-        return run_stub(env_name, objects)
 
-    # Real SAM3D path
-    ref_image_path = load_reference_image(env_name)
-    scene_objects = []
+class ObjectReconstructor:
+    """
+    Reconstructs objects of one environment one at a time.
 
-    for obj_name in objects:
-        slug = obj_name.lower().replace(" ", "_")
+    Checks the result store first and loads SAM3D lazily on the first miss,
+    so a fully cached environment never touches the model. Objects that miss
+    while SAM3D is unavailable are collected in stub_objects.
+    """
 
-        try:
-            mask_path = load_mask_path(env_name, slug)
-        except FileNotFoundError as e:
-            log.warning("Mask not found for '%s': %s; skipping", obj_name, e)
-            continue
+    def __init__(
+        self,
+        env_name: str,
+        crop: Optional[CropConfig] = None,
+        store: Optional[ResultStore] = None,
+        inference: Optional[Any] = None,
+    ):
+        self.env_name = env_name
+        self.crop = crop
+        self.store = store
+        self.inference = inference
+        self.model_tried = inference is not None
+        self.ref_image_path = load_reference_image(env_name)
+        self.ref_image_hash = hash_file(self.ref_image_path) if store else ""
+        self.model_id = model_identity() if store else ""
+        self.mesh_dir = ensure_mesh_dir(env_name)
+        self.stub_objects: List[str] = []
+
+    def ensure_model(self) -> Optional[Any]:
+        if not self.model_tried:
+            self.model_tried = True
+            self.inference = try_import_inference()
+            if self.inference is None:
+                log.warning("SAM3D unavailable, falling back to stub for cache misses")
+        return self.inference
+
+    def reconstruct(self, obj_name: str, mask_path: Optional[Path] = None) -> Optional[SceneObject]:
+        """Reconstruct (or fetch) one object; None if skipped or stubbed."""
+        slug = obj_name.lower().replace(" ", "_")
 
-        mesh_path = run_sam3d_for_object(
-            env_name, slug, ref_image_path, mask_path, inference
+        if mask_path is None:
+            try:
+                mask_path = load_mask_path(self.env_name, slug)
+            except FileNotFoundError as e:
+                if self.ensure_model() is None:
+                    # Stub contract: every requested object gets a placeholder
+                    self.stub_objects.append(obj_name)
+                    return None
+                log.warning("Mask not found for '%s': %s; skipping", obj_name, e)
+                return None
+
+        mask_bool = try_load_mask_bool(mask_path)
+        if mask_bool is None:
+            # Placeholder mask: nothing to reconstruct or cache, stub it
+            self.stub_objects.append(obj_name)
+            return None
+
+        key = None
+        if self.store is not None:
+            key = result_key(self.ref_image_hash, mask_bool, self.model_id, self.crop)
+            meta = self.store.fetch(key, self.mesh_dir / f"{slug}.ply")
+            if meta is not None:
+                return SceneObject(
+                    name=obj_name,
+                    mesh_path=str(self.mesh_dir / f"{slug}.ply"),
+                    mask_path=str(mask_path),
+                    crop=meta.get("crop"),
+                )
+
+        inference = self.ensure_model()
+        if inference is None:
+            self.stub_objects.append(obj_name)
+            return None
+
+        mesh_path, transform = run_sam3d_for_object(
+            self.env_name, slug, self.ref_image_path, mask_path, inference, crop=self.crop
         )
+        crop_meta = asdict(transform) if transform else None
+        if self.store is not None and key is not None and is_real_splat(mesh_path):
+            self.store.put(key, mesh_path, {"object": slug, "crop": crop_meta})
 
-        scene_objects.append(SceneObject(
+        return SceneObject(
             name=obj_name,
             mesh_path=str(mesh_path),
             mask_path=str(mask_path),
             location=[0.0, 0.0, 0.0],
             rotation_euler=[0.0, 0.0, 0.0],
             scale=[1.0, 1.0, 1.0],
-        ))
+            crop=crop_meta,
+        )
 
-    return scene_objects
+    def collect(self, objects: List[str], results: dict[str, SceneObject]) -> List[SceneObject]:
+        """Stub any pending objects and return results in requested order."""
+        if self.stub_objects:
+            for obj in run_stub(self.env_name, self.stub_objects):
+                results[obj.name] = obj
+            self.stub_objects = []
+        return [results[o] for o in objects if o in results]
+
+
+# ============================================================================
+# WORKER POOL
+# ============================================================================
+
+# Per-process reconstructor, created once by the pool initializer
+_worker_reconstructor: Optional[ObjectReconstructor] = None
+
+
+def cpu_budget() -> int:
+    """Total CPUs this stage may use (set by run_pipeline.py, else all)."""
+    return int(os.getenv("K1_CPU_BUDGET") or os.cpu_count() or 1)
 
 
-def write_manifest(env_name: str, objects: List[SceneObject]) -> Path:
-    """Write scene manifest JSON file."""
+def limit_threads(threads: int) -> None:
+    """Pin BLAS/OpenMP/torch thread pools of this process to `threads`."""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except ImportError:
+        pass
+    except RuntimeError:
+        # interop threads can only be set before torch starts parallel work
+        pass
+
+
+def _init_worker(
+    env_name: str,
+    crop: Optional[CropConfig],
+    store_root: Optional[str],
+    threads: int,
+) -> None:
+    global _worker_reconstructor
+    limit_threads(threads)
+    store = ResultStore(Path(store_root)) if store_root else None
+    _worker_reconstructor = ObjectReconstructor(env_name, crop=crop, store=store)
+
+
+def _reconstruct_in_worker(
+    obj_name: str,
+) -> tuple[str, Optional[SceneObject], bool, list[dict]]:
+    """Returns (obj_name, scene_object, needs_stub, spans recorded for this object)."""
+    reconstructor = _worker_reconstructor
+    assert reconstructor is not None, "worker not initialised"
+    start = len(events())
+    scene_object = reconstructor.reconstruct(obj_name)
+    needs_stub = obj_name in reconstructor.stub_objects
+    reconstructor.stub_objects.clear()
+    return obj_name, scene_object, needs_stub, events()[start:]
+
+
+def run_worker_pool(
+    env_name: str,
+    objects: List[str],
+    workers: int,
+    threads_per_worker: Optional[int] = None,
+    crop: Optional[CropConfig] = None,
+    store: Optional[ResultStore] = None,
+) -> List[SceneObject]:
+    """Reconstruct objects across a process pool; one model per worker."""
+    workers = max(1, min(workers, len(objects)))
+    threads = threads_per_worker or max(1, cpu_budget() // workers)
+    log.info("Reconstructing %d objects on %d workers x %d threads",
+             len(objects), workers, threads)
+
+    results: dict[str, SceneObject] = {}
+    stub_objects: List[str] = []
+    # spawn: forking a process that may already hold torch state is unsafe
+    ctx = mp.get_context("spawn")
+    with span("worker_pool", workers=workers, threads=threads):
+        with ctx.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(env_name, crop, str(store.root) if store else None, threads),
+        ) as pool:
+            # chunksize=1: objects are few and expensive; pull one at a time
+            for obj_name, scene_object, needs_stub, spans in pool.imap_unordered(
+                _reconstruct_in_worker, objects, chunksize=1
+            ):
+                extend(spans)
+                if scene_object is not None:
+                    results[obj_name] = scene_object
+                elif needs_stub:
+                    stub_objects.append(obj_name)
+
+    if stub_objects:
+        for obj in run_stub(env_name, [o for o in objects if o in stub_objects]):
+            results[obj.name] = obj
+    return [results[o] for o in objects if o in results]
+
+
+# ============================================================================
+# MAIN BACKEND
+# ============================================================================
+
+def run_sam3d_backend(
+    env_name: str,
+    objects: List[str],
+    crop: Optional[CropConfig] = None,
+    store: Optional[ResultStore] = None,
+    workers: int = 1,
+    threads_per_worker: Optional[int] = None,
+) -> List[SceneObject]:
+    """
+    Run SAM3D reconstruction with fallback to stub.
+
+    With a ResultStore, cached objects are linked in without loading the
+    model; SAM3D is only initialised on the first cache miss. With
+    workers > 1, objects are spread across a process pool.
+    """
+    if store is not None and not sam3d_installed():
+        # Only real splats are ever stored, so nothing can hit without a checkpoint
+        log.warning("SAM3D not installed; skipping the result store")
+        store = None
+
+    if workers > 1 and len(objects) > 1:
+        return run_worker_pool(
+            env_name, objects, workers, threads_per_worker, crop=crop, store=store
+        )
+
+    inference = None  # loaded lazily on first miss
+    if store is None:
+        inference = try_import_inference()
+        if inference is None:
+            log.warning("SAM3D unavailable, falling back to stub")
+            return run_stub(env_name, objects)
+
+    # Real SAM3D path
+    reconstructor = ObjectReconstructor(env_name, crop=crop, store=store, inference=inference)
+    results: dict[str, SceneObject] = {}
+
+    for obj_name in objects:
+        scene_object = reconstructor.reconstruct(obj_name)
+        if scene_object is not None:
+            results[obj_name] = scene_object
+
+    # Keep manifest order identical to the requested object order
+    return reconstructor.collect(objects, results)
+
+
+def is_real_splat(path: Path) -> bool:
+    """True if path is a PLY written by SAM3D (not a text placeholder)."""
+    try:
+        with path.open("rb") as f:
+            return f.read(4) == b"ply\n"
+    except FileNotFoundError:
+        return False
+
+
+def write_manifest(env_name: str, objects: List[SceneObject], merge: bool = False) -> Path:
+    """
+    Write the scene manifest (v2, see scene_manifest.py).
+
+    merge=True updates only these objects and keeps the manifest's others.
+    """
     root = get_project_root()
 
     try:
@@ -353,22 +752,93 @@ def write_manifest(env_name: str, objects: List[SceneObject]) -> Path:
     except FileNotFoundError:
         ref_image_path = root / "assets" / "reference" / f"{env_name}.jpg"
 
-    manifest = {
-        "env_name": env_name,
-        "reference_image": str(ref_image_path),
-        "objects": [asdict(o) for o in objects],
-        "notes": "Generated by sam3d_reconstruct.py. Transforms are placeholders.",
-    }
-
-    manifest_dir = root / "manifests"
-    manifest_dir.mkdir(exist_ok=True)
-    manifest_path = manifest_dir / f"{env_name}_manifest.json"
-    manifest_path.write_text(json.dumps(manifest, indent=2))
+    # Replace identity transforms with mask-based estimates where possible
+    with span("placement"):
+        placements = place_objects(env_name, [(o.name, Path(o.mask_path)) for o in objects])
+    for obj, placed in zip(objects, placements):
+        if placed is not None:
+            obj.location = placed.location
+            obj.rotation_euler = placed.rotation_euler
+            obj.scale = placed.scale
+            obj.placement = placed.details()
+    n_placed = sum(p is not None for p in placements)
+
+    notes = (
+        f"Generated by sam3d_reconstruct.py. Transforms of {n_placed}/{len(objects)} "
+        "objects estimated from masks by placement.py; the rest are placeholders."
+    )
+    with span("manifest_write"):
+        manifest_path, _ = scene_manifest.write_manifest(
+            env_name,
+            ref_image_path,
+            [asdict(o) for o in objects],
+            notes,
+            merge=merge,
+        )
 
     log.info("Wrote manifest: %s", manifest_path)
     return manifest_path
 
 
+def run_stage(
+    env_name: str,
+    objects: List[str],
+    force: bool = False,
+    crop: Optional[CropConfig] = None,
+    use_result_cache: bool = True,
+    workers: int = 1,
+    threads_per_worker: Optional[int] = None,
+    merge: bool = False,
+) -> None:
+    """Cache-aware reconstruction + manifest for one environment."""
+    # Skip if reference, masks, checkpoint and code are unchanged
+    cache = StageCache(
+        "sam3d_reconstruct",
+        ensure_mesh_dir(env_name) / ".sam3d_reconstruct.stamp.json",
+    )
+    mask_dir = get_project_root() / "assets" / "masks" / env_name
+    try:
+        ref_image_path = load_reference_image(env_name)
+    except FileNotFoundError:
+        ref_image_path = get_project_root() / "assets" / "reference" / f"{env_name}.jpg"
+    with span("cache_check"):
+        fingerprint = cache.fingerprint(
+            files=[ref_image_path, get_sam3d_config()] + [
+                mask_dir / f"{o.lower().replace(' ', '_')}.png" for o in objects
+            ],
+            params={
+                "objects": objects,
+                "seed": SEED,
+                "crop": asdict(crop) if crop else None,
+                "camera": load_camera_config(env_name),
+                "placement": load_placement_config(env_name),
+                "merge": merge,
+            },
+            code=[Path(__file__), Path(__file__).with_name("placement.py")],
+        )
+        if not force and cache.is_fresh(fingerprint):
+            return
+
+    # Run reconstruction
+    store = ResultStore(default_store_root()) if use_result_cache else None
+    scene_objects = run_sam3d_backend(
+        env_name,
+        objects,
+        crop=crop,
+        store=store,
+        workers=workers,
+        threads_per_worker=threads_per_worker,
+    )
+
+    # Write manifest
+    manifest_path = write_manifest(env_name, scene_objects, merge=merge)
+
+    # Only stamp real splats; stub OBJs and failure placeholders must be retried
+    mesh_paths = [Path(o.mesh_path) for o in scene_objects]
+    if mesh_paths and all(is_real_splat(p) for p in mesh_paths):
+        cache.commit(fingerprint, mesh_paths + [manifest_path])
+
+
 # ============================================================================
 # MAIN CLI
 # ============================================================================
@@ -387,13 +857,67 @@ def main() -> None:
         required=True,
         help="Object names matching mask files (e.g., gaming_chair desk_surface)"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run even if the stage cache says meshes are up to date",
+    )
+    parser.add_argument(
+        "--crop",
+        action="store_true",
+        help="Crop each image/mask pair to the padded mask bbox before inference",
+    )
+    parser.add_argument(
+        "--crop-padding",
+        type=float,
+        default=CropConfig.padding,
+        help="Bbox padding as a fraction of its size (default: 0.1)",
+    )
+    parser.add_argument(
+        "--crop-size",
+        type=int,
+        default=CropConfig.working_size,
+        help="Longest side of the cropped model input in pixels (default: 1024)",
+    )
+    parser.add_argument(
+        "--no-result-cache",
+        action="store_true",
+        help="Always run inference; do not read or write the per-object result store",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Reconstruct objects in N processes, each with its own model (default: 1)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="Torch threads per worker (default: CPU budget / workers)",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Update only these objects in the manifest; keep its other objects",
+    )
     args = parser.parse_args()
 
-    # Run reconstruction
-    scene_objects = run_sam3d_backend(args.env_name, args.objects)
+    crop = CropConfig(args.crop_padding, args.crop_size) if args.crop else None
 
-    # Write manifest
-    write_manifest(args.env_name, scene_objects)
+    try:
+        run_stage(
+            args.env_name,
+            args.objects,
+            args.force,
+            crop=crop,
+            use_result_cache=not args.no_result_cache,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+            merge=args.merge,
+        )
+    finally:
+        finish("sam3d_reconstruct", args.env_name)
 
 
 if __name__ == "__main__":
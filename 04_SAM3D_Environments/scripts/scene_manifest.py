@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+scene_manifest.py
+
+Read/write scene manifests (manifests/ENV_NAME_manifest.json).
+
+Format v2:
+  - "manifest_version": 2 and "root": ".." (project root, relative to the
+    manifest file); every path is POSIX and relative to that root, so the
+    same manifest works on any machine or checkout
+  - per-object "mesh_sha256" / "mask_sha256" content hashes, so loaders can
+    tell exactly which objects need re-importing
+  - merge mode updates only the named objects and keeps the rest; the file
+    is rewritten only when its content actually changes
+
+v1 manifests (absolute paths, no hashes) are still readable; absolute paths
+from another machine are re-rooted at their "assets/" component.
+
+Usage:
+  from scene_manifest import load_manifest, write_manifest
+  manifest = load_manifest(path)            # paths resolved to absolute
+  write_manifest(env_name, ref_image, objects, notes, merge=True)
+
+CLI:
+  python scripts/scene_manifest.py migrate ENV_NAME [ENV_NAME ...] | --all
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path, PurePosixPath
+from typing import Any, Iterable, Optional
+
+from stage_cache import hash_file
+
+log = logging.getLogger("scene_manifest")
+
+MANIFEST_VERSION = 2
+PATH_KEYS = ("mesh_path", "mask_path")
+HASH_KEYS = {"mesh_path": "mesh_sha256", "mask_path": "mask_sha256"}
+
+
+# ============================================================================
+# PATHS
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def manifest_path(env_name: str) -> Path:
+    return get_project_root() / "manifests" / f"{env_name}_manifest.json"
+
+
+def manifest_root(path: Path, manifest: dict) -> Path:
+    """Directory that a manifest's relative paths are relative to."""
+    return (path.parent / manifest.get("root", "..")).resolve()
+
+
+def to_relative(path: Any, root: Path) -> str:
+    """POSIX path relative to root; paths outside root stay absolute."""
+    p = Path(path)
+    if not p.is_absolute():
+        return PurePosixPath(*p.parts).as_posix()
+    try:
+        return p.resolve().relative_to(root).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+def resolve(path: str, root: Path) -> Path:
+    """
+    Absolute path for a manifest entry.
+
+    Relative entries join root. Absolute entries that do not exist here (v1
+    manifests written on another machine) are re-rooted at "assets/".
+    """
+    p = Path(path)
+    if not p.is_absolute():
+        return root / PurePosixPath(path)
+    if not p.exists() and "assets" in p.parts:
+        tail = p.parts[p.parts.index("assets"):]
+        return root.joinpath(*tail)
+    return p
+
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def read_raw(path: Path) -> Optional[dict]:
+    """Parsed manifest as stored, or None if missing/unreadable."""
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_manifest(path: Path) -> dict:
+    """
+    Load a v1 or v2 manifest with every path resolved to an absolute string.
+
+    Raises FileNotFoundError / json.JSONDecodeError like json.loads(read_text()).
+    """
+    path = Path(path)
+    manifest = json.loads(path.read_text())
+    root = manifest_root(path, manifest)
+    if manifest.get("reference_image"):
+        manifest["reference_image"] = str(resolve(manifest["reference_image"], root))
+    for obj in manifest.get("objects", []):
+        for key in PATH_KEYS:
+            if obj.get(key):
+                obj[key] = str(resolve(obj[key], root))
+    return manifest
+
+
+# ============================================================================
+# WRITE
+# ============================================================================
+
+def file_digest(path: Path) -> Optional[str]:
+    return hash_file(path) if path.is_file() else None
+
+
+def to_entry(obj: dict, root: Path) -> dict:
+    """v2 object entry: relative paths followed by their content hashes."""
+    entry = {}
+    for key, value in obj.items():
+        if key in HASH_KEYS.values():
+            continue
+        if key in PATH_KEYS and value:
+            abs_path = resolve(str(value), root)
+            entry[key] = to_relative(abs_path, root)
+            entry[HASH_KEYS[key]] = file_digest(abs_path)
+        else:
+            entry[key] = value
+    return entry
+
+
+def write_manifest(
+    env_name: str,
+    reference_image: Path,
+    objects: Iterable[dict],
+    notes: str,
+    merge: bool = False,
+    path: Optional[Path] = None,
+) -> tuple[Path, list[str]]:
+    """
+    Write a v2 manifest; returns (path, names of objects added/changed/removed).
+
+    merge=False replaces the object list with `objects`. merge=True updates
+    only those objects (by name) and keeps every other existing entry in
+    place. The file is left untouched when nothing changed, so its mtime
+    only moves on real updates.
+    """
+    path = path or manifest_path(env_name)
+    root = get_project_root()
+    existing = read_raw(path)
+
+    old_entries: dict[str, dict] = {}
+    order: list[str] = []
+    if existing is not None:
+        old_root = manifest_root(path, existing)
+        for obj in existing.get("objects", []):
+            old = dict(obj)
+            for key in PATH_KEYS:
+                if old.get(key):
+                    old[key] = to_relative(resolve(old[key], old_root), root)
+            old_entries[obj["name"]] = old
+            if merge:
+                order.append(obj["name"])
+
+    new_entries = {}
+    for obj in objects:
+        new_entries[obj["name"]] = to_entry(obj, root)
+        if obj["name"] not in order:
+            order.append(obj["name"])
+
+    entries = [new_entries.get(name) or old_entries[name] for name in order]
+    changed = [
+        name for name, entry in new_entries.items()
+        if old_entries.get(name) != entry
+    ] + [name for name in old_entries if name not in order]
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "env_name": env_name,
+        "root": os.path.relpath(root, path.parent.resolve()).replace(os.sep, "/"),
+        "reference_image": to_relative(reference_image, root),
+        "objects": entries,
+        "notes": notes,
+    }
+    text = json.dumps(manifest, indent=2) + "\n"
+    if existing is not None and path.read_text() == text:
+        log.info("Manifest unchanged: %s", path)
+        return path, []
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+    if changed:
+        log.info("Manifest objects changed: %s", ", ".join(changed))
+    return path, changed
+
+
+def migrate(path: Path) -> list[str]:
+    """Rewrite a manifest (v1 or v2) as v2 in place."""
+    manifest = load_manifest(path)
+    notes = manifest.get("notes", "")
+    _, changed = write_manifest(
+        manifest["env_name"],
+        Path(manifest["reference_image"]),
+        manifest["objects"],
+        notes,
+        path=path,
+    )
+    return changed
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[MANIFEST] %(message)s")
+    parser = argparse.ArgumentParser(description="Scene manifest tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    mig = sub.add_parser("migrate", help="Rewrite manifests in the v2 format")
+    mig.add_argument("env_names", nargs="*")
+    mig.add_argument("--all", action="store_true", help="Every manifests/*_manifest.json")
+    args = parser.parse_args()
+
+    if args.all:
+        paths = sorted((get_project_root() / "manifests").glob("*_manifest.json"))
+    else:
+        paths = [manifest_path(name) for name in args.env_names]
+    if not paths:
+        parser.error("give ENV_NAMEs or --all")
+
+    for path in paths:
+        migrate(path)
+        log.info("Migrated %s", path)
+
+
+if __name__ == "__main__":
+    main()
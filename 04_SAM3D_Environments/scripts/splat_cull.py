@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+splat_cull.py
+
+Cull floaters and background splats from SAM3D reconstructions.
+
+Per object:
+  1. Pose the unit-cube splat the way Blender places its converted OBJ (the
+     importer's Y-up -> Z-up swap, then the manifest location, rotation and
+     scale solved by placement.py) and project it through the reference
+     camera (camera.py)
+  2. Drop splats behind the camera, outside the image, or outside the
+     object's mask dilated by --dilate pixels
+  3. Drop near-transparent splats (--min-opacity)
+  4. Voxel-downsample to --voxel-size, keeping the most opaque splat per voxel
+
+All steps are vectorized over the whole splat array. Output is written beside
+the input as <name>.culled.ply (compact again if the input was compact);
+the reconstruct stage's <name>.ply and the result store are never modified.
+splat_to_mesh.py prefers the culled file when it exists. Objects without a
+placement (identity transform) have no pose to project with and are left
+uncut, as is any object whose posed splat mostly misses its mask.
+
+Usage:
+  python scripts/splat_cull.py ENV_NAME [--dilate 8] [--voxel-size 0.005]
+"""
+
+import argparse
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from camera import (
+    CameraIntrinsics,
+    CameraPose,
+    intrinsics_from_config,
+    load_camera_config,
+    pose_from_config,
+)
+from pipeline_trace import finish, span
+from scene_manifest import load_manifest, manifest_path
+from splat_io import (
+    COMPACT_COMMENT,
+    culled_path,
+    is_splat_file,
+    read_header,
+    read_ply,
+    write_compact_ply,
+    write_ply,
+)
+from stage_cache import StageCache
+
+log = logging.getLogger("splat_cull")
+logging.basicConfig(level=logging.INFO, format="[CULL] %(message)s")
+
+DEFAULT_DILATE_PX = 8
+DEFAULT_MIN_OPACITY = 0.05
+# Below this fraction inside the mask the pose (or camera) is wrong, not the splat
+MIN_INSIDE_FRACTION = 0.25
+
+# wm.obj_import's default axes (forward -Z, up Y): OBJ (x, y, z) -> Blender (x, -z, y)
+OBJ_TO_BLENDER = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, -1.0], [0.0, 1.0, 0.0]])
+
+
+@dataclass
+class CullConfig:
+    dilate: int = DEFAULT_DILATE_PX
+    min_opacity: float = DEFAULT_MIN_OPACITY
+    voxel_size: Optional[float] = None  # None = no downsampling
+
+
+@dataclass
+class CullReport:
+    name: str
+    points_in: int
+    points_out: int
+    bytes_in: int
+    bytes_out: int
+    outside_mask: int
+    transparent: int
+    merged: int
+
+    @property
+    def points_removed(self) -> int:
+        return self.points_in - self.points_out
+
+    @property
+    def bytes_removed(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+
+# ============================================================================
+# POSE
+# ============================================================================
+
+def euler_matrix(rotation_euler: list[float]) -> np.ndarray:
+    """Blender XYZ Euler angles -> 3x3 rotation (applied X, then Y, then Z)."""
+    cx, cy, cz = np.cos(rotation_euler)
+    sx, sy, sz = np.sin(rotation_euler)
+    rx = np.array([[1.0, 0.0, 0.0], [0.0, cx, -sx], [0.0, sx, cx]])
+    ry = np.array([[cy, 0.0, sy], [0.0, 1.0, 0.0], [-sy, 0.0, cy]])
+    rz = np.array([[cz, -sz, 0.0], [sz, cz, 0.0], [0.0, 0.0, 1.0]])
+    return rz @ ry @ rx
+
+
+def splat_to_camera(xyz: np.ndarray, obj: dict, pose: CameraPose) -> np.ndarray:
+    """Splat points -> OpenCV camera frame via the object's manifest transform."""
+    local = (xyz @ OBJ_TO_BLENDER.T) * np.asarray(obj["scale"], dtype=np.float64)
+    rotation = euler_matrix(obj["rotation_euler"])
+    world = local @ rotation.T + np.asarray(obj["location"], dtype=np.float64)
+    return pose.world_to_camera(world)
+
+
+# ============================================================================
+# MASK TEST
+# ============================================================================
+
+def dilate_mask(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Square dilation via a summed-area table (O(pixels), no SciPy needed)."""
+    if radius <= 0:
+        return mask
+    h, w = mask.shape
+    sat = np.zeros((h + 1, w + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=sat[1:, 1:])
+
+    y0 = np.clip(np.arange(h) - radius, 0, h)
+    y1 = np.clip(np.arange(h) + radius + 1, 0, h)
+    x0 = np.clip(np.arange(w) - radius, 0, w)
+    x1 = np.clip(np.arange(w) + radius + 1, 0, w)
+    box = (
+        sat[y1][:, x1] - sat[y0][:, x1] - sat[y1][:, x0] + sat[y0][:, x0]
+    )
+    return box > 0
+
+
+def inside_mask(
+    xyz: np.ndarray,
+    mask: np.ndarray,
+    camera: CameraIntrinsics,
+) -> np.ndarray:
+    """Boolean keep-array: camera-frame point projects in front of the camera into the mask."""
+    u, v, z = camera.project(xyz)
+    h, w = mask.shape
+    valid = (z > 0) & (u >= 0) & (u < w) & (v >= 0) & (v < h)
+    keep = np.zeros(len(xyz), dtype=bool)
+    iu = u[valid].astype(np.int64)
+    iv = v[valid].astype(np.int64)
+    keep[valid] = mask[iv, iu]
+    return keep
+
+
+# ============================================================================
+# DOWNSAMPLING
+# ============================================================================
+
+def voxel_select(xyz: np.ndarray, score: np.ndarray, voxel: float) -> np.ndarray:
+    """Indices of the highest-scoring point in each occupied voxel."""
+    ijk = np.floor((xyz - xyz.min(axis=0)) / voxel).astype(np.int64)
+    keys = np.ravel_multi_index(ijk.T, ijk.max(axis=0) + 1)
+    # Sort by voxel, then by descending score; first of each run wins
+    order = np.lexsort((-score, keys))
+    _, first = np.unique(keys[order], return_index=True)
+    return np.sort(order[first])
+
+
+# ============================================================================
+# PER-OBJECT CULL
+# ============================================================================
+
+def is_compact(path: Path) -> bool:
+    with path.open("rb") as f:
+        _, _, comments = read_header(f)
+    return COMPACT_COMMENT in comments
+
+
+def cull_splat(
+    name: str,
+    splat_path: Path,
+    mask_path: Path,
+    config: CullConfig,
+    camera_config: dict,
+    obj: dict,
+) -> CullReport:
+    """Cull one splat PLY, posed by its manifest entry `obj`, and write <name>.culled.ply."""
+    with span("splat_read", obj=name):
+        data = read_ply(splat_path)
+    xyz = np.stack([data["x"], data["y"], data["z"]], axis=1).astype(np.float64)
+
+    with span("mask_project", obj=name):
+        mask = np.array(Image.open(mask_path).convert("L")) > 127
+        mask = dilate_mask(mask, config.dilate)
+        h, w = mask.shape
+        camera = intrinsics_from_config(camera_config, w, h)
+        points = splat_to_camera(xyz, obj, pose_from_config(camera_config))
+        keep = inside_mask(points, mask, camera)
+    outside = int(len(keep) - keep.sum())
+
+    out = culled_path(splat_path)
+    if keep.sum() < MIN_INSIDE_FRACTION * len(keep):
+        log.warning(
+            "%s: only %.1f%% of splats land in the mask; check the camera config "
+            "and placement. Keeping original.", name, 100.0 * keep.mean() if len(keep) else 0.0,
+        )
+        out.unlink(missing_ok=True)
+        return CullReport(name, len(data), len(data), 0, 0, 0, 0, 0)
+
+    transparent = 0
+    if config.min_opacity > 0 and "opacity" in data.dtype.names:
+        alpha = 1.0 / (1.0 + np.exp(-data["opacity"].astype(np.float64)))
+        opaque = alpha >= config.min_opacity
+        transparent = int((keep & ~opaque).sum())
+        keep &= opaque
+
+    idx = np.flatnonzero(keep)
+    merged = 0
+    if config.voxel_size and len(idx):
+        with span("voxel_select", obj=name):
+            score = data["opacity"][idx] if "opacity" in data.dtype.names else np.zeros(len(idx))
+            chosen = voxel_select(xyz[idx], score.astype(np.float64), config.voxel_size)
+        merged = len(idx) - len(chosen)
+        idx = idx[chosen]
+
+    if len(idx) == 0:
+        # Usually a wrong "camera" block; keep the uncut splat in use
+        log.warning("%s: every splat culled; check the camera config. Keeping original.", name)
+        out.unlink(missing_ok=True)
+        return CullReport(name, len(data), len(data), 0, 0, outside, transparent, 0)
+
+    tmp = out.with_name(f".{out.name}.tmp{os.getpid()}")
+    with span("ply_write", obj=name):
+        if is_compact(splat_path):
+            write_compact_ply(tmp, data[idx])
+        else:
+            write_ply(tmp, data[idx])
+        os.replace(tmp, out)
+
+    report = CullReport(
+        name=name,
+        points_in=len(data),
+        points_out=len(idx),
+        bytes_in=splat_path.stat().st_size,
+        bytes_out=out.stat().st_size,
+        outside_mask=outside,
+        transparent=transparent,
+        merged=merged,
+    )
+    log.info(
+        "%s: %d -> %d splats (-%d outside mask, -%d transparent, -%d merged), "
+        "%.1f -> %.1f MiB",
+        name, report.points_in, report.points_out, outside, transparent, merged,
+        report.bytes_in / 2**20, report.bytes_out / 2**20,
+    )
+    return report
+
+
+# ============================================================================
+# ENVIRONMENT STAGE
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def run_stage(env_name: str, config: CullConfig, force: bool = False) -> list[CullReport]:
+    """Cull every placed splat in the env manifest that has a mask."""
+    root = get_project_root()
+    manifest = load_manifest(manifest_path(env_name))
+    camera_config = load_camera_config(env_name)
+
+    jobs = []
+    for obj in manifest["objects"]:
+        splat = Path(obj["mesh_path"])
+        mask = Path(obj.get("mask_path") or root / "assets" / "masks" / env_name / f"{obj['name']}.png")
+        if not is_splat_file(splat):
+            continue
+        if obj.get("placement") is None:
+            log.info("Skipping %s: not placed, so its splat cannot be projected", obj["name"])
+            culled_path(splat).unlink(missing_ok=True)
+            continue
+        if not mask.exists():
+            log.warning("Skipping %s: mask not found (%s)", obj["name"], mask)
+            continue
+        jobs.append((obj, splat, mask))
+
+    if not jobs:
+        log.info("No splats to cull for '%s'", env_name)
+        return []
+
+    cache = StageCache(
+        "splat_cull",
+        root / "assets" / "meshes" / env_name / ".splat_cull.stamp.json",
+    )
+    with span("cache_check"):
+        fingerprint = cache.fingerprint(
+            files=[p for _, splat, mask in jobs for p in (splat, mask)],
+            params={
+                "dilate": config.dilate,
+                "min_opacity": config.min_opacity,
+                "voxel_size": config.voxel_size,
+                "camera": camera_config,
+                "poses": {
+                    obj["name"]: [obj["location"], obj["rotation_euler"], obj["scale"]]
+                    for obj, _, _ in jobs
+                },
+            },
+            code=[Path(__file__), Path(__file__).with_name("camera.py")],
+        )
+        if not force and cache.is_fresh(fingerprint):
+            return []
+
+    reports = [
+        cull_splat(obj["name"], splat, mask, config, camera_config, obj)
+        for obj, splat, mask in jobs
+    ]
+
+    points = sum(r.points_removed for r in reports)
+    nbytes = sum(r.bytes_removed for r in reports)
+    total = sum(r.points_in for r in reports)
+    log.info(
+        "Removed %d of %d splats (%.0f%%), %.1f MiB",
+        points, total, 100.0 * points / max(total, 1), nbytes / 2**20,
+    )
+    cache.commit(fingerprint, [culled_path(splat) for _, splat, _ in jobs])
+    return reports
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mask-frustum and voxel culling of splats")
+    parser.add_argument("env_name", help="Environment name (e.g., battlestation_batman)")
+    parser.add_argument(
+        "--dilate",
+        type=int,
+        default=DEFAULT_DILATE_PX,
+        help=f"Mask dilation radius in pixels (default: {DEFAULT_DILATE_PX})",
+    )
+    parser.add_argument(
+        "--min-opacity",
+        type=float,
+        default=DEFAULT_MIN_OPACITY,
+        help="Drop splats below this opacity (0 disables)",
+    )
+    parser.add_argument(
+        "--voxel-size",
+        type=float,
+        default=None,
+        help="Keep one splat per voxel of this size (scene units; default: off)",
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild even if inputs are unchanged")
+    args = parser.parse_args()
+
+    config = CullConfig(
+        dilate=args.dilate,
+        min_opacity=args.min_opacity,
+        voxel_size=args.voxel_size,
+    )
+    try:
+        run_stage(args.env_name, config, args.force)
+    finally:
+        finish("splat_cull", args.env_name)
+
+
+if __name__ == "__main__":
+    main()
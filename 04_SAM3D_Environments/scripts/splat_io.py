@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+splat_io.py
+
+Vectorized Gaussian-splat PLY I/O for SAM3D outputs.
+
+read_ply() parses the header, builds a NumPy structured dtype from the vertex
+properties and loads the whole body with a single np.fromfile call - no
+per-vertex Python parsing.
+
+write_compact_ply() writes a quantized variant that is still a valid PLY:
+  - x, y, z                 -> uint16 over the per-axis [min, max]
+  - f_dc_*, f_rest_*, opacity -> uint8 over the per-property [min, max]
+  - scale_*, rot_*          -> uint16 over the per-property [min, max]
+  - all-zero normals are dropped
+Ranges are stored as "comment k1_quant <prop> <min> <max>" header lines, and
+read_ply() dequantizes them back to float32 transparently.
+
+CLI:
+  python scripts/splat_io.py info assets/meshes/ENV/monitor.ply
+  python scripts/splat_io.py compact IN.ply OUT.ply [--position-error 1e-3]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import numpy as np
+
+PLY_TYPES = {
+    "char": "i1", "int8": "i1",
+    "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2",
+    "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4",
+    "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4",
+    "double": "f8", "float64": "f8",
+}
+NUMPY_TO_PLY = {
+    "i1": "char", "u1": "uchar", "i2": "short", "u2": "ushort",
+    "i4": "int", "u4": "uint", "f4": "float", "f8": "double",
+}
+FORMATS = {
+    "binary_little_endian": "<",
+    "binary_big_endian": ">",
+}
+QUANT_COMMENT = "k1_quant"
+COMPACT_COMMENT = "k1_compact 1"
+
+
+# ============================================================================
+# HEADER
+# ============================================================================
+
+def read_header(f: BinaryIO) -> tuple[np.dtype, int, list[str]]:
+    """
+    Parse a PLY header from f, leaving f at the start of the body.
+
+    Returns (vertex dtype, vertex count, comment lines). Only a single
+    'vertex' element with scalar properties is supported, which covers
+    Gaussian-splat files.
+    """
+    if f.readline().strip() != b"ply":
+        raise ValueError("not a PLY file")
+
+    byte_order = None
+    count = None
+    fields: list[tuple[str, str]] = []
+    comments: list[str] = []
+    element = None
+
+    while True:
+        raw = f.readline()
+        if not raw:
+            raise ValueError("unexpected EOF in PLY header")
+        line = raw.decode("ascii", errors="replace").strip()
+        if line == "end_header":
+            break
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "format":
+            if parts[1] not in FORMATS:
+                raise ValueError(f"unsupported PLY format: {parts[1]}")
+            byte_order = FORMATS[parts[1]]
+        elif parts[0] == "comment":
+            comments.append(line[len("comment "):])
+        elif parts[0] == "element":
+            element = parts[1]
+            if element != "vertex":
+                raise ValueError(f"unsupported PLY element: {element}")
+            count = int(parts[2])
+        elif parts[0] == "property":
+            if parts[1] == "list":
+                raise ValueError("list properties are not supported")
+            if element == "vertex":
+                fields.append((parts[2], PLY_TYPES[parts[1]]))
+
+    if byte_order is None or count is None:
+        raise ValueError("PLY header missing format or vertex element")
+
+    dtype = np.dtype([(name, byte_order + code) for name, code in fields])
+    return dtype, count, comments
+
+
+def is_splat_file(path: Path) -> bool:
+    """True for a PLY with a real header (not a text placeholder)."""
+    try:
+        with Path(path).open("rb") as f:
+            return Path(path).suffix.lower() == ".ply" and f.read(4) == b"ply\n"
+    except FileNotFoundError:
+        return False
+
+
+def culled_path(splat_path: Path) -> Path:
+    """assets/meshes/ENV/monitor.ply -> assets/meshes/ENV/monitor.culled.ply"""
+    return Path(splat_path).with_suffix(".culled.ply")
+
+
+def parse_quant_ranges(comments: list[str]) -> dict[str, tuple[float, float]]:
+    ranges = {}
+    for c in comments:
+        parts = c.split()
+        if len(parts) == 4 and parts[0] == QUANT_COMMENT:
+            ranges[parts[1]] = (float(parts[2]), float(parts[3]))
+    return ranges
+
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def read_ply(path: Path, dequantize: bool = True) -> np.ndarray:
+    """
+    Load a binary PLY vertex element into a structured array.
+
+    Compact (quantized) files are converted back to float32 fields unless
+    dequantize=False.
+    """
+    with Path(path).open("rb") as f:
+        dtype, count, comments = read_header(f)
+        data = np.fromfile(f, dtype=dtype, count=count)
+
+    if len(data) != count:
+        raise ValueError(f"{path}: expected {count} vertices, read {len(data)}")
+
+    ranges = parse_quant_ranges(comments)
+    if dequantize and ranges:
+        return dequantize_fields(data, ranges)
+    return data
+
+
+def dequantize_fields(data: np.ndarray, ranges: dict[str, tuple[float, float]]) -> np.ndarray:
+    """
+    Convert a compact array back to float32 fields.
+
+    Consecutive fields of the same storage type are decoded as one 2-D block
+    (one broadcast multiply-add per block instead of one pass per field).
+    """
+    names = data.dtype.names
+    n = len(data)
+    raw = np.ascontiguousarray(data).view(np.uint8).reshape(n, data.dtype.itemsize)
+    out = np.empty((n, len(names)), dtype=np.float32)
+
+    start = 0
+    while start < len(names):
+        field_dt = data.dtype[names[start]]
+        end = start + 1
+        quantized = names[start] in ranges
+        while (
+            end < len(names)
+            and data.dtype[names[end]] == field_dt
+            and (names[end] in ranges) == quantized
+        ):
+            end += 1
+
+        offset = data.dtype.fields[names[start]][1]
+        width = (end - start) * field_dt.itemsize
+        block = raw[:, offset:offset + width].copy().view(field_dt).reshape(n, end - start)
+
+        group = names[start:end]
+        if quantized:
+            levels = np.iinfo(field_dt).max
+            lo = np.array([ranges[g][0] for g in group], dtype=np.float32)
+            step = np.array([(ranges[g][1] - ranges[g][0]) / levels for g in group], dtype=np.float32)
+            out[:, start:end] = block * step + lo
+        else:
+            out[:, start:end] = block
+        start = end
+
+    return out.view([(name, "<f4") for name in names]).reshape(n)
+
+
+# ============================================================================
+# WRITE
+# ============================================================================
+
+def write_ply(path: Path, data: np.ndarray, comments: Optional[list[str]] = None) -> None:
+    """Write a structured array as a binary little-endian PLY vertex element."""
+    data = np.ascontiguousarray(data.astype(data.dtype.newbyteorder("<")))
+    lines = ["ply", "format binary_little_endian 1.0"]
+    lines += [f"comment {c}" for c in comments or []]
+    lines.append(f"element vertex {len(data)}")
+    for name in data.dtype.names:
+        code = data.dtype[name].str[1:]
+        lines.append(f"property {NUMPY_TO_PLY[code]} {name}")
+    lines.append("end_header")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        f.write(("\n".join(lines) + "\n").encode("ascii"))
+        data.tofile(f)
+
+
+def quant_bits(name: str) -> Optional[int]:
+    """Storage width for a splat property in the compact format."""
+    if name in ("x", "y", "z") or name.startswith(("scale_", "rot_")):
+        return 16
+    if name.startswith(("f_dc_", "f_rest_")) or name == "opacity":
+        return 8
+    return None
+
+
+def write_compact_ply(
+    path: Path,
+    data: np.ndarray,
+    position_error: Optional[float] = None,
+    sh_error: Optional[float] = None,
+) -> dict[str, float]:
+    """
+    Write a quantized splat PLY and return the max absolute error per field.
+
+    position_error / sh_error are upper bounds on the absolute error for
+    positions and SH/opacity; ValueError is raised if the fixed 16/8-bit
+    quantization cannot meet them for this data.
+    """
+    keep = [
+        n for n in data.dtype.names
+        if not (n in ("nx", "ny", "nz") and not np.any(data[n]))
+    ]
+    out_fields = []
+    comments = [COMPACT_COMMENT]
+    quantized = {}
+    errors: dict[str, float] = {}
+
+    for name in keep:
+        col = np.asarray(data[name], dtype=np.float64)
+        bits = quant_bits(name)
+        if bits is None:
+            out_fields.append((name, data.dtype[name].str))
+            quantized[name] = data[name]
+            continue
+
+        lo, hi = (float(col.min()), float(col.max())) if len(col) else (0.0, 0.0)
+        levels = (1 << bits) - 1
+        step = (hi - lo) / levels if hi > lo else 1.0
+        q = np.rint((col - lo) / step).astype(np.uint16 if bits == 16 else np.uint8)
+
+        # Worst case is half a step; report the exact error for this data
+        err = float(np.abs(lo + q.astype(np.float64) * step - col).max()) if len(col) else 0.0
+        errors[name] = err
+
+        bound = position_error if name in ("x", "y", "z") else sh_error if bits == 8 else None
+        if bound is not None and err > bound:
+            raise ValueError(
+                f"{name}: {bits}-bit quantization error {err:.3g} exceeds bound {bound:.3g}"
+            )
+
+        out_fields.append((name, "<u2" if bits == 16 else "u1"))
+        quantized[name] = q
+        comments.append(f"{QUANT_COMMENT} {name} {lo!r} {lo + step * levels!r}")
+
+    out = np.empty(len(data), dtype=out_fields)
+    for name in keep:
+        out[name] = quantized[name]
+    write_ply(path, out, comments)
+    return errors
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gaussian-splat PLY tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    info = sub.add_parser("info", help="Print vertex count, fields and size")
+    info.add_argument("path", type=Path)
+
+    compact = sub.add_parser("compact", help="Write a quantized compact PLY")
+    compact.add_argument("src", type=Path)
+    compact.add_argument("dst", type=Path)
+    compact.add_argument("--position-error", type=float, default=None,
+                         help="Max absolute position error (scene units)")
+    compact.add_argument("--sh-error", type=float, default=None,
+                         help="Max absolute SH/opacity error")
+    args = parser.parse_args()
+
+    if args.cmd == "info":
+        data = read_ply(args.path, dequantize=False)
+        print(f"{args.path}: {len(data)} splats, {args.path.stat().st_size / 2**20:.1f} MiB")
+        print("fields:", ", ".join(f"{n}:{data.dtype[n].str}" for n in data.dtype.names))
+        return
+
+    data = read_ply(args.src)
+    try:
+        errors = write_compact_ply(args.dst, data, args.position_error, args.sh_error)
+    except ValueError as e:
+        sys.exit(f"[SPLAT] {e}")
+    before, after = args.src.stat().st_size, args.dst.stat().st_size
+    print(f"[SPLAT] {args.src.name}: {before / 2**20:.1f} MiB -> {after / 2**20:.1f} MiB "
+          f"({after / max(before, 1):.0%})")
+    pos_err = max((errors.get(a, 0.0) for a in ("x", "y", "z")), default=0.0)
+    sh_err = max((v for k, v in errors.items() if quant_bits(k) == 8), default=0.0)
+    print(f"[SPLAT] max position error {pos_err:.3g}, max SH/opacity error {sh_err:.3g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+splat_to_mesh.py
+
+Convert SAM3D Gaussian-splat PLYs into lightweight surface meshes that
+build_environment_from_manifest.py can import.
+
+Per object:
+  1. Read splats with splat_io (one np.fromfile), drop near-transparent ones
+  2. Voxel-downsample to a point cloud (mean position/colour per voxel)
+  3. Extract the voxel boundary surface as a shared-vertex triangle mesh,
+     growing the voxel size until the mesh fits the triangle budget
+  4. Write OBJ with per-vertex colours (from the SH DC term)
+
+Objects are converted in parallel worker processes. The culled splat
+(<name>.culled.ply from splat_cull.py) is used when present. Each OBJ is
+written beside its splat (assets/meshes/ENV/<name>.obj); the manifest keeps
+pointing at the .ply and build_environment_from_manifest.py imports the OBJ
+instead.
+
+Usage:
+  python scripts/splat_to_mesh.py ENV_NAME [--triangles 50000] [--workers 4] [--force]
+"""
+
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from pipeline_trace import finish, span
+from scene_manifest import load_manifest, manifest_path
+from splat_io import culled_path, is_splat_file, read_ply
+from stage_cache import StageCache
+
+log = logging.getLogger("splat_to_mesh")
+logging.basicConfig(level=logging.INFO, format="[MESH] %(message)s")
+
+SH_C0 = 0.28209479177387814
+DEFAULT_TRIANGLES = 50_000
+DEFAULT_MIN_OPACITY = 0.1
+MAX_BUDGET_ITERATIONS = 8
+
+
+@dataclass
+class MeshResult:
+    name: str
+    splat_path: str
+    mesh_path: str
+    splats: int
+    points: int
+    triangles: int
+    voxel_size: float
+
+
+# ============================================================================
+# SPLATS -> POINT CLOUD
+# ============================================================================
+
+def splat_points(data: np.ndarray, min_opacity: float) -> tuple[np.ndarray, np.ndarray]:
+    """Return (N, 3) positions and (N, 3) RGB in [0, 1] of visible splats."""
+    xyz = np.stack([data["x"], data["y"], data["z"]], axis=1).astype(np.float64)
+
+    names = data.dtype.names
+    if all(f"f_dc_{i}" in names for i in range(3)):
+        dc = np.stack([data[f"f_dc_{i}"] for i in range(3)], axis=1)
+        rgb = np.clip(0.5 + SH_C0 * dc, 0.0, 1.0)
+    else:
+        rgb = np.full_like(xyz, 0.5)
+
+    if "opacity" in names:
+        alpha = 1.0 / (1.0 + np.exp(-data["opacity"].astype(np.float64)))
+        keep = alpha >= min_opacity
+        xyz, rgb = xyz[keep], rgb[keep]
+    return xyz, rgb
+
+
+def voxel_downsample(
+    xyz: np.ndarray,
+    rgb: np.ndarray,
+    voxel: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bucket points into voxels.
+
+    Returns (ijk, centroid, colour, origin): integer voxel coords of each
+    occupied voxel (offset by 1 so neighbours never go negative), mean
+    position and colour per voxel, and the grid origin.
+    """
+    lo = xyz.min(axis=0)
+    origin = lo - voxel
+    # Index from lo (not origin) so rounding can never reach the margin
+    ijk = np.floor((xyz - lo) / voxel).astype(np.int64) + 1
+    # 1-D keys: np.unique on scalars is far faster than on rows (axis=0)
+    dims = ijk.max(axis=0) + 2
+    keys, inverse, counts = np.unique(
+        np.ravel_multi_index(ijk.T, dims), return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    uniq = np.stack(np.unravel_index(keys, dims), axis=1)
+
+    centroid = np.empty((len(uniq), 3))
+    colour = np.empty((len(uniq), 3))
+    for axis in range(3):
+        centroid[:, axis] = np.bincount(inverse, weights=xyz[:, axis]) / counts
+        colour[:, axis] = np.bincount(inverse, weights=rgb[:, axis]) / counts
+    return uniq, centroid, colour, origin
+
+
+# ============================================================================
+# POINT CLOUD -> SURFACE MESH
+# ============================================================================
+
+def _corner_offsets(axis: int, positive: bool) -> np.ndarray:
+    """Four quad corners (in voxel-corner lattice units), wound outward."""
+    b, c = (axis + 1) % 3, (axis + 2) % 3
+    e = np.eye(3, dtype=np.int64)
+    base = e[axis] if positive else np.zeros(3, dtype=np.int64)
+    ring = [0 * e[b], e[b], e[b] + e[c], e[c]]
+    if not positive:
+        ring = [ring[0], ring[3], ring[2], ring[1]]
+    return np.stack([base + r for r in ring])
+
+
+def boundary_faces(ijk: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Quads between occupied and empty voxels, vectorized over all voxels.
+
+    Returns (corners, owner): (F, 4, 3) corner lattice coords and the index
+    of the occupied voxel each quad belongs to.
+    """
+    # voxel_downsample leaves a one-voxel margin, so ijk +/- 1 stays in range
+    dims = ijk.max(axis=0) + 2
+    occupied = np.sort(np.ravel_multi_index(ijk.T, dims))
+
+    corners, owners = [], []
+    for axis in range(3):
+        for positive in (True, False):
+            step = np.zeros(3, dtype=np.int64)
+            step[axis] = 1 if positive else -1
+            nbr = np.ravel_multi_index((ijk + step).T, dims)
+            pos = np.minimum(np.searchsorted(occupied, nbr), len(occupied) - 1)
+            idx = np.flatnonzero(occupied[pos] != nbr)
+            corners.append(ijk[idx, None, :] + _corner_offsets(axis, positive)[None])
+            owners.append(idx)
+    return np.concatenate(corners), np.concatenate(owners)
+
+
+def voxel_surface(
+    ijk: np.ndarray,
+    colour: np.ndarray,
+    origin: np.ndarray,
+    voxel: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Shared-vertex triangle mesh of the voxel boundary: (verts, colours, tris)."""
+    corners, owner = boundary_faces(ijk)
+    dims = ijk.max(axis=0) + 3
+    keys, vert_index = np.unique(
+        np.ravel_multi_index(corners.reshape(-1, 3).T, dims), return_inverse=True
+    )
+    lattice = np.stack(np.unravel_index(keys, dims), axis=1)
+    vert_index = vert_index.reshape(-1, 4)
+
+    verts = origin + lattice.astype(np.float64) * voxel
+
+    # Vertex colour = mean colour of the voxels whose faces touch it
+    weights = np.repeat(colour[owner], 4, axis=0)
+    counts = np.bincount(vert_index.reshape(-1), minlength=len(verts))
+    vcol = np.empty((len(verts), 3))
+    for axis in range(3):
+        vcol[:, axis] = np.bincount(
+            vert_index.reshape(-1), weights=weights[:, axis], minlength=len(verts)
+        ) / np.maximum(counts, 1)
+
+    tris = np.concatenate([vert_index[:, [0, 1, 2]], vert_index[:, [0, 2, 3]]])
+    return verts, vcol, tris
+
+
+def mesh_within_budget(
+    xyz: np.ndarray,
+    rgb: np.ndarray,
+    triangles: int,
+    voxel: Optional[float] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, int, float]:
+    """
+    Voxelize and mesh, enlarging the voxel until the mesh has at most
+    `triangles` triangles. Returns (verts, colours, tris, points, voxel).
+    """
+    extent = float(np.ptp(xyz, axis=0).max()) or 1.0
+    voxel = voxel or extent / 128.0
+
+    for _ in range(MAX_BUDGET_ITERATIONS):
+        ijk, centroid, colour, origin = voxel_downsample(xyz, rgb, voxel)
+        verts, vcol, tris = voxel_surface(ijk, colour, origin, voxel)
+        if len(tris) <= triangles:
+            return verts, vcol, tris, len(centroid), voxel
+        # Surface area scales with 1/voxel^2
+        voxel *= float(np.sqrt(len(tris) / triangles)) * 1.05
+
+    log.warning("Triangle budget not met after %d iterations (%d > %d)",
+                MAX_BUDGET_ITERATIONS, len(tris), triangles)
+    return verts, vcol, tris, len(centroid), voxel
+
+
+# ============================================================================
+# OBJ OUTPUT
+# ============================================================================
+
+def write_obj(path: Path, verts: np.ndarray, vcol: np.ndarray, tris: np.ndarray) -> None:
+    """Write OBJ with 'v x y z r g b' vertex colours (Blender imports these)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".obj.tmp")
+    with tmp.open("w") as f:
+        f.write("# Converted from Gaussian splats by splat_to_mesh.py\n")
+        f.write(f"o {path.stem}\n")
+        np.savetxt(f, np.hstack([verts, vcol]), fmt="v %.6f %.6f %.6f %.4f %.4f %.4f")
+        np.savetxt(f, tris + 1, fmt="f %d %d %d")
+    os.replace(tmp, path)
+
+
+# ============================================================================
+# PER-OBJECT CONVERSION
+# ============================================================================
+
+def convert_splat(
+    name: str,
+    splat_path: Path,
+    mesh_path: Path,
+    triangles: int = DEFAULT_TRIANGLES,
+    min_opacity: float = DEFAULT_MIN_OPACITY,
+    voxel: Optional[float] = None,
+) -> MeshResult:
+    """Convert one splat PLY to an OBJ at mesh_path."""
+    with span("splat_read", obj=name):
+        data = read_ply(splat_path)
+    with span("splat_filter", obj=name):
+        xyz, rgb = splat_points(data, min_opacity)
+    if len(xyz) == 0:
+        raise ValueError(f"{splat_path}: no splats above opacity {min_opacity}")
+
+    with span("voxel_mesh", obj=name):
+        verts, vcol, tris, points, voxel = mesh_within_budget(xyz, rgb, triangles, voxel)
+
+    with span("obj_write", obj=name):
+        write_obj(mesh_path, verts, vcol, tris)
+
+    log.info("%s: %d splats -> %d points -> %d triangles (voxel %.4g)",
+             name, len(data), points, len(tris), voxel)
+    return MeshResult(
+        name=name,
+        splat_path=str(splat_path),
+        mesh_path=str(mesh_path),
+        splats=len(data),
+        points=points,
+        triangles=len(tris),
+        voxel_size=voxel,
+    )
+
+
+# ============================================================================
+# ENVIRONMENT STAGE
+# ============================================================================
+
+def get_project_root() -> Path:
+    """Return 04_SAM3D_Environments/ root directory."""
+    return Path(__file__).resolve().parents[1]
+
+
+def manifest_splats(env_name: str) -> list[tuple[str, Path, Path]]:
+    """
+    (object name, source splat, output OBJ) for every real splat in the env
+    manifest. The culled splat (splat_cull.py) is used when present.
+    """
+    manifest = load_manifest(manifest_path(env_name))
+
+    jobs = []
+    for obj in manifest["objects"]:
+        path = Path(obj["mesh_path"])
+        if is_splat_file(path):
+            culled = culled_path(path)
+            source = culled if is_splat_file(culled) else path
+            jobs.append((obj["name"], source, path.with_suffix(".obj")))
+        elif path.suffix.lower() == ".ply":
+            log.warning("Skipping %s: not a splat PLY (placeholder?)", path)
+    return jobs
+
+
+def run_stage(
+    env_name: str,
+    triangles: int = DEFAULT_TRIANGLES,
+    min_opacity: float = DEFAULT_MIN_OPACITY,
+    workers: int = 1,
+    force: bool = False,
+) -> list[MeshResult]:
+    """
+    Convert every splat in the env manifest to an OBJ beside it.
+
+    The manifest is left untouched (it is the reconstruct stage's output);
+    build_environment_from_manifest.py picks up <name>.obj for <name>.ply.
+    """
+    jobs = manifest_splats(env_name)
+    if not jobs:
+        log.info("No splats to convert for '%s'", env_name)
+        return []
+
+    mesh_dir = get_project_root() / "assets" / "meshes" / env_name
+    cache = StageCache("splat_to_mesh", mesh_dir / ".splat_to_mesh.stamp.json")
+    with span("cache_check"):
+        fingerprint = cache.fingerprint(
+            files=[source for _, source, _ in jobs],
+            params={"triangles": triangles, "min_opacity": min_opacity},
+            code=[Path(__file__), Path(__file__).with_name("splat_io.py")],
+        )
+        if not force and cache.is_fresh(fingerprint):
+            return []
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [
+                pool.submit(convert_splat, name, source, mesh, triangles, min_opacity)
+                for name, source, mesh in jobs
+            ]
+            results = [f.result() for f in futures]
+    else:
+        results = [
+            convert_splat(name, source, mesh, triangles, min_opacity)
+            for name, source, mesh in jobs
+        ]
+
+    cache.commit(fingerprint, [Path(r.mesh_path) for r in results])
+    return results
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert SAM3D splats to OBJ meshes")
+    parser.add_argument("env_name", help="Environment name (e.g., battlestation_batman)")
+    parser.add_argument(
+        "--triangles",
+        type=int,
+        default=DEFAULT_TRIANGLES,
+        help=f"Triangle budget per object (default: {DEFAULT_TRIANGLES})",
+    )
+    parser.add_argument(
+        "--min-opacity",
+        type=float,
+        default=DEFAULT_MIN_OPACITY,
+        help="Drop splats below this opacity before meshing",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Objects converted in parallel (default: CPU count)",
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild even if inputs are unchanged")
+    args = parser.parse_args()
+
+    try:
+        run_stage(args.env_name, args.triangles, args.min_opacity, args.workers, args.force)
+    finally:
+        finish("splat_to_mesh", args.env_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+stage_cache.py
+
+Stage-level build cache shared by the SAM3D pipeline scripts.
+
+Each stage fingerprints its inputs (file contents, CLI args, model ID and the
+stage's own source code) and records that fingerprint in a stamp file next to
+its outputs. Re-running a stage with an identical fingerprint and untouched
+outputs is skipped; pass --force to the stage to rebuild anyway.
+
+Usage:
+  cache = StageCache("sam3_segment", mask_dir / ".sam3_segment.stamp.json")
+  fp = cache.fingerprint(
+      files=[ref_image], params={"prompts": prompts},
+      model_id=SAM3_MODEL_ID, code=[Path(__file__)],
+  )
+  if not force and cache.is_fresh(fp):
+      return
+  ...
+  cache.commit(fp, outputs)
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+log = logging.getLogger("stage_cache")
+
+STAMP_VERSION = 1
+HASH_CHUNK_BYTES = 1 << 20
+
+
+# ============================================================================
+# HASHING
+# ============================================================================
+
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def output_signature(path: Path) -> Optional[dict]:
+    """Cheap identity of an output file (size + mtime), or None if missing."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# ============================================================================
+# STAGE CACHE
+# ============================================================================
+
+@dataclass
+class StageCache:
+    stage: str
+    stamp_path: Path
+
+    def fingerprint(
+        self,
+        files: Iterable[Path] = (),
+        params: Optional[dict] = None,
+        model_id: Optional[str] = None,
+        code: Iterable[Path] = (),
+    ) -> str:
+        """
+        Hash everything that determines this stage's outputs.
+
+        Missing input files hash as "<missing>" so that their later
+        appearance invalidates the stamp.
+        """
+        record: dict[str, Any] = {
+            "stage": self.stage,
+            "stamp_version": STAMP_VERSION,
+            "model_id": model_id,
+            "params": params or {},
+            "files": [],
+            "code": [],
+        }
+        for path in files:
+            path = Path(path)
+            digest = hash_file(path) if path.exists() else "<missing>"
+            record["files"].append([path.name, digest])
+        for path in code:
+            path = Path(path)
+            record["code"].append([path.name, hash_file(path)])
+
+        blob = json.dumps(record, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def load(self) -> Optional[dict]:
+        """Return the stored stamp, or None if absent/unreadable."""
+        try:
+            return json.loads(self.stamp_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, fingerprint: str) -> bool:
+        """True if the stamp matches and every recorded output is unchanged."""
+        stamp = self.load()
+        if stamp is None or stamp.get("fingerprint") != fingerprint:
+            return False
+
+        base = self.stamp_path.parent
+        for rel, sig in stamp.get("outputs", {}).items():
+            if output_signature(base / rel) != sig:
+                log.info("[%s] Output changed since last run: %s", self.stage, rel)
+                return False
+
+        log.info("[%s] Inputs unchanged; skipping (use --force to rebuild)", self.stage)
+        return True
+
+    def commit(self, fingerprint: str, outputs: Iterable[Path]) -> None:
+        """Record the fingerprint and current output signatures."""
+        base = self.stamp_path.parent
+        recorded = {}
+        for path in outputs:
+            path = Path(path)
+            sig = output_signature(path)
+            if sig is None:
+                log.warning("[%s] Not stamping missing output: %s", self.stage, path)
+                return
+            recorded[_relative_to(path, base)] = sig
+
+        stamp = {
+            "stage": self.stage,
+            "fingerprint": fingerprint,
+            "outputs": recorded,
+        }
+        self.stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stamp_path.write_text(json.dumps(stamp, indent=2))
+        log.info("[%s] Wrote stamp: %s", self.stage, self.stamp_path)
+
+    def invalidate(self) -> None:
+        """Remove the stamp so the next run rebuilds."""
+        self.stamp_path.unlink(missing_ok=True)
+
+
+def _relative_to(path: Path, base: Path) -> str:
+    """Path relative to base, falling back to '..' hops across directories."""
+    return os.path.relpath(path.resolve(), base.resolve())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+stream_segment_reconstruct.py
+
+Streaming segment -> reconstruct mode for one environment.
+
+SAM3 segmentation runs on the main thread; every mask is handed, as soon as
+it is written, through a bounded in-process queue to a reconstruction worker
+thread that keeps SAM3D resident. Both models live in one process, the queue
+bounds how far segmentation can run ahead, and reconstruction of object N
+overlaps segmentation of object N+1.
+
+Usage:
+  python scripts/stream_segment_reconstruct.py ENV_NAME \
+      --prompts "gaming chair" "desk surface" "monitor" [--queue-size 2] [--crop]
+
+Outputs are identical to running sam3_segment.py then sam3d_reconstruct.py:
+  assets/masks/ENV_NAME/<slug>.png
+  assets/meshes/ENV_NAME/<slug>.ply
+  manifests/ENV_NAME_manifest.json
+"""
+
+import argparse
+import logging
+import queue
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+from pipeline_trace import finish, span
+from result_store import ResultStore, default_store_root
+from sam3_segment import find_reference_image, segment_with_fallback, slugify_prompt
+from sam3d_reconstruct import (
+    CropConfig,
+    ObjectReconstructor,
+    SceneObject,
+    sam3d_installed,
+    write_manifest,
+)
+
+log = logging.getLogger("stream_segment_reconstruct")
+# Both stage modules configure logging on import; tag lines by logger instead
+logging.basicConfig(level=logging.INFO, format="[%(name)s] %(message)s", force=True)
+
+_DONE = object()
+
+
+# ============================================================================
+# RECONSTRUCTION WORKER
+# ============================================================================
+
+class ReconstructWorker(threading.Thread):
+    """Consumes (object_name, mask_path) items and reconstructs them in order."""
+
+    def __init__(
+        self,
+        env_name: str,
+        items: "queue.Queue",
+        crop: Optional[CropConfig],
+        store: Optional[ResultStore],
+    ):
+        super().__init__(name="sam3d-worker", daemon=True)
+        self.items = items
+        self.reconstructor = ObjectReconstructor(env_name, crop=crop, store=store)
+        self.results: dict[str, SceneObject] = {}
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        try:
+            while True:
+                item = self.items.get()
+                if item is _DONE:
+                    return
+                obj_name, mask_path = item
+                with span("stream_reconstruct", obj=obj_name):
+                    scene_object = self.reconstructor.reconstruct(obj_name, mask_path)
+                if scene_object is not None:
+                    # A re-emitted mask (backend fallback) replaces the earlier one
+                    self.results[obj_name] = scene_object
+        except BaseException as e:  # surfaced to the producer
+            self.error = e
+            log.exception("Reconstruction worker failed: %s", e)
+
+
+def put_while_alive(items: "queue.Queue", item: object, worker: ReconstructWorker) -> None:
+    """Blocking put that gives up if the consumer has died (avoids deadlock)."""
+    while True:
+        if worker.error is not None or not worker.is_alive():
+            raise RuntimeError("reconstruction worker is not running") from worker.error
+        try:
+            items.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+# ============================================================================
+# STREAMING PIPELINE
+# ============================================================================
+
+def run_streaming(
+    env_name: str,
+    prompts: list[str],
+    queue_size: int = 2,
+    crop: Optional[CropConfig] = None,
+    use_result_cache: bool = True,
+) -> Path:
+    """Segment and reconstruct with overlap; returns the manifest path."""
+    items: "queue.Queue" = queue.Queue(maxsize=max(queue_size, 1))
+    if use_result_cache and not sam3d_installed():
+        # Only real splats are ever stored, so nothing can hit without a checkpoint
+        log.warning("SAM3D not installed; skipping the result store")
+        use_result_cache = False
+    store = ResultStore(default_store_root()) if use_result_cache else None
+    worker = ReconstructWorker(env_name, items, crop, store)
+    worker.start()
+
+    def on_mask(prompt: str, mask_path: Path) -> None:
+        put_while_alive(items, (slugify_prompt(prompt), mask_path), worker)
+
+    try:
+        with span("stream_segment"):
+            backend, _ = segment_with_fallback(env_name, prompts, on_mask=on_mask)
+        log.info("Segmentation finished (%s); draining reconstruction queue", backend)
+    finally:
+        if worker.is_alive():
+            put_while_alive(items, _DONE, worker)
+        worker.join()
+
+    if worker.error is not None:
+        raise RuntimeError("streaming reconstruction failed") from worker.error
+
+    objects = [slugify_prompt(p) for p in prompts]
+    scene_objects = worker.reconstructor.collect(objects, worker.results)
+    return write_manifest(env_name, scene_objects)
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Streaming SAM3 segmentation -> SAM3D reconstruction"
+    )
+    parser.add_argument("env_name", help="Environment name (e.g., battlestation_batman)")
+    parser.add_argument(
+        "--prompts",
+        nargs="+",
+        required=True,
+        help='Object prompts, e.g., "gaming chair" "desk surface"',
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=2,
+        help="Max masks waiting for reconstruction (bounds memory; default: 2)",
+    )
+    parser.add_argument("--crop", action="store_true", help="Mask-bbox crop before inference")
+    parser.add_argument(
+        "--no-result-cache",
+        action="store_true",
+        help="Always run inference; do not use the per-object result store",
+    )
+    args = parser.parse_args()
+
+    try:
+        find_reference_image(args.env_name)
+    except FileNotFoundError as e:
+        log.error("%s", e)
+        sys.exit(1)
+
+    try:
+        run_streaming(
+            args.env_name,
+            args.prompts,
+            queue_size=args.queue_size,
+            crop=CropConfig() if args.crop else None,
+            use_result_cache=not args.no_result_cache,
+        )
+    finally:
+        finish("stream_segment_reconstruct", args.env_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+validate_manifest.py
+
+Validate scene manifests before they reach Blender.
+
+Checks:
+  1. Schema: manifests/scene_manifest.schema.json, compiled once into nested
+     check functions and cached per schema file (path + mtime), so repeated
+     validations cost a walk of the manifest only
+  2. Consistency: unique object names, env_name matches the file name
+  3. Files: referenced meshes/masks/reference exist and meshes are not
+     placeholders (< PLACEHOLDER_BYTES, the loader's skip threshold); splat
+     PLYs need their converted OBJ
+  4. Optional (--verify-hashes): v2 mesh/mask SHA-256 match the files
+
+Every problem is reported with its JSON path (e.g. objects[2].scale).
+Schema and consistency problems are errors. Missing or placeholder files
+are warnings, because stub runs produce them by design; --strict makes them
+errors.
+
+Runs as the orchestrator's final "manifest" node and before
+build_environment_from_manifest.py imports anything.
+
+Usage:
+  python scripts/validate_manifest.py ENV_NAME [ENV_NAME ...] | --all
+      [--strict] [--verify-hashes]
+"""
+
+import argparse
+import functools
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from scene_manifest import HASH_KEYS, file_digest, manifest_path, manifest_root, resolve
+
+PLACEHOLDER_BYTES = 100
+
+Check = Callable[[Any, str, list], None]
+
+JSON_TYPES: dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+@dataclass
+class ValidationReport:
+    path: Path
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def format(self) -> str:
+        lines = [f"{self.path}: {'OK' if self.ok else 'INVALID'}"]
+        lines += [f"  ERROR   {e}" for e in self.errors]
+        lines += [f"  WARNING {w}" for w in self.warnings]
+        return "\n".join(lines)
+
+
+# ============================================================================
+# SCHEMA COMPILER
+# ============================================================================
+
+def compile_schema(schema: dict) -> Check:
+    """
+    Compile a JSON-Schema subset into a check(value, path, errors) function.
+
+    Supported: type, enum, required, properties, additionalProperties (bool),
+    items, minItems, maxItems, minimum, maximum. Annotations ($schema, title,
+    description) are ignored.
+    """
+    checks: list[Check] = []
+
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        preds = [JSON_TYPES[n] for n in names]
+        expected = " or ".join(names)
+
+        def check_type(v, path, errors, preds=preds, expected=expected):
+            if not any(p(v) for p in preds):
+                errors.append(f"{path}: expected {expected}, got {type(v).__name__}")
+                raise _Stop
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(v, path, errors):
+            if v not in allowed:
+                errors.append(f"{path}: {v!r} not one of {allowed}")
+        checks.append(check_enum)
+
+    for key, op, word in (("minimum", float.__lt__, "below"), ("maximum", float.__gt__, "above")):
+        if key in schema:
+            bound = float(schema[key])
+
+            def check_bound(v, path, errors, bound=bound, op=op, word=word):
+                if isinstance(v, (int, float)) and op(float(v), bound):
+                    errors.append(f"{path}: {v} is {word} {bound}")
+            checks.append(check_bound)
+
+    if "required" in schema:
+        required = list(schema["required"])
+
+        def check_required(v, path, errors):
+            if isinstance(v, dict):
+                for key in required:
+                    if key not in v:
+                        errors.append(f"{path}: missing required '{key}'")
+        checks.append(check_required)
+
+    if "properties" in schema:
+        props = {k: compile_schema(s) for k, s in schema["properties"].items()}
+        closed = schema.get("additionalProperties") is False
+
+        def check_props(v, path, errors):
+            if not isinstance(v, dict):
+                return
+            for key, item in v.items():
+                sub = props.get(key)
+                if sub is not None:
+                    sub(item, f"{path}.{key}", errors)
+                elif closed:
+                    errors.append(f"{path}: unexpected property '{key}'")
+        checks.append(check_props)
+
+    if "minItems" in schema or "maxItems" in schema:
+        lo = schema.get("minItems", 0)
+        hi = schema.get("maxItems")
+
+        def check_len(v, path, errors):
+            if isinstance(v, list) and (len(v) < lo or (hi is not None and len(v) > hi)):
+                want = f"{lo}" if hi == lo else f"{lo}..{hi if hi is not None else ''}"
+                errors.append(f"{path}: expected {want} items, got {len(v)}")
+        checks.append(check_len)
+
+    if "items" in schema:
+        item_check = compile_schema(schema["items"])
+
+        def check_items(v, path, errors):
+            if isinstance(v, list):
+                for i, item in enumerate(v):
+                    item_check(item, f"{path}[{i}]", errors)
+        checks.append(check_items)
+
+    def run(v, path, errors):
+        try:
+            for c in checks:
+                c(v, path, errors)
+        except _Stop:
+            pass
+    return run
+
+
+class _Stop(Exception):
+    """Type mismatch: skip this value's remaining checks."""
+
+
+def default_schema_path() -> Path:
+    return Path(__file__).resolve().parents[1] / "manifests" / "scene_manifest.schema.json"
+
+
+@functools.lru_cache(maxsize=8)
+def _compiled(path: str, mtime_ns: int) -> Check:
+    return compile_schema(json.loads(Path(path).read_text()))
+
+
+def load_validator(schema_path: Optional[Path] = None) -> Check:
+    """Compiled schema check, cached until the schema file changes."""
+    path = Path(schema_path or default_schema_path())
+    return _compiled(str(path), path.stat().st_mtime_ns)
+
+
+# ============================================================================
+# MANIFEST VALIDATION
+# ============================================================================
+
+def check_files(manifest: dict, root: Path, verify_hashes: bool) -> tuple[list[str], list[str]]:
+    """(errors, warnings) for the files a manifest points at."""
+    errors: list[str] = []
+    warnings: list[str] = []
+
+    ref = manifest.get("reference_image")
+    if ref and not resolve(ref, root).exists():
+        warnings.append(f"$.reference_image: not found: {resolve(ref, root)}")
+
+    for i, obj in enumerate(manifest.get("objects", [])):
+        where = f"$.objects[{i}] ({obj.get('name')})"
+        mesh = resolve(obj.get("mesh_path", ""), root)
+        if not mesh.is_file():
+            warnings.append(f"{where}.mesh_path: not found: {mesh}")
+        elif mesh.stat().st_size < PLACEHOLDER_BYTES:
+            warnings.append(f"{where}.mesh_path: placeholder ({mesh.stat().st_size} bytes): {mesh}")
+        elif mesh.suffix.lower() == ".ply" and not mesh.with_suffix(".obj").exists():
+            warnings.append(f"{where}.mesh_path: splat not converted (run splat_to_mesh.py)")
+
+        if obj.get("mask_path"):
+            mask = resolve(obj["mask_path"], root)
+            if not mask.is_file():
+                warnings.append(f"{where}.mask_path: not found: {mask}")
+
+        if verify_hashes:
+            for key, hash_key in HASH_KEYS.items():
+                recorded = obj.get(hash_key)
+                if recorded and obj.get(key):
+                    actual = file_digest(resolve(obj[key], root))
+                    if actual != recorded:
+                        errors.append(f"{where}.{hash_key}: file changed since manifest was written")
+    return errors, warnings
+
+
+def validate_manifest(
+    path: Path,
+    strict: bool = False,
+    verify_hashes: bool = False,
+    schema_path: Optional[Path] = None,
+) -> ValidationReport:
+    """Validate one manifest file; never raises for content problems."""
+    report = ValidationReport(Path(path))
+    try:
+        manifest = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        report.errors.append("$: manifest file not found")
+        return report
+    except json.JSONDecodeError as e:
+        report.errors.append(f"$: invalid JSON at line {e.lineno} col {e.colno}: {e.msg}")
+        return report
+
+    load_validator(schema_path)(manifest, "$", report.errors)
+    if report.errors:
+        return report
+
+    expected_env = Path(path).name.removesuffix("_manifest.json")
+    if manifest["env_name"] != expected_env:
+        report.errors.append(f"$.env_name: {manifest['env_name']!r} does not match file name")
+
+    seen: dict[str, int] = {}
+    for i, obj in enumerate(manifest["objects"]):
+        if obj["name"] in seen:
+            report.errors.append(
+                f"$.objects[{i}].name: duplicate of objects[{seen[obj['name']]}] ({obj['name']!r})"
+            )
+        seen.setdefault(obj["name"], i)
+
+    file_errors, file_warnings = check_files(manifest, manifest_root(Path(path), manifest), verify_hashes)
+    report.errors += file_errors
+    if strict:
+        report.errors += file_warnings
+    else:
+        report.warnings += file_warnings
+    return report
+
+
+# ============================================================================
+# MAIN CLI
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate scene manifests")
+    parser.add_argument("env_names", nargs="*", help="Environment names")
+    parser.add_argument("--all", action="store_true", help="Every manifests/*_manifest.json")
+    parser.add_argument("--strict", action="store_true", help="Treat missing/placeholder files as errors")
+    parser.add_argument("--verify-hashes", action="store_true", help="Re-hash files against v2 hashes")
+    args = parser.parse_args()
+
+    if args.all:
+        paths = sorted(default_schema_path().parent.glob("*_manifest.json"))
+    else:
+        paths = [manifest_path(name) for name in args.env_names]
+    if not paths:
+        parser.error("give ENV_NAMEs or --all")
+
+    failed = 0
+    for path in paths:
+        report = validate_manifest(path, strict=args.strict, verify_hashes=args.verify_hashes)
+        print(report.format())
+        failed += not report.ok
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()